@@ -1,7 +1,8 @@
+import asyncio
 import json
 from typing import List, Optional
 
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.responses import StreamingResponse
 from langchain_core.messages import (
     HumanMessage,
@@ -12,7 +13,9 @@ from langchain_core.messages import (
     BaseMessage,
 )
 
-from .database.mongo_client import mongo_db
+from .database.async_mongo_client import async_mongo_db
+from .database.constants import HISTORY_MAX_PAGE_SIZE, HISTORY_PAGE_SIZE, MESSAGE_FIELDS
+from .knowledge.vectordb import query_cache
 from .models import (
     LanguageModelV1Message,
     LanguageModelTextPart,
@@ -20,6 +23,7 @@ from .models import (
     LanguageModelToolCallPart,
     ChatRequest
 )
+from .response_cache import RESPONSE_CACHE_ENABLED, prompt_fingerprint, response_cache
 
 
 def convert_to_langchain_messages(
@@ -103,9 +107,9 @@ def convert_mongodb_messages_to_langchain(messages: List[dict]) -> List[BaseMess
     return result
 
 
-def save_message_to_mongodb(conversation_id: str, role: str, content: str, tool_info: Optional[dict] = None):
+async def save_message_to_mongodb(conversation_id: str, role: str, content: str, tool_info: Optional[dict] = None):
     """Save a message to MongoDB if the connection is available"""
-    if mongo_db.health_check():
+    if async_mongo_db.health_check():
         message_data = {
             "role": role,
             "content": content,
@@ -114,34 +118,85 @@ def save_message_to_mongodb(conversation_id: str, role: str, content: str, tool_
         if tool_info:
             message_data["tool_info"] = tool_info
 
-        mongo_db.save_message(conversation_id, message_data)
+        await async_mongo_db.save_message(conversation_id, message_data)
         return True
     return False
 
 
+def cacheable_question(messages: List[BaseMessage]) -> Optional[str]:
+    """Text of the user's question if the turn is a standalone text question, otherwise None.
+
+    Only such turns are answered from or stored in the response cache; once a
+    conversation has assistant or tool messages the answer depends on more
+    than the question.
+    """
+    questions = [msg for msg in messages if isinstance(msg, HumanMessage)]
+    if len(questions) != 1 or any(isinstance(msg, (AIMessage, ToolMessage)) for msg in messages):
+        return None
+
+    content = questions[0].content
+    if isinstance(content, str):
+        return content.strip() or None
+    if any(isinstance(part, dict) and part.get("type") != "text" for part in content):
+        return None
+    text = "".join(part.get("text", "") if isinstance(part, dict) else part for part in content)
+    return text.strip() or None
+
+
+async def thread_in_checkpointer(graph, config: dict) -> bool:
+    """Whether the graph's checkpointer holds messages for the thread in `config`."""
+    if graph.checkpointer is None:
+        return False
+    try:
+        checkpoint_tuple = await graph.checkpointer.aget_tuple(config)
+    except Exception as e:
+        print(f"[CHAT] Checkpoint lookup failed: {str(e)}")
+        return False
+    return bool(checkpoint_tuple and checkpoint_tuple.checkpoint["channel_values"].get("messages"))
+
+
+def unseen_messages(messages: List[BaseMessage]) -> List[BaseMessage]:
+    """Messages of the request that follow its last assistant message.
+
+    The frontend may resend the whole conversation; for a checkpointed thread
+    everything up to the last assistant message is already in the graph state,
+    and only the new user turn or frontend tool results after it are new.
+    """
+    for index in range(len(messages) - 1, -1, -1):
+        if isinstance(messages[index], AIMessage):
+            return messages[index + 1:]
+    return [msg for msg in messages if not isinstance(msg, SystemMessage)]
+
+
 def add_langgraph_route(app: FastAPI, graph, base_path: str):
     async def chat_completions(conversation_id: str, request: ChatRequest):
-        # Get existing message history from MongoDB
-        previous_messages = []
-        if mongo_db.health_check():
-            mongo_messages = mongo_db.get_conversation_messages(conversation_id)
-            if mongo_messages:
-                previous_messages = convert_mongodb_messages_to_langchain(mongo_messages)
-        
         # Convert new messages from the request
         new_messages = convert_to_langchain_messages(request.messages)
-        
-        # Determine if we need to initialize with history or just use the new messages
-        # If we have previous messages and this is just a single new user message,
-        # we'll combine them to maintain conversation context
-        if previous_messages and len(new_messages) == 1 and isinstance(new_messages[0], HumanMessage):
-            # Use the full history plus the new message
-            inputs = previous_messages + new_messages
-            print(f"[CHAT] Initializing with {len(inputs)} messages ({len(previous_messages)} from history)")
+
+        # The checkpointer is the source of truth for threads it holds; Mongo
+        # history is only read to rehydrate threads it no longer has
+        thread_config = {"configurable": {"thread_id": conversation_id}}
+        if await thread_in_checkpointer(graph, thread_config):
+            inputs = unseen_messages(new_messages)
+            is_new_thread = False
+            print(f"[CHAT] Thread is checkpointed, sending {len(inputs)} new messages")
         else:
-            # Just use the messages from the request (e.g., if frontend sent full history)
-            inputs = new_messages
-            print(f"[CHAT] Using {len(inputs)} messages from request")
+            previous_messages = []
+            if async_mongo_db.health_check():
+                mongo_messages = await async_mongo_db.get_conversation_messages(conversation_id)
+                if mongo_messages:
+                    previous_messages = convert_mongodb_messages_to_langchain(mongo_messages)
+
+            # If we have previous messages and this is just a single new user message,
+            # we'll combine them to maintain conversation context
+            if previous_messages and len(new_messages) == 1 and isinstance(new_messages[0], HumanMessage):
+                inputs = previous_messages + new_messages
+                print(f"[CHAT] Rehydrating thread with {len(inputs)} messages ({len(previous_messages)} from history)")
+            else:
+                # Just use the messages from the request (e.g., if frontend sent full history)
+                inputs = new_messages
+                print(f"[CHAT] Using {len(inputs)} messages from request")
+            is_new_thread = not previous_messages
 
         # Save new user messages to MongoDB
         for msg in request.messages:
@@ -152,9 +207,29 @@ def add_langgraph_route(app: FastAPI, graph, base_path: str):
                         text_content += part.text
 
                 if text_content:
-                    save_message_to_mongodb(conversation_id, "user", text_content)
+                    await save_message_to_mongodb(conversation_id, "user", text_content)
 
         thread_id = conversation_id
+        user_id = request.user_id or "default_user"
+        retrieval = request.retrieval.model_dump(exclude_none=True) if request.retrieval else {}
+
+        # Standalone questions can be answered from the semantic response cache
+        cache_scope = cache_vector = cached_response = None
+        cache_question = cacheable_question(inputs) if RESPONSE_CACHE_ENABLED and is_new_thread else None
+        if cache_question:
+            try:
+                cache_vector = await asyncio.to_thread(query_cache.embed_query, cache_question)
+                fingerprint = prompt_fingerprint(
+                    request.system,
+                    [tool.model_dump() for tool in request.tools or []],
+                    retrieval=retrieval,
+                )
+                # The knowledge base generation retires cached answers once the user's documents change
+                cache_scope = (user_id, fingerprint, query_cache.generation(user_id))
+                cached_response = response_cache.lookup(cache_scope, cache_vector)
+            except Exception as e:
+                print(f"[CHAT] Response cache lookup failed: {str(e)}")
+                cache_scope = None
 
         async def stream_response():
             """Stream response with proper Unicode handling"""
@@ -163,12 +238,25 @@ def add_langgraph_route(app: FastAPI, graph, base_path: str):
                 "configurable": {
                     "system": request.system,
                     "frontend_tools": request.tools,
-                    "thread_id": thread_id
+                    "thread_id": thread_id,
+                    "user_id": user_id,
+                    "retrieval": retrieval
                 }
             }
 
             message_count = 0
             full_response = ""
+            used_tools = False
+            thread_ref = f"\n<!--conversation_id:{thread_id}-->"
+
+            if cached_response is not None:
+                # Replay the cached answer as a regular stream without calling the model
+                print(f"[CHAT] Response cache hit for thread: {thread_id}")
+                yield "data: {}\n\n"
+                yield f"data: {json.dumps({'text': cached_response})}\n\n"
+                await save_message_to_mongodb(conversation_id, "assistant", cached_response)
+                yield f"data: {json.dumps({'text': thread_ref})}\n\n"
+                return
 
             try:
 
@@ -182,6 +270,8 @@ def add_langgraph_route(app: FastAPI, graph, base_path: str):
                     message_count += 1
 
                     if isinstance(msg, AIMessageChunk) or isinstance(msg, AIMessage):
+                        if getattr(msg, "tool_call_chunks", None) or msg.tool_calls:
+                            used_tools = True
                         if msg.content:
                             json_data = json.dumps({"text": msg.content})
                             yield f"data: {json_data}\n\n"
@@ -189,10 +279,11 @@ def add_langgraph_route(app: FastAPI, graph, base_path: str):
                             full_response += msg.content
 
                     elif isinstance(msg, ToolMessage):
+                        used_tools = True
                         json_data = json.dumps({"tool": msg.tool_call_id, "result": msg.content})
                         yield f"data: {json_data}\n\n"
 
-                        save_message_to_mongodb(
+                        await save_message_to_mongodb(
                             conversation_id,
                             "tool",
                             msg.content,
@@ -201,9 +292,12 @@ def add_langgraph_route(app: FastAPI, graph, base_path: str):
 
                 if full_response:
                     clean_response = full_response.replace(f"\n<!--conversation_id:{thread_id}-->", "")
-                    save_message_to_mongodb(conversation_id, "assistant", clean_response)
+                    await save_message_to_mongodb(conversation_id, "assistant", clean_response)
+
+                    # Answers that needed tools depend on more than the question, so they are not cached
+                    if cache_scope is not None and not used_tools:
+                        response_cache.store(cache_scope, cache_vector, clean_response)
 
-                thread_ref = f"\n<!--conversation_id:{thread_id}-->"
                 yield f"data: {json.dumps({'text': thread_ref})}\n\n"
 
             except Exception as e:
@@ -221,12 +315,42 @@ def add_langgraph_route(app: FastAPI, graph, base_path: str):
         )
 
     @app.get(f"{base_path}/{{conversation_id}}/history")
-    async def get_conversation_history(conversation_id: str):
-        """Get message history for a conversation"""
-        if not mongo_db.health_check():
-            return {"messages": [], "error": "MongoDB not available"}
-
-        messages = mongo_db.get_conversation_messages(conversation_id)
-        return {"messages": messages}
+    async def get_conversation_history(
+            conversation_id: str,
+            before: Optional[str] = None,
+            after: Optional[str] = None,
+            limit: int = Query(HISTORY_PAGE_SIZE, ge=1, le=HISTORY_MAX_PAGE_SIZE),
+            fields: Optional[str] = None,
+    ):
+        """Get a page of message history for a conversation, newest first.
+
+        Pass `before_cursor` from a page as `before` to load older messages and
+        `after_cursor` as `after` to load newer ones. `fields` is a
+        comma-separated subset of the message fields to return.
+        """
+        if before and after:
+            raise HTTPException(status_code=400, detail="Use either 'before' or 'after', not both")
+
+        field_list = None
+        if fields:
+            field_list = [field.strip() for field in fields.split(",") if field.strip()]
+            unknown = set(field_list) - set(MESSAGE_FIELDS)
+            if unknown:
+                raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+
+        if not async_mongo_db.health_check():
+            return {"messages": [], "has_more": False, "error": "MongoDB not available"}
+
+        try:
+            return await async_mongo_db.get_conversation_messages_page(
+                conversation_id, before=before, after=after, limit=limit, fields=field_list
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    @app.get(f"{base_path}/response-cache/stats")
+    async def get_response_cache_stats():
+        """Get hit-rate metrics of the semantic response cache"""
+        return response_cache.stats()
 
     app.add_api_route(f"{base_path}/{{conversation_id}}/chat", chat_completions, methods=["POST"])
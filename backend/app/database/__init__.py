@@ -1,3 +1,3 @@
-from .mongo_client import mongo_db
+from .async_mongo_client import async_mongo_db
 
-__all__ = ["mongo_db"]
+__all__ = ["async_mongo_db"]
@@ -0,0 +1,307 @@
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Any, Sequence
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from .constants import (
+    CONVERSATIONS_COLLECTION,
+    CONVERSATION_PROJECTION,
+    CONVERSATIONS_PAGE_SIZE,
+    DB_NAME,
+    DEFAULT_USER_ID,
+    HISTORY_PAGE_SIZE,
+    MESSAGE_FIELDS,
+    MESSAGES_COLLECTION,
+    MONGODB_URI,
+)
+from .health_monitor import HealthMonitor
+from .pagination import encode_cursor, keyset_filter
+from .write_behind import MessageWriteBehind
+
+# Connection pool sizing for the async driver
+MONGODB_MAX_POOL_SIZE = int(os.environ.get("MONGODB_MAX_POOL_SIZE", "100"))
+MONGODB_MIN_POOL_SIZE = int(os.environ.get("MONGODB_MIN_POOL_SIZE", "0"))
+
+
+class AsyncMongoDBClient:
+    """Non-blocking counterpart of MongoDBClient backed by a pooled Motor client.
+
+    The client is created lazily by connect() so that it binds to the running
+    event loop; call it once from the application startup hook. Availability
+    is tracked out-of-band by a HealthMonitor, so health_check() is a cached
+    read that request handlers can call freely. Messages are persisted through
+    a MessageWriteBehind buffer in bulk.
+    """
+
+    def __init__(self):
+        self.client = None
+        self.db = None
+        self.health = HealthMonitor("MongoDB", self.ping)
+        self.writer = MessageWriteBehind(lambda: self.db, MESSAGES_COLLECTION, CONVERSATIONS_COLLECTION)
+
+    async def connect(self):
+        """Connect to MongoDB using the URI from environment variables."""
+        try:
+            self.client = AsyncIOMotorClient(
+                MONGODB_URI,
+                serverSelectionTimeoutMS=5000,
+                maxPoolSize=MONGODB_MAX_POOL_SIZE,
+                minPoolSize=MONGODB_MIN_POOL_SIZE,
+            )
+            # Test the connection
+            await self.client.admin.command('ping')
+            self.db = self.client.get_default_database(DB_NAME)
+            self.health.set_state(True)
+            print(f"Connected to MongoDB (async): {MONGODB_URI}")
+        except Exception as e:
+            print(f"Error connecting to MongoDB: {e}, current connection string: {MONGODB_URI}")
+            if self.client is not None:
+                self.client.close()
+            self.client = None
+            self.db = None
+            self.health.set_state(False)
+            print("WARNING: MongoDB connection failed, falling back to in-memory storage")
+
+    def start_background_tasks(self):
+        """Start health probing and the write-behind flusher; only meaningful once connected."""
+        if self.client is not None:
+            self.health.start()
+            self.writer.start()
+
+    async def close(self):
+        """Flush buffered messages, stop background tasks and close the connection pool."""
+        try:
+            await self.writer.stop()
+        except Exception as e:
+            print(f"[MONGODB] Error flushing buffered messages on shutdown: {str(e)}")
+        await self.health.stop()
+        if self.client is not None:
+            self.client.close()
+            self.client = None
+            self.db = None
+        self.health.set_state(False)
+
+    async def ping(self):
+        """Round trip to the server; used by the health monitor."""
+        if self.client is None:
+            raise ConnectionError("MongoDB client is not connected")
+        await self.client.admin.command('ping')
+
+    def health_check(self) -> bool:
+        """Return the cached health state without doing any network I/O."""
+        return self.client is not None and self.health.is_healthy
+
+    # === Conversation methods ===
+
+    async def create_conversation(self, conversation_id: str, title: str,
+                                  user_id: str = DEFAULT_USER_ID) -> Dict[str, Any]:
+        """Create a new conversation with the provided ID"""
+        if self.client is None:
+            print("[MONGODB] Database not connected, skipping create_conversation")
+            return None
+
+        # Check if conversation already exists to avoid duplicates
+        existing = await self.get_conversation(conversation_id)
+        if existing:
+            print(f"[MONGODB] Conversation with ID {conversation_id} already exists")
+            return existing
+
+        now = datetime.now().isoformat()
+        conversation = {
+            "conversation_id": conversation_id,
+            "user_id": user_id,
+            "title": title,
+            "created_at": now,
+            "updated_at": now,
+            # Sidebar summary, maintained by the message writer
+            "message_count": 0,
+            "last_message_preview": None
+        }
+
+        try:
+            # insert_one adds _id to the dict in place, so insert a copy
+            await self.db[CONVERSATIONS_COLLECTION].insert_one(dict(conversation))
+            print(f"[MONGODB] Created conversation: {conversation_id}")
+            return conversation
+        except Exception as e:
+            print(f"[MONGODB] Error creating conversation: {str(e)}")
+            return None
+
+    async def get_conversation(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """Get a conversation by ID"""
+        if self.client is None:
+            return None
+
+        return await self.db[CONVERSATIONS_COLLECTION].find_one(
+            {"conversation_id": conversation_id},
+            CONVERSATION_PROJECTION
+        )
+
+    async def list_conversations(
+            self,
+            user_id: str,
+            limit: int = CONVERSATIONS_PAGE_SIZE,
+            before: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """List one page of a user's conversations, most recently updated first.
+
+        Pages are keyed on (updated_at, conversation_id); pass the returned
+        `next_cursor` as `before` for the next page. Rows carry the
+        denormalized message_count and last_message_preview, so no messages
+        are read.
+        """
+        if self.client is None:
+            return {"conversations": [], "next_cursor": None, "has_more": False}
+
+        query: Dict[str, Any] = {"user_id": user_id}
+        if before:
+            query.update(keyset_filter("updated_at", "conversation_id", before, "$lt"))
+
+        cursor = self.db[CONVERSATIONS_COLLECTION].find(query, CONVERSATION_PROJECTION).sort(
+            [("updated_at", -1), ("conversation_id", -1)]
+        ).limit(limit + 1)
+        conversations = await cursor.to_list(length=limit + 1)
+
+        has_more = len(conversations) > limit
+        conversations = conversations[:limit]
+        last = conversations[-1] if conversations else None
+        return {
+            "conversations": conversations,
+            "next_cursor": encode_cursor(last["updated_at"], last["conversation_id"]) if has_more else None,
+            "has_more": has_more,
+        }
+
+    async def update_conversation(self, conversation_id: str, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Update a conversation"""
+        if self.client is None:
+            return None
+
+        # Always update the updated_at timestamp
+        updates["updated_at"] = datetime.now().isoformat()
+
+        result = await self.db[CONVERSATIONS_COLLECTION].update_one(
+            {"conversation_id": conversation_id},
+            {"$set": updates}
+        )
+
+        if result.matched_count == 0:
+            return None
+
+        return await self.get_conversation(conversation_id)
+
+    async def delete_conversation(self, conversation_id: str) -> bool:
+        """Delete a conversation and its messages"""
+        if self.client is None:
+            return False
+
+        # Flush buffered messages first so they are not written back after the delete
+        if self.writer.has_pending(conversation_id):
+            await self.writer.flush()
+
+        # Delete the conversation
+        result = await self.db[CONVERSATIONS_COLLECTION].delete_one({"conversation_id": conversation_id})
+
+        # Delete all messages for this conversation
+        await self.db[MESSAGES_COLLECTION].delete_many({"conversation_id": conversation_id})
+
+        return result.deleted_count > 0
+
+    # === Message methods ===
+
+    async def save_message(self, conversation_id: str, message: Dict[str, Any]) -> str:
+        """Save a message to a conversation through the write-behind buffer"""
+        if self.client is None:
+            return None
+
+        # Add _id, conversation_id and timestamp; a client-side _id keeps retried flushes idempotent
+        message_doc = {
+            "_id": ObjectId(),
+            "conversation_id": conversation_id,
+            "timestamp": datetime.now().isoformat(),
+            **message  # Include all fields from the message
+        }
+
+        # The conversation's updated_at is bumped once per flush
+        await self.writer.submit(conversation_id, message_doc)
+
+        # Return the message ID
+        return str(message_doc["_id"])
+
+    async def get_conversation_messages(self, conversation_id: str) -> List[Dict[str, Any]]:
+        """Get all messages for a conversation"""
+        if self.client is None:
+            return []
+
+        # Make buffered messages visible before reading the history back
+        if self.writer.has_pending(conversation_id):
+            await self.writer.flush()
+
+        cursor = self.db[MESSAGES_COLLECTION].find(
+            {"conversation_id": conversation_id},
+            CONVERSATION_PROJECTION
+        ).sort("timestamp", 1)  # Sort by timestamp ascending
+        return await cursor.to_list(length=None)
+
+    async def get_conversation_messages_page(
+            self,
+            conversation_id: str,
+            before: Optional[str] = None,
+            after: Optional[str] = None,
+            limit: int = HISTORY_PAGE_SIZE,
+            fields: Optional[Sequence[str]] = None,
+    ) -> Dict[str, Any]:
+        """Get one page of a conversation's messages, newest first.
+
+        Pages are keyed on (timestamp, _id), so they stay stable while new
+        messages arrive. Without a cursor the newest `limit` messages are
+        returned; `before` pages towards older messages and `after` towards
+        newer ones. `fields` restricts the returned message fields. The result
+        holds the messages (each with its `id`), `before_cursor`/`after_cursor`
+        pointing at the oldest/newest message of the page, and `has_more`, which
+        tells whether more messages exist in the paging direction.
+        """
+        empty = {"messages": [], "before_cursor": before, "after_cursor": after, "has_more": False}
+        if self.client is None:
+            return empty
+
+        if self.writer.has_pending(conversation_id):
+            await self.writer.flush()
+
+        query: Dict[str, Any] = {"conversation_id": conversation_id}
+        if after or before:
+            query.update(keyset_filter("timestamp", "_id", after or before, "$gt" if after else "$lt", ObjectId))
+
+        projection = {field: 1 for field in fields or MESSAGE_FIELDS}
+        # The cursor needs both sort keys even when they are not requested
+        projection["timestamp"] = 1
+        direction = 1 if after else -1
+        cursor = self.db[MESSAGES_COLLECTION].find(query, projection).sort(
+            [("timestamp", direction), ("_id", direction)]
+        ).limit(limit + 1)
+        messages = await cursor.to_list(length=limit + 1)
+
+        has_more = len(messages) > limit
+        messages = messages[:limit]
+        if after:
+            messages.reverse()
+        if not messages:
+            return empty
+
+        page = {
+            "messages": [],
+            "before_cursor": encode_cursor(messages[-1]["timestamp"], messages[-1]["_id"]),
+            "after_cursor": encode_cursor(messages[0]["timestamp"], messages[0]["_id"]),
+            "has_more": has_more,
+        }
+        for message in messages:
+            item = {"id": str(message.pop("_id")), **message}
+            if fields and "timestamp" not in fields:
+                item.pop("timestamp")
+            page["messages"].append(item)
+        return page
+
+
+# Initialize async MongoDB client (connected from the application startup hook)
+async_mongo_db = AsyncMongoDBClient()
@@ -0,0 +1,38 @@
+"""
+Names and limits shared by the MongoDB clients, the schema bootstrap and the API.
+
+Kept free of driver imports so the synchronous client does not load the
+async one (and Motor) just to agree on collection names.
+"""
+
+import os
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Get MongoDB connection string from environment variables or use default
+MONGODB_URI = os.environ.get("MONGODB_URI", "mongodb://mongodb:27017/assistant_db")
+DB_NAME = os.environ.get("MONGODB_DB_NAME", "assistant_db")
+
+# Collections
+CONVERSATIONS_COLLECTION = "conversations"
+MESSAGES_COLLECTION = "messages"
+
+# Recent write-behind batch ids applied to a conversation's summary, so a retried batch counts once
+SUMMARY_BATCHES_FIELD = "summary_batches"
+# Conversation documents as returned to callers, without Mongo bookkeeping
+CONVERSATION_PROJECTION = {"_id": 0, SUMMARY_BATCHES_FIELD: 0}
+
+# Page size of the message history endpoint
+HISTORY_PAGE_SIZE = int(os.environ.get("HISTORY_PAGE_SIZE", "50"))
+HISTORY_MAX_PAGE_SIZE = 200
+# Message fields a history page may be projected to
+MESSAGE_FIELDS = ("conversation_id", "role", "content", "timestamp", "tool_info")
+
+# Page size of the conversation listing
+CONVERSATIONS_PAGE_SIZE = int(os.environ.get("CONVERSATIONS_PAGE_SIZE", "50"))
+CONVERSATIONS_MAX_PAGE_SIZE = 200
+# Owner of conversations created without a user, matching the chat endpoint's default
+DEFAULT_USER_ID = "default_user"
@@ -0,0 +1,136 @@
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+# Probe configuration
+MONGODB_HEALTH_INTERVAL = float(os.environ.get("MONGODB_HEALTH_INTERVAL", "5"))
+MONGODB_HEALTH_TIMEOUT = float(os.environ.get("MONGODB_HEALTH_TIMEOUT", "2"))
+# Consecutive results required before the cached state flips (hysteresis)
+MONGODB_HEALTH_FAILURE_THRESHOLD = int(os.environ.get("MONGODB_HEALTH_FAILURE_THRESHOLD", "2"))
+MONGODB_HEALTH_RECOVERY_THRESHOLD = int(os.environ.get("MONGODB_HEALTH_RECOVERY_THRESHOLD", "2"))
+
+
+class HealthMonitor:
+    """Probe a dependency in the background and cache its up/down state.
+
+    Readers call is_healthy, which never does network I/O. The cached state
+    only flips after `failure_threshold` consecutive failed probes (up -> down)
+    or `recovery_threshold` consecutive successful probes (down -> up), so a
+    single slow ping does not bounce every request onto the fallback path.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            probe: Callable[[], Awaitable[Any]],
+            interval: float = MONGODB_HEALTH_INTERVAL,
+            timeout: float = MONGODB_HEALTH_TIMEOUT,
+            failure_threshold: int = MONGODB_HEALTH_FAILURE_THRESHOLD,
+            recovery_threshold: int = MONGODB_HEALTH_RECOVERY_THRESHOLD,
+            initial_state: bool = False,
+    ):
+        self.name = name
+        self.probe = probe
+        self.interval = interval
+        self.timeout = timeout
+        self.failure_threshold = max(1, failure_threshold)
+        self.recovery_threshold = max(1, recovery_threshold)
+
+        self._healthy = initial_state
+        self._consecutive_failures = 0
+        self._consecutive_successes = 0
+        self._task: Optional[asyncio.Task] = None
+
+        # Counters
+        self.probe_count = 0
+        self.probe_failures = 0
+        self.state_flips = 0
+        self.last_probe_latency_ms: Optional[float] = None
+        self.max_probe_latency_ms = 0.0
+        self.total_probe_latency_ms = 0.0
+        self.last_error: Optional[str] = None
+
+    @property
+    def is_healthy(self) -> bool:
+        """Cached state from the last probes; never touches the network."""
+        return self._healthy
+
+    def set_state(self, healthy: bool):
+        """Force the cached state, e.g. after the initial connection attempt."""
+        self._consecutive_failures = 0
+        self._consecutive_successes = 0
+        if healthy != self._healthy:
+            self._healthy = healthy
+            self.state_flips += 1
+
+    async def probe_once(self) -> bool:
+        """Run a single probe, record its latency and apply hysteresis."""
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self.probe(), timeout=self.timeout)
+            ok = True
+            self.last_error = None
+        except Exception as e:
+            ok = False
+            self.last_error = str(e)
+
+        latency_ms = (time.perf_counter() - start) * 1000
+        self.probe_count += 1
+        self.last_probe_latency_ms = latency_ms
+        self.total_probe_latency_ms += latency_ms
+        self.max_probe_latency_ms = max(self.max_probe_latency_ms, latency_ms)
+
+        if ok:
+            self._consecutive_failures = 0
+            self._consecutive_successes += 1
+            if not self._healthy and self._consecutive_successes >= self.recovery_threshold:
+                self._healthy = True
+                self.state_flips += 1
+                print(f"[HEALTH] {self.name} is back up after {self._consecutive_successes} successful probes")
+        else:
+            self.probe_failures += 1
+            self._consecutive_successes = 0
+            self._consecutive_failures += 1
+            if self._healthy and self._consecutive_failures >= self.failure_threshold:
+                self._healthy = False
+                self.state_flips += 1
+                print(f"[HEALTH] {self.name} marked down after {self._consecutive_failures} failed probes: "
+                      f"{self.last_error}")
+
+        return ok
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.probe_once()
+
+    def start(self):
+        """Start probing in the background on the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            print(f"[HEALTH] Started {self.name} health monitor (interval={self.interval}s)")
+
+    async def stop(self):
+        """Cancel the background probe task."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the probe counters for the health endpoint."""
+        avg_latency = self.total_probe_latency_ms / self.probe_count if self.probe_count else None
+        return {
+            "healthy": self._healthy,
+            "probe_count": self.probe_count,
+            "probe_failures": self.probe_failures,
+            "state_flips": self.state_flips,
+            "last_probe_latency_ms": self.last_probe_latency_ms,
+            "avg_probe_latency_ms": avg_latency,
+            "max_probe_latency_ms": self.max_probe_latency_ms,
+            "last_error": self.last_error,
+        }
@@ -1,58 +1,61 @@
 """
-Utility script to initialize MongoDB collections and indexes.
-Run this script once before starting your application to set up the database structure.
+Utility script to initialize MongoDB collections and indexes and check the query plans.
+The application runs the same bootstrap on startup (see schema.bootstrap_schema);
+run this script to apply it ahead of a deploy or to verify an existing database.
+
+Usage:
+    python -m app.database.init_db
+
+tests/test_query_plans.py runs the same plan check against TEST_MONGODB_URI.
 """
 
+import asyncio
 import os
+import sys
 
 from dotenv import load_dotenv
-from pymongo import MongoClient
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from .schema import bootstrap_schema, verify_query_plans
 
 load_dotenv()
 
 MONGODB_URI = os.environ.get("MONGODB_URI", "mongodb://localhost:27017/")
 DB_NAME = os.environ.get("MONGODB_DB_NAME", "assistant_db")
 
-CONVERSATIONS_COLLECTION = "conversations"
-MESSAGES_COLLECTION = "messages"
 
-
-def initialize_database():
-    """Initialize MongoDB database with required collections and indexes"""
+async def initialize_database():
+    """Bootstrap the schema and report whether the hot queries are served by indexes"""
+    client = None
     try:
         print(f"Connecting to MongoDB at {MONGODB_URI}...")
-        client = MongoClient(MONGODB_URI)
-        db = client[DB_NAME]
-
-        if CONVERSATIONS_COLLECTION not in db.list_collection_names():
-            db.create_collection(CONVERSATIONS_COLLECTION)
-            print(f"Created collection: {CONVERSATIONS_COLLECTION}")
-
-        if MESSAGES_COLLECTION not in db.list_collection_names():
-            db.create_collection(MESSAGES_COLLECTION)
-            print(f"Created collection: {MESSAGES_COLLECTION}")
-
-        db[MESSAGES_COLLECTION].create_index("conversation_id")
-        print(f"Created index on conversation_id for {MESSAGES_COLLECTION} collection")
-
-        db[CONVERSATIONS_COLLECTION].create_index("conversation_id")
-        print(f"Created index on conversation_id for {CONVERSATIONS_COLLECTION} collection")
-
-        client.admin.command('ping')
-        print(f"Successfully connected to MongoDB at {MONGODB_URI}")
-        print(f"Database {DB_NAME} initialized with required collections and indexes")
-
+        client = AsyncIOMotorClient(MONGODB_URI, serverSelectionTimeoutMS=5000)
+        await client.admin.command('ping')
+        db = client.get_default_database(DB_NAME)
+
+        await bootstrap_schema(db)
+        report = await verify_query_plans(db)
+        uncovered = [name for name, plan in report.items() if not plan["covered"]]
+        if uncovered:
+            print(f"Queries not covered by an index: {', '.join(uncovered)}")
+            return False
+
+        print(f"Database {db.name} initialized with required collections and indexes")
         return True
     except Exception as e:
         print(f"Error initializing MongoDB: {str(e)}")
         return False
+    finally:
+        if client is not None:
+            client.close()
 
 
 if __name__ == "__main__":
     print("Initializing MongoDB database...")
-    success = initialize_database()
+    success = asyncio.run(initialize_database())
 
     if success:
         print("Database initialization completed successfully.")
     else:
         print("Database initialization failed. Check your MongoDB connection.")
+        sys.exit(1)
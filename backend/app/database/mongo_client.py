@@ -2,19 +2,17 @@ import os
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 
-from dotenv import load_dotenv
 from pymongo import MongoClient
 
-# Load environment variables
-load_dotenv()
-
-# Get MongoDB connection string from environment variables or use default
-MONGODB_URI = os.environ.get("MONGODB_URI", "mongodb://mongodb:27017/assistant_db")
-DB_NAME = os.environ.get("MONGODB_DB_NAME", "assistant_db")
-
-# Collections
-CONVERSATIONS_COLLECTION = "conversations"
-MESSAGES_COLLECTION = "messages"
+from .constants import (
+    CONVERSATION_PROJECTION,
+    CONVERSATIONS_COLLECTION,
+    CONVERSATIONS_PAGE_SIZE,
+    DEFAULT_USER_ID,
+    MESSAGES_COLLECTION,
+)
+from .pagination import encode_cursor, keyset_filter
+from .write_behind import PREVIEW_ROLES, message_preview
 
 
 class MongoDBClient:
@@ -54,7 +52,8 @@ class MongoDBClient:
 
     # === Conversation methods ===
 
-    def create_conversation(self, conversation_id: str, title: str) -> Dict[str, Any]:
+    def create_conversation(self, conversation_id: str, title: str,
+                            user_id: str = DEFAULT_USER_ID) -> Dict[str, Any]:
         """Create a new conversation with the provided ID"""
         if self.client is None:
             print("[MONGODB] Database not connected, skipping create_conversation")
@@ -69,9 +68,12 @@ class MongoDBClient:
         now = datetime.now().isoformat()
         conversation = {
             "conversation_id": conversation_id,
+            "user_id": user_id,
             "title": title,
             "created_at": now,
-            "updated_at": now
+            "updated_at": now,
+            "message_count": 0,
+            "last_message_preview": None
         }
 
         try:
@@ -89,18 +91,35 @@ class MongoDBClient:
 
         return self.db[CONVERSATIONS_COLLECTION].find_one(
             {"conversation_id": conversation_id},
-            {"_id": 0}  # Exclude MongoDB's _id field
+            CONVERSATION_PROJECTION
         )
 
-    def list_conversations(self) -> List[Dict[str, Any]]:
-        """List all conversations"""
+    def list_conversations(
+            self,
+            user_id: str,
+            limit: int = CONVERSATIONS_PAGE_SIZE,
+            before: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """List one page of a user's conversations, most recently updated first"""
         if self.client is None:
-            return []
-
-        return list(self.db[CONVERSATIONS_COLLECTION].find(
-            {},
-            {"_id": 0}
-        ).sort("updated_at", -1))  # Sort by updated_at descending
+            return {"conversations": [], "next_cursor": None, "has_more": False}
+
+        query: Dict[str, Any] = {"user_id": user_id}
+        if before:
+            query.update(keyset_filter("updated_at", "conversation_id", before, "$lt"))
+
+        conversations = list(self.db[CONVERSATIONS_COLLECTION].find(query, CONVERSATION_PROJECTION).sort(
+            [("updated_at", -1), ("conversation_id", -1)]
+        ).limit(limit + 1))
+
+        has_more = len(conversations) > limit
+        conversations = conversations[:limit]
+        last = conversations[-1] if conversations else None
+        return {
+            "conversations": conversations,
+            "next_cursor": encode_cursor(last["updated_at"], last["conversation_id"]) if has_more else None,
+            "has_more": has_more,
+        }
 
     def update_conversation(self, conversation_id: str, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Update a conversation"""
@@ -149,8 +168,14 @@ class MongoDBClient:
 
         result = self.db[MESSAGES_COLLECTION].insert_one(message_doc)
 
-        # Update the conversation's updated_at timestamp
-        self.update_conversation(conversation_id, {"updated_at": message_doc["timestamp"]})
+        # Update the conversation's updated_at timestamp and its summary
+        summary = {"updated_at": message_doc["timestamp"]}
+        if message_doc.get("role") in PREVIEW_ROLES and message_doc.get("content"):
+            summary["last_message_preview"] = message_preview(message_doc["content"])
+        self.db[CONVERSATIONS_COLLECTION].update_one(
+            {"conversation_id": conversation_id},
+            {"$set": summary, "$inc": {"message_count": 1}}
+        )
 
         # Return the message ID
         return str(result.inserted_id)
@@ -162,7 +187,7 @@ class MongoDBClient:
 
         return list(self.db[MESSAGES_COLLECTION].find(
             {"conversation_id": conversation_id},
-            {"_id": 0}  # Exclude MongoDB's _id field
+            CONVERSATION_PROJECTION
         ).sort("timestamp", 1))  # Sort by timestamp ascending
 
 
@@ -0,0 +1,39 @@
+"""
+Keyset pagination helpers shared by the message history and conversation listings.
+
+A cursor encodes the sort value of the last row of a page plus a unique
+tie-breaker, so pages stay stable while rows are inserted and each page is
+an index range scan instead of a skip.
+"""
+
+import base64
+from typing import Any, Dict, Tuple
+
+
+def encode_cursor(sort_value: str, tie_breaker: Any) -> str:
+    """Opaque keyset cursor: the sort value of a row plus a unique tie-breaker."""
+    raw = f"{sort_value}|{tie_breaker}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Inverse of encode_cursor; raises ValueError for malformed cursors."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        sort_value, tie_breaker = raw.rsplit("|", 1)
+        return sort_value, tie_breaker
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def keyset_filter(field: str, tie_field: str, cursor: str, op: str, parse_tie=str) -> Dict[str, Any]:
+    """Filter for rows strictly past `cursor` in (field, tie_field) order; `op` is "$lt" or "$gt"."""
+    sort_value, tie_breaker = decode_cursor(cursor)
+    try:
+        tie_breaker = parse_tie(tie_breaker)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    return {"$or": [
+        {field: {op: sort_value}},
+        {field: sort_value, tie_field: {op: tie_breaker}},
+    ]}
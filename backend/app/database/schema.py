@@ -0,0 +1,174 @@
+"""
+MongoDB schema bootstrap: indexes for the hot queries plus one-off data migrations.
+
+bootstrap_schema() runs from the application startup hook and is
+idempotent. Index creation is a no-op when an index already exists with
+the same spec. Migrations are recorded in the schema_migrations collection
+and run once. verify_query_plans() explains the hot queries and reports
+whether each is served by an index without an in-memory sort.
+"""
+
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Tuple
+
+from pymongo import ASCENDING, DESCENDING, DeleteOne, IndexModel, UpdateOne
+from pymongo.errors import OperationFailure
+
+from .constants import CONVERSATIONS_COLLECTION, DEFAULT_USER_ID, MESSAGES_COLLECTION
+from .write_behind import PREVIEW_ROLES, message_preview
+
+MIGRATIONS_COLLECTION = "schema_migrations"
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    MESSAGES_COLLECTION: [
+        # History reads: filter on conversation_id, keyset sort on (timestamp, _id)
+        IndexModel([("conversation_id", ASCENDING), ("timestamp", ASCENDING), ("_id", ASCENDING)],
+                   name="conversation_timestamp"),
+    ],
+    CONVERSATIONS_COLLECTION: [
+        IndexModel([("conversation_id", ASCENDING)], name="conversation_id_unique", unique=True),
+        # Sidebar listing: filter on user_id, keyset sort on (updated_at, conversation_id)
+        IndexModel([("user_id", ASCENDING), ("updated_at", DESCENDING), ("conversation_id", DESCENDING)],
+                   name="user_updated"),
+    ],
+}
+
+# Indexes made redundant by INDEXES; the conversations one also blocks the unique index on the same key
+LEGACY_INDEXES = {
+    MESSAGES_COLLECTION: ["conversation_id_1"],
+    CONVERSATIONS_COLLECTION: ["conversation_id_1"],
+}
+
+
+async def drop_legacy_indexes(db) -> None:
+    for collection, names in LEGACY_INDEXES.items():
+        existing = await db[collection].index_information()
+        for name in names:
+            if name in existing:
+                await db[collection].drop_index(name)
+                print(f"[SCHEMA] Dropped legacy index {collection}.{name}")
+
+
+async def dedupe_conversations(db) -> None:
+    """Keep only the most recently updated document of each conversation_id before it becomes unique."""
+    pipeline = [
+        {"$group": {"_id": "$conversation_id", "ids": {"$push": {"id": "$_id", "updated_at": "$updated_at"}},
+                    "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+    ]
+    deletes = []
+    async for group in db[CONVERSATIONS_COLLECTION].aggregate(pipeline, allowDiskUse=True):
+        duplicates = sorted(group["ids"], key=lambda item: item.get("updated_at") or "", reverse=True)[1:]
+        deletes.extend(DeleteOne({"_id": item["id"]}) for item in duplicates)
+    if deletes:
+        await db[CONVERSATIONS_COLLECTION].bulk_write(deletes, ordered=False)
+        print(f"[SCHEMA] Removed {len(deletes)} duplicate conversation documents")
+
+
+async def backfill_conversation_summaries(db) -> None:
+    """Give conversations created before per-user listing an owner and their message summary."""
+    conversations = db[CONVERSATIONS_COLLECTION]
+    await conversations.update_many({"user_id": {"$exists": False}}, {"$set": {"user_id": DEFAULT_USER_ID}})
+
+    legacy = await conversations.distinct("conversation_id", {"message_count": {"$exists": False}})
+    if not legacy:
+        return
+
+    counts, previews = {}, {}
+    count_pipeline = [
+        {"$match": {"conversation_id": {"$in": legacy}}},
+        {"$group": {"_id": "$conversation_id", "count": {"$sum": 1}}},
+    ]
+    async for row in db[MESSAGES_COLLECTION].aggregate(count_pipeline, allowDiskUse=True):
+        counts[row["_id"]] = row["count"]
+    preview_pipeline = [
+        {"$match": {"conversation_id": {"$in": legacy}, "role": {"$in": list(PREVIEW_ROLES)}}},
+        {"$sort": {"conversation_id": 1, "timestamp": 1}},
+        {"$group": {"_id": "$conversation_id", "content": {"$last": "$content"}}},
+    ]
+    async for row in db[MESSAGES_COLLECTION].aggregate(preview_pipeline, allowDiskUse=True):
+        previews[row["_id"]] = row["content"]
+
+    await conversations.bulk_write([
+        UpdateOne(
+            {"conversation_id": conversation_id, "message_count": {"$exists": False}},
+            {"$set": {
+                "message_count": counts.get(conversation_id, 0),
+                "last_message_preview": message_preview(previews.get(conversation_id)),
+            }},
+        )
+        for conversation_id in legacy
+    ], ordered=False)
+    print(f"[SCHEMA] Backfilled summaries of {len(legacy)} conversations")
+
+
+# (version, name, migration); append only, versions are never reused
+MIGRATIONS: List[Tuple[int, str, Callable[[Any], Any]]] = [
+    (1, "dedupe_conversations", dedupe_conversations),
+    (2, "drop_legacy_indexes", drop_legacy_indexes),
+    (3, "backfill_conversation_summaries", backfill_conversation_summaries),
+]
+
+
+async def run_migrations(db) -> List[str]:
+    """Apply the migrations not yet recorded in schema_migrations, in version order."""
+    applied = {doc["_id"] async for doc in db[MIGRATIONS_COLLECTION].find({}, {"_id": 1})}
+    ran = []
+    for version, name, migration in MIGRATIONS:
+        if version in applied:
+            continue
+        print(f"[SCHEMA] Running migration {version}: {name}")
+        await migration(db)
+        await db[MIGRATIONS_COLLECTION].update_one(
+            {"_id": version},
+            {"$setOnInsert": {"name": name, "applied_at": datetime.now().isoformat()}},
+            upsert=True,
+        )
+        ran.append(name)
+    return ran
+
+
+async def ensure_indexes(db) -> None:
+    for collection, indexes in INDEXES.items():
+        names = await db[collection].create_indexes(indexes)
+        print(f"[SCHEMA] Indexes on {collection}: {', '.join(names)}")
+
+
+async def bootstrap_schema(db) -> None:
+    """Migrate existing data, then create every index the hot queries need."""
+    await run_migrations(db)
+    await ensure_indexes(db)
+
+
+def _plan_stages(plan: Dict[str, Any]) -> List[str]:
+    stages = [plan.get("stage", "")]
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            stages += _plan_stages(plan[key])
+    for child in plan.get("inputStages", []):
+        stages += _plan_stages(child)
+    return stages
+
+
+async def verify_query_plans(db) -> Dict[str, Dict[str, Any]]:
+    """Explain the hot queries; a query is covered when its winning plan scans an index and has no SORT stage."""
+    queries = {
+        "message_history": db[MESSAGES_COLLECTION].find({"conversation_id": "explain"}).sort(
+            [("timestamp", -1), ("_id", -1)]).limit(50),
+        "message_history_full": db[MESSAGES_COLLECTION].find({"conversation_id": "explain"}).sort("timestamp", 1),
+        "conversation_lookup": db[CONVERSATIONS_COLLECTION].find({"conversation_id": "explain"}).limit(1),
+        "conversation_listing": db[CONVERSATIONS_COLLECTION].find({"user_id": "explain"}).sort(
+            [("updated_at", -1), ("conversation_id", -1)]).limit(50),
+    }
+    report = {}
+    for name, cursor in queries.items():
+        try:
+            explain = await cursor.explain()
+        except OperationFailure as e:
+            report[name] = {"covered": False, "error": str(e)}
+            continue
+        stages = _plan_stages(explain["queryPlanner"]["winningPlan"])
+        covered = any(stage in ("IXSCAN", "EXPRESS_IXSCAN", "IDHACK") for stage in stages) and "SORT" not in stages
+        report[name] = {"covered": covered, "stages": stages}
+        print(f"[SCHEMA] {name}: {' <- '.join(stages)} ({'covered' if covered else 'NOT covered'})")
+    return report
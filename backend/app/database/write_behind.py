@@ -0,0 +1,272 @@
+import asyncio
+import os
+import uuid
+from collections import Counter, deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional, Set
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from .constants import SUMMARY_BATCHES_FIELD
+
+# "buffered": save_message returns as soon as the message is queued (write-behind)
+# "durable": save_message waits until its batch is acknowledged (at-least-once)
+MONGODB_WRITE_MODE = os.environ.get("MONGODB_WRITE_MODE", "buffered")
+MONGODB_WRITE_QUEUE_SIZE = int(os.environ.get("MONGODB_WRITE_QUEUE_SIZE", "10000"))
+MONGODB_WRITE_BATCH_SIZE = int(os.environ.get("MONGODB_WRITE_BATCH_SIZE", "100"))
+MONGODB_WRITE_FLUSH_INTERVAL = float(os.environ.get("MONGODB_WRITE_FLUSH_INTERVAL", "0.5"))
+MONGODB_WRITE_MAX_RETRIES = int(os.environ.get("MONGODB_WRITE_MAX_RETRIES", "3"))
+
+DUPLICATE_KEY_ERROR = 11000
+
+# Conversation summaries show the latest message of these roles, cut to PREVIEW_CHARS
+PREVIEW_ROLES = ("user", "assistant")
+PREVIEW_CHARS = 120
+# Batch ids kept per conversation; a batch is retried before the next one is written, so a few suffice
+SUMMARY_BATCHES_KEPT = 8
+
+
+def message_preview(content: Optional[str]) -> Optional[str]:
+    """One-line preview of a message for the conversation list."""
+    if not content:
+        return None
+    text = " ".join(content.split())
+    return text if len(text) <= PREVIEW_CHARS else text[:PREVIEW_CHARS - 1] + "…"
+
+
+@dataclass
+class PendingMessage:
+    conversation_id: str
+    doc: Dict[str, Any]
+    future: Optional[asyncio.Future] = None
+
+
+class MessageWriteBehind:
+    """Collect messages in memory and persist them in bulk.
+
+    Messages are flushed with one insert_many per batch followed by one
+    bulk_write that bumps updated_at once per conversation in the batch.
+    The same bulk_write keeps the conversation's message_count and
+    last_message_preview current, so listings never aggregate messages.
+    A batch is written when it reaches `batch_size`, when `flush_interval`
+    elapses, when flush() is called, or on shutdown. Message _ids are
+    assigned by the caller, so a retried batch is idempotent and the
+    durable mode keeps at-least-once semantics. Summary updates are
+    idempotent too: each carries the batch id, applies only to conversations
+    that have not recorded it yet, and records it.
+    """
+
+    def __init__(
+            self,
+            get_db: Callable[[], Any],
+            messages_collection: str,
+            conversations_collection: str,
+            mode: str = MONGODB_WRITE_MODE,
+            max_queue_size: int = MONGODB_WRITE_QUEUE_SIZE,
+            batch_size: int = MONGODB_WRITE_BATCH_SIZE,
+            flush_interval: float = MONGODB_WRITE_FLUSH_INTERVAL,
+            max_retries: int = MONGODB_WRITE_MAX_RETRIES,
+    ):
+        if mode not in ("buffered", "durable"):
+            raise ValueError(f"Unsupported MongoDB write mode: {mode}")
+
+        self.get_db = get_db
+        self.messages_collection = messages_collection
+        self.conversations_collection = conversations_collection
+        self.mode = mode
+        self.max_queue_size = max(1, max_queue_size)
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_retries = max(0, max_retries)
+
+        self._buffer: Deque[PendingMessage] = deque()
+        self._pending_by_conversation: Counter = Counter()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+        # Counters
+        self.flush_count = 0
+        self.flushed_messages = 0
+        self.failed_flushes = 0
+        self.dropped_messages = 0
+
+    def _ensure_primitives(self):
+        # Created lazily so they bind to the running event loop
+        if self._lock is None:
+            self._slots = asyncio.Semaphore(self.max_queue_size)
+            self._wakeup = asyncio.Event()
+            self._lock = asyncio.Lock()
+
+    def start(self):
+        """Start the background flusher on the running event loop."""
+        self._ensure_primitives()
+        if self._task is None or self._task.done():
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+            print(f"[MONGODB] Started write-behind flusher (mode={self.mode}, batch={self.batch_size}, "
+                  f"interval={self.flush_interval}s)")
+
+    async def stop(self):
+        """Stop the flusher, then flush everything still buffered.
+
+        The flusher is not cancelled: a batch it already took off the buffer
+        is written (or fails and resolves its callers) before it exits.
+        """
+        if self._task is not None:
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+    async def submit(self, conversation_id: str, doc: Dict[str, Any]) -> None:
+        """Queue a message document; waits for space when the buffer is full."""
+        self._ensure_primitives()
+        await self._slots.acquire()
+
+        entry = PendingMessage(conversation_id=conversation_id, doc=doc)
+        if self.mode == "durable":
+            entry.future = asyncio.get_running_loop().create_future()
+
+        self._buffer.append(entry)
+        self._pending_by_conversation[conversation_id] += 1
+
+        if self._task is None or self._task.done():
+            # No flusher running (e.g. outside the app lifespan): write inline
+            await self.flush()
+        elif self.mode == "durable" or len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+
+        if entry.future is not None:
+            await entry.future
+
+    def has_pending(self, conversation_id: str) -> bool:
+        """Whether messages for this conversation are still buffered."""
+        return self._pending_by_conversation[conversation_id] > 0
+
+    async def flush(self):
+        """Write every buffered message now."""
+        self._ensure_primitives()
+        async with self._lock:
+            while self._buffer:
+                batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+                await self._write_batch(batch)
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"[MONGODB] Write-behind flush error: {str(e)}")
+
+    async def _write_batch(self, batch: List[PendingMessage]):
+        error = None
+        batch_id = uuid.uuid4().hex
+        # Conversations whose summary update was acknowledged; retries skip them
+        summarized: Set[str] = set()
+        for attempt in range(self.max_retries + 1):
+            try:
+                await self._bulk_persist(batch, batch_id, summarized)
+                error = None
+                break
+            except Exception as e:
+                error = e
+                print(f"[MONGODB] Bulk flush of {len(batch)} messages failed "
+                      f"(attempt {attempt + 1}/{self.max_retries + 1}): {str(e)}")
+                if attempt < self.max_retries:
+                    await asyncio.sleep(min(0.1 * 2 ** attempt, 2.0))
+
+        for entry in batch:
+            self._pending_by_conversation[entry.conversation_id] -= 1
+            if self._pending_by_conversation[entry.conversation_id] <= 0:
+                del self._pending_by_conversation[entry.conversation_id]
+            self._slots.release()
+            if entry.future is not None and not entry.future.done():
+                if error is None:
+                    entry.future.set_result(None)
+                else:
+                    entry.future.set_exception(error)
+
+        if error is None:
+            self.flush_count += 1
+            self.flushed_messages += len(batch)
+        else:
+            self.failed_flushes += 1
+            if self.mode == "buffered":
+                self.dropped_messages += len(batch)
+                print(f"[MONGODB] Dropped {len(batch)} buffered messages after {self.max_retries + 1} attempts")
+
+    async def _bulk_persist(self, batch: List[PendingMessage], batch_id: str, summarized: Set[str]):
+        db = self.get_db()
+        if db is None:
+            raise ConnectionError("MongoDB client is not connected")
+
+        try:
+            await db[self.messages_collection].insert_many([entry.doc for entry in batch], ordered=False)
+        except BulkWriteError as e:
+            # Documents already written by an earlier attempt collide on _id; anything else is a real failure
+            details = e.details or {}
+            if details.get("writeConcernErrors") or any(
+                    err.get("code") != DUPLICATE_KEY_ERROR for err in details.get("writeErrors", [])
+            ):
+                raise
+
+        # One summary update per conversation per flush: updated_at, message_count and preview
+        summaries: Dict[str, Dict[str, Any]] = {}
+        for entry in batch:
+            doc = entry.doc
+            summary = summaries.setdefault(entry.conversation_id, {"updated_at": "", "count": 0, "preview": None})
+            summary["count"] += 1
+            if doc["timestamp"] >= summary["updated_at"]:
+                summary["updated_at"] = doc["timestamp"]
+                if doc.get("role") in PREVIEW_ROLES and doc.get("content"):
+                    summary["preview"] = message_preview(doc["content"])
+
+        conversation_ids, updates = [], []
+        for conversation_id, summary in summaries.items():
+            if conversation_id in summarized:
+                continue
+            fields = {"updated_at": summary["updated_at"]}
+            if summary["preview"] is not None:
+                fields["last_message_preview"] = summary["preview"]
+            conversation_ids.append(conversation_id)
+            updates.append(UpdateOne(
+                # Matches nothing when an earlier attempt was applied but its acknowledgement was lost
+                {"conversation_id": conversation_id, SUMMARY_BATCHES_FIELD: {"$ne": batch_id}},
+                {
+                    "$set": fields,
+                    "$inc": {"message_count": summary["count"]},
+                    "$push": {SUMMARY_BATCHES_FIELD: {"$each": [batch_id], "$slice": -SUMMARY_BATCHES_KEPT}},
+                },
+            ))
+        if not updates:
+            return
+        try:
+            await db[self.conversations_collection].bulk_write(updates, ordered=False)
+        except BulkWriteError as e:
+            details = e.details or {}
+            failed = {err.get("index") for err in details.get("writeErrors", [])}
+            if not details.get("writeConcernErrors"):
+                summarized.update(cid for index, cid in enumerate(conversation_ids) if index not in failed)
+            raise
+        summarized.update(conversation_ids)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the write-behind counters."""
+        return {
+            "mode": self.mode,
+            "buffered": len(self._buffer),
+            "flush_count": self.flush_count,
+            "flushed_messages": self.flushed_messages,
+            "failed_flushes": self.failed_flushes,
+            "dropped_messages": self.dropped_messages,
+        }
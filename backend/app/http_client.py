@@ -0,0 +1,220 @@
+"""
+Shared async HTTP client for agent tools.
+
+Tools run inside the async graph, so their outbound calls must not block
+the event loop. Every call goes through one pooled httpx.AsyncClient. Each
+host has a connection limit and each call has connect and read timeouts.
+Transient failures (connection errors, timeouts, 429 and 5xx) are retried
+with jittered exponential backoff. A per-host circuit breaker fails fast
+while an upstream is down instead of piling up retries.
+"""
+
+import asyncio
+import os
+import random
+import time
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+TOOL_HTTP_CONNECT_TIMEOUT = float(os.environ.get("TOOL_HTTP_CONNECT_TIMEOUT", "3"))
+TOOL_HTTP_READ_TIMEOUT = float(os.environ.get("TOOL_HTTP_READ_TIMEOUT", "10"))
+TOOL_HTTP_MAX_CONNECTIONS = int(os.environ.get("TOOL_HTTP_MAX_CONNECTIONS", "100"))
+TOOL_HTTP_MAX_PER_HOST = int(os.environ.get("TOOL_HTTP_MAX_PER_HOST", "10"))
+TOOL_HTTP_RETRIES = int(os.environ.get("TOOL_HTTP_RETRIES", "2"))
+# Base delay of the retry backoff; attempt n waits a random time up to base * 2**n
+TOOL_HTTP_BACKOFF = float(os.environ.get("TOOL_HTTP_BACKOFF", "0.2"))
+# Consecutive failures that open a host's circuit, and how long it stays open
+TOOL_HTTP_BREAKER_THRESHOLD = int(os.environ.get("TOOL_HTTP_BREAKER_THRESHOLD", "5"))
+TOOL_HTTP_BREAKER_RESET = float(os.environ.get("TOOL_HTTP_BREAKER_RESET", "30"))
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class ToolHTTPError(Exception):
+    """A tool's HTTP call failed after retries, or returned a non-retryable error status."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class CircuitOpenError(ToolHTTPError):
+    """The host's circuit is open; the call was not attempted."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker for one host.
+
+    Closed: calls pass. After `threshold` consecutive failures it opens and
+    rejects calls for `reset_after` seconds, then lets a single trial call
+    through (half-open); its success closes the circuit, its failure opens it
+    again.
+    """
+
+    def __init__(self, threshold: int, reset_after: float, clock=time.monotonic):
+        self.threshold = max(1, threshold)
+        self.reset_after = reset_after
+        self.clock = clock
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_flight = False
+        self.opened_count = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self.clock() - self.opened_at >= self.reset_after:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> Tuple[bool, bool]:
+        """Return (allowed, trial); only the call that got trial=True may end the half-open trial."""
+        state = self.state
+        if state == "closed":
+            return True, False
+        if state == "half_open" and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return True, True
+        return False, False
+
+    def record_success(self, trial: bool = False):
+        self.failures = 0
+        self.opened_at = None
+        if trial:
+            self.trial_in_flight = False
+
+    def record_failure(self, trial: bool = False):
+        self.failures += 1
+        if trial or self.failures >= self.threshold:
+            if self.opened_at is None or trial:
+                self.opened_count += 1
+            self.opened_at = self.clock()
+        if trial:
+            self.trial_in_flight = False
+
+    def end_trial(self, trial: bool):
+        """Release the half-open trial if this call held it, e.g. when it was cancelled."""
+        if trial:
+            self.trial_in_flight = False
+
+
+class ToolHTTPClient:
+    """Pooled async HTTP client with timeouts, retries and per-host circuit breakers.
+
+    The underlying httpx.AsyncClient is created on first use so it binds to
+    the running event loop; close it with aclose() on shutdown. `transport`
+    replaces the network layer (e.g. httpx.MockTransport) for local testing.
+    """
+
+    def __init__(
+            self,
+            connect_timeout: float = TOOL_HTTP_CONNECT_TIMEOUT,
+            read_timeout: float = TOOL_HTTP_READ_TIMEOUT,
+            max_connections: int = TOOL_HTTP_MAX_CONNECTIONS,
+            max_per_host: int = TOOL_HTTP_MAX_PER_HOST,
+            retries: int = TOOL_HTTP_RETRIES,
+            backoff: float = TOOL_HTTP_BACKOFF,
+            breaker_threshold: int = TOOL_HTTP_BREAKER_THRESHOLD,
+            breaker_reset: float = TOOL_HTTP_BREAKER_RESET,
+            transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.max_per_host = max(1, max_per_host)
+        self.retries = max(0, retries)
+        self.backoff = backoff
+        self.breaker_threshold = breaker_threshold
+        self.breaker_reset = breaker_reset
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+        # Counters
+        self.requests = 0
+        self.retried = 0
+        self.failures = 0
+        self.rejected = 0
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=self.timeout, limits=self.limits, transport=self.transport)
+        return self._client
+
+    def _breaker(self, host: str) -> CircuitBreaker:
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            breaker = self._breakers[host] = CircuitBreaker(self.breaker_threshold, self.breaker_reset)
+        return breaker
+
+    def _slots(self, host: str) -> asyncio.Semaphore:
+        slots = self._host_slots.get(host)
+        if slots is None:
+            slots = self._host_slots[host] = asyncio.Semaphore(self.max_per_host)
+        return slots
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a request, retrying transient failures; raises ToolHTTPError when it finally fails."""
+        host = urlsplit(url).netloc
+        breaker = self._breaker(host)
+        allowed, trial = breaker.allow()
+        if not allowed:
+            self.rejected += 1
+            raise CircuitOpenError(f"Circuit open for {host}")
+
+        client = self._get_client()
+        error: Optional[ToolHTTPError] = None
+        try:
+            for attempt in range(self.retries + 1):
+                if attempt:
+                    self.retried += 1
+                    await asyncio.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+                self.requests += 1
+                try:
+                    async with self._slots(host):
+                        response = await client.request(method, url, **kwargs)
+                except httpx.TransportError as e:
+                    error = ToolHTTPError(f"{method} {url} failed: {type(e).__name__}: {e}")
+                    continue
+
+                if response.status_code in RETRYABLE_STATUS:
+                    error = ToolHTTPError(f"{method} {url} returned {response.status_code}", response.status_code)
+                    continue
+                breaker.record_success(trial)
+                if response.is_error:
+                    raise ToolHTTPError(f"{method} {url} returned {response.status_code}", response.status_code)
+                return response
+
+            self.failures += 1
+            breaker.record_failure(trial)
+            raise error
+        finally:
+            # A cancelled half-open trial must not keep the circuit waiting for it
+            breaker.end_trial(trial)
+
+    async def get_json(self, url: str, **kwargs) -> Any:
+        response = await self.request("GET", url, **kwargs)
+        return response.json()
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "retried": self.retried,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "circuits": {
+                host: {"state": breaker.state, "failures": breaker.failures, "opened": breaker.opened_count}
+                for host, breaker in self._breakers.items()
+            },
+        }
+
+
+tool_http = ToolHTTPClient()
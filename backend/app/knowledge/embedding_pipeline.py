@@ -0,0 +1,171 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence
+
+from langchain_core.embeddings import Embeddings
+from qdrant_client import QdrantClient
+from qdrant_client.models import PointStruct
+
+# Chunks per embedding request / Qdrant upsert
+EMBED_BATCH_SIZE = int(os.environ.get("EMBED_BATCH_SIZE", "64"))
+# Embedding requests in flight at once
+EMBED_MAX_CONCURRENCY = int(os.environ.get("EMBED_MAX_CONCURRENCY", "4"))
+# Embedding requests per second shared by all ingestion jobs (0 disables the limit)
+EMBED_RATE_LIMIT = float(os.environ.get("EMBED_RATE_LIMIT", "0"))
+EMBED_RATE_BURST = int(os.environ.get("EMBED_RATE_BURST", str(max(1, EMBED_MAX_CONCURRENCY))))
+
+
+class TokenBucket:
+    """Thread-safe token bucket; acquire() blocks until a token is available."""
+
+    def __init__(self, rate: float, capacity: int, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.clock = clock
+        self._tokens = float(self.capacity)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = self.clock()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+# One limiter for the whole process, so concurrent ingestion jobs share the provider quota
+embedding_rate_limiter = TokenBucket(EMBED_RATE_LIMIT, EMBED_RATE_BURST)
+
+
+class EmbeddingPipeline:
+    """Embed chunks in batches and upsert them to Qdrant, overlapping the two stages.
+
+    Up to `max_concurrency` batches are embedded at once on a thread pool,
+    each request first taking a token from the shared rate limiter. The
+    calling thread writes finished batches to Qdrant in order, so batch N is
+    upserted while batch N+1 is still being embedded. At most
+    `max_concurrency + 1` unwritten batches are held at a time, which keeps
+    memory bounded when Qdrant is the slower stage.
+    """
+
+    def __init__(
+            self,
+            encoder: Embeddings,
+            client: QdrantClient,
+            collection_name: str,
+            content_payload_key: str = "page_content",
+            metadata_payload_key: str = "metadata",
+            vector_name: str = "",
+            batch_size: int = EMBED_BATCH_SIZE,
+            max_concurrency: int = EMBED_MAX_CONCURRENCY,
+            rate_limiter: Optional[TokenBucket] = None,
+    ):
+        self.encoder = encoder
+        self.client = client
+        self.collection_name = collection_name
+        self.content_payload_key = content_payload_key
+        self.metadata_payload_key = metadata_payload_key
+        self.vector_name = vector_name
+        self.batch_size = max(1, batch_size)
+        self.max_concurrency = max(1, max_concurrency)
+        self.rate_limiter = rate_limiter or embedding_rate_limiter
+        self._stats_lock = threading.Lock()
+
+        # Counters
+        self.batches_embedded = 0
+        self.chunks_written = 0
+        self.embed_seconds = 0.0
+        self.upsert_seconds = 0.0
+
+    def _embed(self, texts: List[str]) -> List[List[float]]:
+        self.rate_limiter.acquire()
+        start = time.perf_counter()
+        vectors = self.encoder.embed_documents(texts)
+        with self._stats_lock:
+            self.embed_seconds += time.perf_counter() - start
+            self.batches_embedded += 1
+        return vectors
+
+    def _upsert(self, texts: List[str], metadatas: List[Dict[str, Any]], ids: List[str], vectors: List[List[float]]):
+        start = time.perf_counter()
+        self.client.upsert(
+            collection_name=self.collection_name,
+            points=[
+                PointStruct(
+                    id=point_id,
+                    vector={self.vector_name: vector},
+                    payload={self.content_payload_key: text, self.metadata_payload_key: metadata},
+                )
+                for point_id, text, metadata, vector in zip(ids, texts, metadatas, vectors)
+            ],
+            wait=True,
+        )
+        self.upsert_seconds += time.perf_counter() - start
+        self.chunks_written += len(ids)
+
+    def run(
+            self,
+            texts: Sequence[str],
+            metadatas: Sequence[Dict[str, Any]],
+            ids: Sequence[str],
+            progress_callback: Optional[Callable[[int, int], None]] = None,
+    ) -> int:
+        """Embed and store every chunk; returns the number of chunks written."""
+        total = len(texts)
+        written = 0
+        if progress_callback:
+            progress_callback(0, total)
+
+        batches = [
+            (list(texts[start:start + self.batch_size]),
+             list(metadatas[start:start + self.batch_size]),
+             list(ids[start:start + self.batch_size]))
+            for start in range(0, total, self.batch_size)
+        ]
+
+        pending: Deque[tuple] = deque()
+        with ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="embed") as pool:
+            try:
+                for batch in batches:
+                    pending.append((batch, pool.submit(self._embed, batch[0])))
+                    # Backpressure: never queue more than one batch beyond those being embedded
+                    if len(pending) > self.max_concurrency:
+                        written += self._write_oldest(pending)
+                        if progress_callback:
+                            progress_callback(written, total)
+
+                while pending:
+                    written += self._write_oldest(pending)
+                    if progress_callback:
+                        progress_callback(written, total)
+            except BaseException:
+                for _, future in pending:
+                    future.cancel()
+                raise
+
+        return written
+
+    def _write_oldest(self, pending: Deque[tuple]) -> int:
+        (texts, metadatas, ids), future = pending.popleft()
+        vectors = future.result()
+        self._upsert(texts, metadatas, ids, vectors)
+        return len(ids)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batches_embedded": self.batches_embedded,
+            "chunks_written": self.chunks_written,
+            "embed_seconds": self.embed_seconds,
+            "upsert_seconds": self.upsert_seconds,
+        }
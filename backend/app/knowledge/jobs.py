@@ -0,0 +1,230 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from .vectordb import QDRANT_PATH, process_and_store_file
+
+INGESTION_WORKERS = int(os.environ.get("INGESTION_WORKERS", "2"))
+INGESTION_QUEUE_SIZE = int(os.environ.get("INGESTION_QUEUE_SIZE", "100"))
+INGESTION_JOBS_PATH = os.environ.get("INGESTION_JOBS_PATH", os.path.join(QDRANT_PATH, "ingestion_jobs.sqlite"))
+INGESTION_SPOOL_DIR = os.environ.get("INGESTION_SPOOL_DIR", os.path.join(QDRANT_PATH, "uploads"))
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+JOB_FIELDS = (
+    "job_id", "document_id", "user_id", "name", "content_type", "file_path", "size",
+    "status", "chunks_total", "chunks_embedded", "error", "created_at", "updated_at",
+)
+
+
+class IngestionQueueFullError(Exception):
+    """Raised when the ingestion queue cannot accept another job."""
+
+
+class IngestionJobStore:
+    """SQLite-backed record of ingestion jobs, so queued work survives restarts."""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " job_id TEXT PRIMARY KEY,"
+            " document_id TEXT NOT NULL,"
+            " user_id TEXT NOT NULL,"
+            " name TEXT NOT NULL,"
+            " content_type TEXT NOT NULL,"
+            " file_path TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " status TEXT NOT NULL,"
+            " chunks_total INTEGER,"
+            " chunks_embedded INTEGER NOT NULL DEFAULT 0,"
+            " error TEXT,"
+            " created_at TEXT NOT NULL,"
+            " updated_at TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_user ON jobs (user_id, created_at)")
+        self._conn.commit()
+
+    def create(self, job: Dict[str, Any]):
+        with self._lock:
+            self._conn.execute(
+                f"INSERT INTO jobs ({', '.join(JOB_FIELDS)}) VALUES ({', '.join('?' * len(JOB_FIELDS))})",
+                [job.get(field) for field in JOB_FIELDS]
+            )
+            self._conn.commit()
+
+    def update(self, job_id: str, **fields):
+        fields["updated_at"] = datetime.now().isoformat()
+        assignments = ", ".join(f"{field} = ?" for field in fields)
+        with self._lock:
+            self._conn.execute(f"UPDATE jobs SET {assignments} WHERE job_id = ?", [*fields.values(), job_id])
+            self._conn.commit()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def list(self, user_id: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        with self._lock:
+            if user_id:
+                rows = self._conn.execute(
+                    "SELECT * FROM jobs WHERE user_id = ? ORDER BY created_at DESC LIMIT ?", (user_id, limit)
+                ).fetchall()
+            else:
+                rows = self._conn.execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def unfinished(self) -> List[Dict[str, Any]]:
+        """Jobs that were queued or running when the process stopped, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM jobs WHERE status IN (?, ?) ORDER BY created_at ASC", (QUEUED, RUNNING)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+
+class IngestionJobQueue:
+    """Bounded pool of workers that parse and embed uploaded documents off the event loop.
+
+    Each worker runs process_and_store_file in a thread, so at most
+    `max_workers` documents are ingested concurrently. Jobs are recorded in
+    an IngestionJobStore before they are queued; on start() any job left
+    queued or running by a previous process is queued again. Chunk point ids
+    are derived from the document id, so re-running a job is idempotent.
+    """
+
+    def __init__(self, store: IngestionJobStore, spool_dir: str,
+                 max_workers: int = INGESTION_WORKERS, max_queued: int = INGESTION_QUEUE_SIZE):
+        self.store = store
+        self.spool_dir = spool_dir
+        self.max_workers = max(1, max_workers)
+        self.max_queued = max(1, max_queued)
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+        os.makedirs(spool_dir, exist_ok=True)
+
+    def new_spool_path(self, job_id: str) -> str:
+        """Where the upload for a job is kept until it has been ingested."""
+        return os.path.join(self.spool_dir, job_id)
+
+    async def start(self):
+        """Start the workers and re-queue jobs left over from a previous run."""
+        self._queue = asyncio.Queue()
+        self._workers = [asyncio.create_task(self._worker(index)) for index in range(self.max_workers)]
+
+        recovered = self.store.unfinished()
+        for job in recovered:
+            if not os.path.exists(job["file_path"]):
+                self.store.update(job["job_id"], status=FAILED, error="Upload file missing after restart")
+                continue
+            self.store.update(job["job_id"], status=QUEUED)
+            self._queue.put_nowait(job["job_id"])
+        print(f"[INGESTION] Started {self.max_workers} workers, re-queued {self._queue.qsize()} unfinished jobs")
+
+    async def stop(self):
+        """Stop the workers; unfinished jobs stay recorded and resume on the next start."""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def submit(self, file_path: str, filename: str, content_type: str, user_id: str, size: int,
+                     job_id: Optional[str] = None) -> Dict[str, Any]:
+        """Record a job for an upload already spooled to `file_path` and queue it."""
+        if self._queue is None:
+            raise RuntimeError("Ingestion queue is not running")
+        if self._queue.qsize() >= self.max_queued:
+            raise IngestionQueueFullError(f"Ingestion queue is full ({self.max_queued} jobs waiting)")
+
+        now = datetime.now().isoformat()
+        job = {
+            "job_id": job_id or str(uuid.uuid4()),
+            "document_id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "name": filename,
+            "content_type": content_type,
+            "file_path": file_path,
+            "size": size,
+            "status": QUEUED,
+            "chunks_total": None,
+            "chunks_embedded": 0,
+            "error": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+        self.store.create(job)
+        self._queue.put_nowait(job["job_id"])
+        print(f"[INGESTION] Queued job {job['job_id']} for {filename} ({self._queue.qsize()} waiting)")
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.store.get(job_id)
+
+    def list(self, user_id: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        return self.store.list(user_id=user_id, limit=limit)
+
+    async def _worker(self, index: int):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run_job(job_id)
+            except Exception as e:
+                print(f"[INGESTION] Worker {index} error on job {job_id}: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    async def _run_job(self, job_id: str):
+        job = self.store.get(job_id)
+        if job is None or job["status"] not in (QUEUED, RUNNING):
+            return
+
+        self.store.update(job_id, status=RUNNING)
+        print(f"[INGESTION] Running job {job_id}: {job['name']}")
+
+        def report_progress(embedded: int, total: int):
+            self.store.update(job_id, chunks_embedded=embedded, chunks_total=total)
+
+        try:
+            await asyncio.to_thread(
+                process_and_store_file,
+                job["file_path"],
+                job["name"],
+                job["content_type"],
+                user_id=job["user_id"],
+                size=job["size"],
+                document_id=job["document_id"],
+                progress_callback=report_progress,
+            )
+        except Exception as e:
+            print(f"[INGESTION] Job {job_id} failed: {str(e)}")
+            self.store.update(job_id, status=FAILED, error=str(e))
+        else:
+            self.store.update(job_id, status=COMPLETED)
+            print(f"[INGESTION] Job {job_id} completed, document ID: {job['document_id']}")
+
+        # The spooled upload is not needed once the job has reached a final state
+        try:
+            os.unlink(job["file_path"])
+        except FileNotFoundError:
+            pass
+
+
+ingestion_queue = IngestionJobQueue(IngestionJobStore(INGESTION_JOBS_PATH), INGESTION_SPOOL_DIR)
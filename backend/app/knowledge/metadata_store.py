@@ -0,0 +1,173 @@
+import base64
+import json
+import os
+import sqlite3
+import threading
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from qdrant_client import QdrantClient
+
+DOCUMENT_FIELDS = ("document_id", "user_id", "name", "size", "created_at", "content_type", "chunk_count")
+
+# Points read per scroll page when rebuilding from Qdrant
+REBUILD_SCROLL_LIMIT = 1000
+
+
+def encode_cursor(created_at: str, document_id: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps([created_at, document_id]).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    try:
+        created_at, document_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return created_at, document_id
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+class DocumentMetadataStore:
+    """Durable document metadata, indexed by document_id and (user_id, created_at).
+
+    Backed by SQLite in WAL mode, so it survives restarts and can be shared by
+    several worker processes on the same host. Listing uses keyset pagination
+    on (created_at, document_id), newest first, so each page costs O(limit).
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            " document_id TEXT PRIMARY KEY,"
+            " user_id TEXT NOT NULL,"
+            " name TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created_at TEXT NOT NULL,"
+            " content_type TEXT NOT NULL,"
+            " chunk_count INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_documents_user ON documents (user_id, created_at DESC, document_id DESC)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_documents_created ON documents (created_at DESC, document_id DESC)"
+        )
+        self._conn.commit()
+
+    def upsert(self, document: Dict[str, Any]):
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO documents ({', '.join(DOCUMENT_FIELDS)})"
+                f" VALUES ({', '.join('?' * len(DOCUMENT_FIELDS))})",
+                [document.get(field) for field in DOCUMENT_FIELDS]
+            )
+            self._conn.commit()
+
+    def get(self, document_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM documents WHERE document_id = ?", (document_id,)).fetchone()
+        return dict(row) if row else None
+
+    def delete(self, document_id: str) -> bool:
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM documents WHERE document_id = ?", (document_id,))
+            self._conn.commit()
+        return cursor.rowcount > 0
+
+    def delete_user(self, user_id: str) -> List[str]:
+        """Delete every document of a user and return their ids."""
+        with self._lock:
+            rows = self._conn.execute("SELECT document_id FROM documents WHERE user_id = ?", (user_id,)).fetchall()
+            self._conn.execute("DELETE FROM documents WHERE user_id = ?", (user_id,))
+            self._conn.commit()
+        return [row["document_id"] for row in rows]
+
+    def list(self, user_id: Optional[str] = None, limit: int = 100,
+             cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Return one page of documents, newest first, and the cursor of the next page."""
+        clauses, params = [], []
+        if user_id:
+            clauses.append("user_id = ?")
+            params.append(user_id)
+        if cursor:
+            created_at, document_id = decode_cursor(cursor)
+            clauses.append("(created_at, document_id) < (?, ?)")
+            params.extend([created_at, document_id])
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM documents {where} ORDER BY created_at DESC, document_id DESC LIMIT ?",
+                [*params, limit + 1]
+            ).fetchall()
+
+        documents = [dict(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = documents[-1]
+            next_cursor = encode_cursor(last["created_at"], last["document_id"])
+        return documents, next_cursor
+
+    def count(self, user_id: Optional[str] = None) -> int:
+        with self._lock:
+            if user_id:
+                return self._conn.execute("SELECT COUNT(*) FROM documents WHERE user_id = ?", (user_id,)).fetchone()[0]
+            return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def rebuild_from_qdrant(self, client: QdrantClient, collection_name: str, metadata_payload_key: str = "metadata") -> int:
+        """Recreate entries for documents that have vectors in Qdrant but no metadata row.
+
+        Chunk payloads only carry the document id, name and user, so size,
+        content type and creation time fall back to defaults. Returns the
+        number of documents added.
+        """
+        found: Dict[str, Dict[str, Any]] = {}
+        chunk_counts: Dict[str, int] = defaultdict(int)
+        offset = None
+        while True:
+            points, offset = client.scroll(
+                collection_name=collection_name,
+                limit=REBUILD_SCROLL_LIMIT,
+                offset=offset,
+                with_payload=[metadata_payload_key],
+                with_vectors=False,
+            )
+            for point in points:
+                metadata = (point.payload or {}).get(metadata_payload_key) or {}
+                document_id = metadata.get("document_id")
+                if not document_id:
+                    continue
+                chunk_counts[document_id] += 1
+                if document_id not in found:
+                    found[document_id] = {
+                        "document_id": document_id,
+                        "user_id": metadata.get("user_id", "default_user"),
+                        "name": metadata.get("document_name") or metadata.get("source") or "Unnamed document",
+                        "size": 0,
+                        "created_at": datetime.now().isoformat(),
+                        "content_type": "application/octet-stream",
+                    }
+            if offset is None:
+                break
+
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                f"INSERT OR IGNORE INTO documents ({', '.join(DOCUMENT_FIELDS)})"
+                f" VALUES ({', '.join('?' * len(DOCUMENT_FIELDS))})",
+                [
+                    [{**document, "chunk_count": chunk_counts[document_id]}.get(field) for field in DOCUMENT_FIELDS]
+                    for document_id, document in found.items()
+                ]
+            )
+            self._conn.commit()
+            added = self._conn.total_changes - before
+        return added
@@ -25,9 +25,28 @@ class DocumentResponse(BaseModel):
 class DocumentListResponse(BaseModel):
     """Response model for list of documents."""
     documents: List[DocumentResponse]
+    next_cursor: Optional[str] = None
 
 
 class DocumentDeleteResponse(BaseModel):
     """Response model for document deletion."""
     status: str
     message: str
+
+
+class IngestionJobResponse(BaseModel):
+    """Response model for a background ingestion job."""
+    job_id: str
+    document_id: str
+    name: str
+    status: str
+    chunks_total: Optional[int] = None
+    chunks_embedded: int = 0
+    error: Optional[str] = None
+    created_at: str
+    updated_at: str
+
+
+class IngestionJobListResponse(BaseModel):
+    """Response model for list of ingestion jobs."""
+    jobs: List[IngestionJobResponse]
@@ -0,0 +1,134 @@
+"""
+Document parsing and splitting, run in a process pool so the CPU-bound
+loader and splitter work is not serialized behind the server's GIL.
+"""
+
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+from langchain_community.document_loaders import (
+    PyPDFLoader,
+    TextLoader,
+    Docx2txtLoader,
+    UnstructuredHTMLLoader
+)
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+# Number of parser processes; 0 parses inline in the calling thread
+PARSER_WORKERS = int(os.environ.get("PARSER_WORKERS", str(min(4, os.cpu_count() or 1))))
+# PDFs are parsed in page ranges of this size, in parallel
+PDF_PAGES_PER_TASK = int(os.environ.get("PDF_PAGES_PER_TASK", "25"))
+
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 100
+
+PDF_CONTENT_TYPE = "application/pdf"
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_document_loader(file_path, content_type):
+    """Returns the appropriate document loader based on file type."""
+    if content_type == PDF_CONTENT_TYPE:
+        return PyPDFLoader(file_path)
+    elif content_type == "text/plain":
+        return TextLoader(file_path)
+    elif content_type in ["application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+                          "application/msword"]:
+        return Docx2txtLoader(file_path)
+    elif content_type == "text/html":
+        return UnstructuredHTMLLoader(file_path)
+    else:
+        raise ValueError(f"Unsupported file type: {content_type}")
+
+
+def make_text_splitter() -> RecursiveCharacterTextSplitter:
+    return RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP,
+    )
+
+
+def count_pdf_pages(file_path: str) -> int:
+    from pypdf import PdfReader
+
+    return len(PdfReader(file_path).pages)
+
+
+def parse_pdf_pages(file_path: str, page_range: Tuple[int, int]) -> List[Document]:
+    """Parse and split pages [start, end) of a PDF; one page per Document like PyPDFLoader."""
+    from pypdf import PdfReader
+
+    reader = PdfReader(file_path)
+    start, end = page_range
+    pages = [
+        Document(
+            page_content=reader.pages[page].extract_text() or "",
+            metadata={"source": file_path, "page": page}
+        )
+        for page in range(start, min(end, len(reader.pages)))
+    ]
+    return make_text_splitter().split_documents(pages)
+
+
+def parse_whole_file(file_path: str, content_type: str) -> List[Document]:
+    """Load and split a document with its regular loader."""
+    documents = get_document_loader(file_path, content_type).load()
+    return make_text_splitter().split_documents(documents)
+
+
+def get_parser_executor() -> Optional[ProcessPoolExecutor]:
+    """Shared parser pool, created on first use; None when PARSER_WORKERS is 0."""
+    global _executor
+    if PARSER_WORKERS <= 0:
+        return None
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=PARSER_WORKERS)
+            print(f"[PARSER] Started process pool with {PARSER_WORKERS} workers")
+    return _executor
+
+
+def shutdown_parser_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(cancel_futures=True)
+            _executor = None
+
+
+def parse_document(file_path: str, content_type: str, executor: Optional[Executor] = None,
+                   pages_per_task: int = PDF_PAGES_PER_TASK, use_pool: bool = True) -> List[Document]:
+    """Parse and split a document, in parallel where possible.
+
+    PDFs are split into page ranges that are parsed concurrently; the chunks
+    are returned in page order, so results are deterministic regardless of
+    which worker finishes first. Each chunk gets its position in
+    metadata["chunk_index"]. `executor` defaults to the shared parser pool;
+    use_pool=False parses inline.
+    """
+    if executor is None and use_pool:
+        executor = get_parser_executor()
+
+    if content_type == PDF_CONTENT_TYPE:
+        page_count = count_pdf_pages(file_path)
+        step = max(1, pages_per_task)
+        ranges = [(start, start + step) for start in range(0, page_count, step)]
+        print(f"[PARSER] Parsing {page_count} PDF pages in {len(ranges)} ranges")
+        if executor is None:
+            results = [parse_pdf_pages(file_path, page_range) for page_range in ranges]
+        else:
+            results = executor.map(parse_pdf_pages, [file_path] * len(ranges), ranges)
+        chunks = [chunk for range_chunks in results for chunk in range_chunks]
+    elif executor is None:
+        chunks = parse_whole_file(file_path, content_type)
+    else:
+        chunks = executor.submit(parse_whole_file, file_path, content_type).result()
+
+    for index, chunk in enumerate(chunks):
+        chunk.metadata["chunk_index"] = index
+    return chunks
@@ -0,0 +1,62 @@
+from typing import Any, List, Optional, Sequence
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import (
+    Filter,
+    FieldCondition,
+    FilterSelector,
+    KeywordIndexParams,
+    MatchValue,
+    PayloadSchemaType,
+)
+
+
+def metadata_filter(key: str, value: Any, metadata_payload_key: str = "metadata") -> Filter:
+    """Filter matching points whose chunk metadata has `key` equal to `value`."""
+    return Filter(
+        must=[
+            FieldCondition(
+                key=f"{metadata_payload_key}.{key}",
+                match=MatchValue(value=value)
+            )
+        ]
+    )
+
+
+def delete_by_metadata(client: QdrantClient, collection_name: str, key: str, value: Any,
+                       metadata_payload_key: str = "metadata", wait: bool = True):
+    """Delete every point matching a metadata value with a server-side filter selector.
+
+    Point ids never leave the server and there is no limit on how many points
+    a single call removes.
+    """
+    return client.delete(
+        collection_name=collection_name,
+        points_selector=FilterSelector(filter=metadata_filter(key, value, metadata_payload_key)),
+        wait=wait,
+    )
+
+
+def ensure_payload_indexes(client: QdrantClient, collection_name: str, fields: Sequence[str],
+                           metadata_payload_key: str = "metadata", tenant_field: Optional[str] = None) -> List[str]:
+    """Create keyword payload indexes on metadata fields that are not indexed yet.
+
+    Safe to call on every startup: fields that already have an index are
+    skipped, so existing collections are migrated once and left alone after
+    that. `tenant_field` is indexed with is_tenant, which lets the server
+    co-locate each tenant's points. Returns the payload keys that were
+    indexed by this call. The local (embedded) client accepts the calls but
+    does not build indexes; they take effect on a Qdrant server.
+    """
+    existing = client.get_collection(collection_name).payload_schema or {}
+    created = []
+    for field in fields:
+        key = f"{metadata_payload_key}.{field}"
+        if key in existing:
+            if existing[key].data_type != PayloadSchemaType.KEYWORD:
+                print(f"[VECTORDB] Payload index on {key} is {existing[key].data_type}, expected keyword")
+            continue
+        schema = KeywordIndexParams(type="keyword", is_tenant=True) if field == tenant_field else PayloadSchemaType.KEYWORD
+        client.create_payload_index(collection_name, field_name=key, field_schema=schema, wait=True)
+        created.append(key)
+    return created
@@ -0,0 +1,98 @@
+import hashlib
+import os
+import threading
+from array import array
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from ..cache import TTLLRUCache
+from .embedding_cache import normalize_text
+
+QUERY_EMBEDDING_CACHE_SIZE = int(os.environ.get("QUERY_EMBEDDING_CACHE_SIZE", "1024"))
+RETRIEVAL_CACHE_SIZE = int(os.environ.get("RETRIEVAL_CACHE_SIZE", "1024"))
+QUERY_CACHE_TTL = float(os.environ.get("QUERY_CACHE_TTL", "300"))
+
+# Generation key for searches that are not scoped to a user
+ALL_USERS = "__all__"
+
+
+def vector_digest(vector: List[float]) -> str:
+    """Stable hash of a query vector, used as part of the retrieval cache key."""
+    return hashlib.sha1(array("f", vector).tobytes()).hexdigest()
+
+
+class QueryCache:
+    """Two-level cache for knowledge base queries.
+
+    Level 1 maps normalized query text to its embedding. Level 2 maps
+    (user_id, query vector, top_k) to the retrieved documents. Level 2 keys
+    carry a per-user generation number that invalidate_user() bumps whenever
+    the user's documents change, so stale results are never served and simply
+    age out of the LRU.
+    """
+
+    def __init__(
+            self,
+            encoder: Embeddings,
+            model_name: str,
+            embedding_cache_size: int = QUERY_EMBEDDING_CACHE_SIZE,
+            retrieval_cache_size: int = RETRIEVAL_CACHE_SIZE,
+            ttl: float = QUERY_CACHE_TTL,
+    ):
+        self.encoder = encoder
+        self.model_name = model_name
+        self.embeddings = TTLLRUCache(embedding_cache_size, ttl)
+        self.results = TTLLRUCache(retrieval_cache_size, ttl)
+        self._generations: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def embed_query(self, query: str) -> List[float]:
+        """Return the query embedding, computing it only on a cache miss."""
+        vector = self.cached_embedding(query)
+        if vector is None:
+            vector = self.compute_embedding(query)
+        return vector
+
+    def cached_embedding(self, query: str) -> Optional[List[float]]:
+        """Return the query embedding if it is cached, without computing it."""
+        return self.embeddings.get((self.model_name, normalize_text(query)))
+
+    def compute_embedding(self, query: str) -> List[float]:
+        """Embed the query with the encoder and cache the vector."""
+        vector = self.encoder.embed_query(query)
+        self.embeddings.set((self.model_name, normalize_text(query)), vector)
+        return vector
+
+    def generation(self, user_id: Optional[str]) -> int:
+        """Version of the user's documents; changes whenever invalidate_user() is called for them."""
+        with self._lock:
+            return self._generations[user_id or ALL_USERS]
+
+    def result_key(self, user_id: Optional[str], vector: List[float], top_k: int, **params) -> tuple:
+        """Build the retrieval cache key; take it before searching so a concurrent invalidation wins."""
+        scope = user_id or ALL_USERS
+        return scope, self.generation(user_id), vector_digest(vector), top_k, tuple(sorted(params.items()))
+
+    def get_results(self, key: tuple) -> Optional[List[Document]]:
+        results = self.results.get(key)
+        return list(results) if results is not None else None
+
+    def set_results(self, key: tuple, results: List[Document]):
+        self.results.set(key, list(results))
+
+    def invalidate_user(self, user_id: Optional[str]):
+        """Drop cached retrieval results after the user's documents changed."""
+        with self._lock:
+            self._generations[user_id or ALL_USERS] += 1
+            # Unscoped searches can see every user's documents
+            if user_id:
+                self._generations[ALL_USERS] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "query_embeddings": self.embeddings.stats(),
+            "retrieval_results": self.results.stats(),
+        }
@@ -0,0 +1,90 @@
+"""
+Post-retrieval stages applied to candidate chunks before they reach the prompt.
+"""
+
+import os
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+# Rank constant of reciprocal-rank fusion; larger values flatten the weight of top ranks
+RRF_K = 60
+# Relevance vs diversity trade-off of maximal marginal relevance (1.0 = relevance only)
+MMR_LAMBDA = float(os.environ.get("MMR_LAMBDA", "0.7"))
+# Cosine similarity at which two chunks count as near-duplicates
+DUPLICATE_THRESHOLD = float(os.environ.get("DUPLICATE_THRESHOLD", "0.95"))
+
+
+def point_id_of(doc: Document) -> str:
+    """Qdrant point id of a retrieved chunk, as a string."""
+    return str(doc.metadata.get("_id"))
+
+
+def reciprocal_rank_fusion(rankings: Sequence[List[Document]], weights: Sequence[float],
+                           k: int = RRF_K) -> List[Tuple[Document, float]]:
+    """Fuse ranked result lists with weighted reciprocal-rank fusion.
+
+    A chunk scores sum(weight / (k + rank)) over the lists it appears in, with
+    ranks starting at 1. Chunks are identified by point id; the first list
+    that contains a chunk provides its Document. Returns (chunk, score) pairs,
+    best first.
+    """
+    scores: Dict[str, float] = {}
+    documents: Dict[str, Document] = {}
+    for ranking, weight in zip(rankings, weights):
+        if weight <= 0:
+            continue
+        for rank, doc in enumerate(ranking, start=1):
+            point_id = point_id_of(doc)
+            scores[point_id] = scores.get(point_id, 0.0) + weight / (k + rank)
+            documents.setdefault(point_id, doc)
+
+    fused = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    return [(documents[point_id], score) for point_id, score in fused]
+
+
+def cosine_similarities(query_vector: Sequence[float], vectors: np.ndarray) -> np.ndarray:
+    """Cosine similarity of the query to each row of `vectors`."""
+    query = np.asarray(query_vector, dtype=np.float32)
+    return normalize_rows(vectors) @ (query / (np.linalg.norm(query) or 1.0))
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+def maximal_marginal_relevance(relevance: np.ndarray, vectors: np.ndarray, k: int,
+                               lambda_mult: float = MMR_LAMBDA,
+                               duplicate_threshold: float = DUPLICATE_THRESHOLD) -> List[int]:
+    """Pick up to `k` candidates balancing relevance against similarity to those already picked.
+
+    `relevance` holds one score per candidate (higher is better) and
+    `vectors` their stored embeddings. Each step takes the candidate with the
+    best lambda * relevance - (1 - lambda) * max similarity to the picked set.
+    Candidates whose cosine similarity to a picked one reaches
+    `duplicate_threshold` are near-duplicates (e.g. overlapping neighbouring
+    chunks) and are dropped, so fewer than `k` indices may be returned.
+    The pairwise similarities are one matrix product, and each step is a
+    vectorized update, so 50 candidates take well under a millisecond.
+    """
+    count = len(relevance)
+    if count == 0 or k <= 0:
+        return []
+
+    unit = normalize_rows(np.asarray(vectors, dtype=np.float32))
+    similarity = unit @ unit.T
+    relevance = np.asarray(relevance, dtype=np.float32)
+
+    selected: List[int] = []
+    available = np.ones(count, dtype=bool)
+    max_similarity = np.zeros(count, dtype=np.float32)
+    while len(selected) < k and available.any():
+        scores = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+        index = int(np.argmax(np.where(available, scores, -np.inf)))
+        selected.append(index)
+        available[index] = False
+        max_similarity = np.maximum(max_similarity, similarity[index])
+        available &= max_similarity < duplicate_threshold
+    return selected
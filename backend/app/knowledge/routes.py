@@ -1,58 +1,125 @@
-from typing import Optional
+import asyncio
+import os
+import uuid
+from typing import Any, Dict, Optional
 
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Query
 
-from .models import DocumentResponse, DocumentListResponse, DocumentDeleteResponse
-from .vectordb import process_and_store_document, delete_document, get_document_list, document_metadata
+from .jobs import ingestion_queue, IngestionQueueFullError
+from .models import (
+    DocumentListResponse,
+    DocumentDeleteResponse,
+    IngestionJobResponse,
+    IngestionJobListResponse,
+)
+from .vectordb import (
+    adelete_document,
+    adelete_user_documents,
+    get_document_list,
+    get_embedding_cache_stats,
+    get_query_cache_stats,
+    get_sparse_index_stats,
+)
 
 router = APIRouter()
 
 
-@router.post("/knowledge/upload", response_model=DocumentResponse)
+# Uploads are copied to the spool file in chunks of this size; larger uploads are rejected
+UPLOAD_CHUNK_SIZE = int(os.environ.get("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+MAX_UPLOAD_SIZE = int(os.environ.get("MAX_UPLOAD_SIZE", str(50 * 1024 * 1024)))
+
+
+class UploadTooLargeError(Exception):
+    """Raised when an upload exceeds MAX_UPLOAD_SIZE."""
+
+
+async def spool_upload(file: UploadFile, path: str, max_size: int = MAX_UPLOAD_SIZE) -> int:
+    """Stream an upload to `path` in fixed-size chunks and return its size.
+
+    Only one chunk is held in memory at a time, and the size limit is
+    enforced as bytes arrive. The partial file is removed on failure.
+    """
+    if file.size is not None and file.size > max_size:
+        raise UploadTooLargeError(f"File exceeds the maximum upload size of {max_size} bytes")
+
+    size = 0
+    try:
+        with open(path, "wb") as spool_file:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLargeError(f"File exceeds the maximum upload size of {max_size} bytes")
+                await asyncio.to_thread(spool_file.write, chunk)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return size
+
+
+@router.post("/knowledge/upload", response_model=IngestionJobResponse, status_code=202)
 async def upload_document(
         file: UploadFile = File(...),
         user_id: str = Form("default_user")
 ):
-    """Upload a document to the knowledge base."""
+    """Upload a document to the knowledge base; ingestion runs as a background job."""
     print(f"\n[KNOWLEDGE API] Document upload requested: {file.filename}")
     print(f"[KNOWLEDGE API] Content type: {file.content_type}")
     print(f"[KNOWLEDGE API] User ID: {user_id}")
 
     try:
-        # Read file content
-        file_content = await file.read()
-        print(f"[KNOWLEDGE API] Read file content, size: {len(file_content)} bytes")
-
-        # Process and store document
-        print(f"[KNOWLEDGE API] Processing and storing document...")
-        document_id = process_and_store_document(
-            file=file_content,
-            filename=file.filename,
-            content_type=file.content_type or "application/octet-stream",
-            user_id=user_id
-        )
+        # Stream the upload to a spool file so the job can be resumed after a restart
+        job_id = str(uuid.uuid4())
+        spool_path = ingestion_queue.new_spool_path(job_id)
+        file_size = await spool_upload(file, spool_path)
+        print(f"[KNOWLEDGE API] Spooled file content, size: {file_size} bytes")
 
-        # Return document info
-        doc_info = document_metadata[document_id]
-        print(f"[KNOWLEDGE API] Document processed successfully, ID: {document_id}")
-        return DocumentResponse(
-            document_id=doc_info["document_id"],
-            name=doc_info["name"],
-            size=doc_info["size"],
-            created_at=doc_info["created_at"],
-            content_type=doc_info["content_type"]
-        )
+        try:
+            job = await ingestion_queue.submit(
+                file_path=spool_path,
+                filename=file.filename,
+                content_type=file.content_type or "application/octet-stream",
+                user_id=user_id,
+                size=file_size,
+                job_id=job_id,
+            )
+        except Exception:
+            os.unlink(spool_path)
+            raise
+        print(f"[KNOWLEDGE API] Document queued for ingestion, job ID: {job['job_id']}")
+        return IngestionJobResponse(**job)
+    except UploadTooLargeError as e:
+        print(f"[KNOWLEDGE API] Upload rejected: {str(e)}")
+        raise HTTPException(status_code=413, detail=str(e))
+    except IngestionQueueFullError as e:
+        print(f"[KNOWLEDGE API] Ingestion queue full: {str(e)}")
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
-        print(f"[KNOWLEDGE API] Error processing document: {str(e)}")
+        print(f"[KNOWLEDGE API] Error queuing document: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error processing document: {str(e)}")
 
 
+@router.get("/knowledge/jobs/{job_id}", response_model=IngestionJobResponse)
+async def get_ingestion_job(job_id: str):
+    """Get the status and progress of an ingestion job."""
+    job = ingestion_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return IngestionJobResponse(**job)
+
+
+@router.get("/knowledge/jobs", response_model=IngestionJobListResponse)
+async def list_ingestion_jobs(user_id: Optional[str] = Query(None), limit: int = Query(50, ge=1, le=500)):
+    """List recent ingestion jobs, newest first."""
+    jobs = ingestion_queue.list(user_id=user_id, limit=limit)
+    return IngestionJobListResponse(jobs=[IngestionJobResponse(**job) for job in jobs])
+
+
 @router.delete("/knowledge/delete/{document_id}", response_model=DocumentDeleteResponse)
 async def delete_document_endpoint(document_id: str):
     """Delete a document from the knowledge base."""
     print(f"\n[KNOWLEDGE API] Document deletion requested: {document_id}")
 
-    success = delete_document(document_id)
+    success = await adelete_document(document_id)
     if success:
         print(f"[KNOWLEDGE API] Document deleted successfully: {document_id}")
         return DocumentDeleteResponse(
@@ -64,13 +131,46 @@ async def delete_document_endpoint(document_id: str):
         raise HTTPException(status_code=404, detail=f"Document {document_id} not found")
 
 
+@router.delete("/knowledge/users/{user_id}/documents", response_model=DocumentDeleteResponse)
+async def delete_user_documents_endpoint(user_id: str):
+    """Delete every document of a user from the knowledge base."""
+    print(f"\n[KNOWLEDGE API] Deletion of all documents requested for user: {user_id}")
+
+    try:
+        deleted = await adelete_user_documents(user_id)
+    except Exception as e:
+        print(f"[KNOWLEDGE API] Error deleting documents for user {user_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error deleting documents: {str(e)}")
+    return DocumentDeleteResponse(
+        status="success",
+        message=f"Deleted {deleted} documents for user {user_id}"
+    )
+
+
 @router.get("/knowledge/documents", response_model=DocumentListResponse)
-async def get_documents(user_id: Optional[str] = Query(None)):
-    """Get list of documents in the knowledge base."""
+async def get_documents(
+        user_id: Optional[str] = Query(None),
+        limit: int = Query(100, ge=1, le=1000),
+        cursor: Optional[str] = Query(None)
+):
+    """Get one page of documents in the knowledge base, newest first."""
     print(f"\n[KNOWLEDGE API] Document list requested")
     if user_id:
         print(f"[KNOWLEDGE API] Filtering for user: {user_id}")
 
-    documents = get_document_list(user_id=user_id)
+    try:
+        documents, next_cursor = get_document_list(user_id=user_id, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     print(f"[KNOWLEDGE API] Returning {len(documents)} documents")
-    return DocumentListResponse(documents=documents)
+    return DocumentListResponse(documents=documents, next_cursor=next_cursor)
+
+
+@router.get("/knowledge/stats")
+async def get_knowledge_stats() -> Dict[str, Any]:
+    """Get cache and search metrics of the knowledge base."""
+    return {
+        "embedding_cache": get_embedding_cache_stats(),
+        "query_cache": get_query_cache_stats(),
+        "sparse_index": get_sparse_index_stats(),
+    }
@@ -0,0 +1,200 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.documents import Document
+from qdrant_client import QdrantClient
+
+# Query terms sent to the full-text index; longer queries keep their first terms
+MAX_QUERY_TERMS = 32
+# SQLite VM steps between deadline checks while a search runs
+DEADLINE_CHECK_STEPS = 1000
+# Points read per scroll page when rebuilding from Qdrant
+REBUILD_SCROLL_LIMIT = 1000
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def build_match_query(text: str, max_terms: int = MAX_QUERY_TERMS) -> Optional[str]:
+    """Turn free text into an FTS5 query matching any of its terms; None when it has no terms."""
+    terms = list(dict.fromkeys(token.lower() for token in TOKEN_PATTERN.findall(text)))[:max_terms]
+    if not terms:
+        return None
+    return " OR ".join(f'"{term}"' for term in terms)
+
+
+class SparseSearchTimeout(Exception):
+    """Raised when a sparse search runs past its deadline."""
+
+
+class SparseIndex:
+    """BM25 lexical index of knowledge base chunks, kept next to the vectors.
+
+    Backed by SQLite FTS5, so it needs no network or model download. Chunks
+    are keyed by their Qdrant point id, with the document and user ids in an
+    indexed side table for filtering and deletion. The unicode61 tokenizer
+    folds diacritics, so "cà phê" and "ca phe" match the same chunks, and
+    codes such as "EXP-01" match on their parts.
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS chunks (
+                id INTEGER PRIMARY KEY,
+                point_id TEXT NOT NULL UNIQUE,
+                document_id TEXT,
+                user_id TEXT,
+                content TEXT NOT NULL,
+                metadata TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_chunks_document ON chunks (document_id);
+            CREATE INDEX IF NOT EXISTS idx_chunks_user ON chunks (user_id);
+            CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(
+                content, content='chunks', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+            );
+            CREATE TRIGGER IF NOT EXISTS chunks_ai AFTER INSERT ON chunks BEGIN
+                INSERT INTO chunks_fts (rowid, content) VALUES (new.id, new.content);
+            END;
+            CREATE TRIGGER IF NOT EXISTS chunks_ad AFTER DELETE ON chunks BEGIN
+                INSERT INTO chunks_fts (chunks_fts, rowid, content) VALUES ('delete', old.id, old.content);
+            END;
+            CREATE TRIGGER IF NOT EXISTS chunks_au AFTER UPDATE ON chunks BEGIN
+                INSERT INTO chunks_fts (chunks_fts, rowid, content) VALUES ('delete', old.id, old.content);
+                INSERT INTO chunks_fts (rowid, content) VALUES (new.id, new.content);
+            END;
+            """
+        )
+        self._conn.commit()
+
+        # Counters
+        self.searches = 0
+        self.timeouts = 0
+        self.search_seconds = 0.0
+
+    def _reader(self) -> sqlite3.Connection:
+        """Per-thread read connection, so concurrent searches don't queue behind one another."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._local.conn = conn
+        return conn
+
+    def add(self, ids: Sequence[Any], texts: Sequence[str], metadatas: Sequence[Dict[str, Any]]):
+        """Index chunks, replacing any already stored under the same point ids."""
+        rows = [
+            (str(point_id), metadata.get("document_id"), metadata.get("user_id"), text, json.dumps(metadata))
+            for point_id, text, metadata in zip(ids, texts, metadatas)
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO chunks (point_id, document_id, user_id, content, metadata) VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT (point_id) DO UPDATE SET document_id = excluded.document_id,"
+                " user_id = excluded.user_id, content = excluded.content, metadata = excluded.metadata",
+                rows
+            )
+            self._conn.commit()
+
+    def delete_document(self, document_id: str) -> int:
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM chunks WHERE document_id = ?", (document_id,))
+            self._conn.commit()
+        return cursor.rowcount
+
+    def delete_user(self, user_id: str) -> int:
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM chunks WHERE user_id = ?", (user_id,))
+            self._conn.commit()
+        return cursor.rowcount
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def search(self, query: str, user_id: Optional[str] = None, limit: int = 10,
+               timeout: Optional[float] = None) -> List[Tuple[str, float, Document]]:
+        """Return (point_id, bm25 score, chunk) for the best matches, best first.
+
+        Higher scores are better. With a `timeout` in seconds, the search is
+        interrupted and SparseSearchTimeout raised once it runs past it.
+        """
+        match = build_match_query(query)
+        if match is None:
+            return []
+
+        sql = (
+            "SELECT c.point_id, -bm25(chunks_fts) AS score, c.content, c.metadata"
+            " FROM chunks_fts JOIN chunks c ON c.id = chunks_fts.rowid"
+            " WHERE chunks_fts MATCH ?"
+        )
+        params: List[Any] = [match]
+        if user_id:
+            sql += " AND c.user_id = ?"
+            params.append(user_id)
+        sql += " ORDER BY bm25(chunks_fts) LIMIT ?"
+        params.append(limit)
+
+        conn = self._reader()
+        start = time.perf_counter()
+        if timeout is not None:
+            deadline = time.monotonic() + timeout
+            conn.set_progress_handler(lambda: time.monotonic() > deadline, DEADLINE_CHECK_STEPS)
+        try:
+            rows = conn.execute(sql, params).fetchall()
+        except sqlite3.OperationalError as e:
+            if "interrupted" not in str(e):
+                raise
+            self.timeouts += 1
+            raise SparseSearchTimeout(f"Sparse search exceeded {timeout * 1000:.0f}ms")
+        finally:
+            conn.set_progress_handler(None, 0)
+            self.searches += 1
+            self.search_seconds += time.perf_counter() - start
+
+        return [
+            (point_id, score, Document(page_content=content, metadata={**json.loads(metadata), "_id": point_id}))
+            for point_id, score, content, metadata in rows
+        ]
+
+    def rebuild_from_qdrant(self, client: QdrantClient, collection_name: str,
+                            content_payload_key: str = "page_content", metadata_payload_key: str = "metadata") -> int:
+        """Index every chunk stored in Qdrant; returns the number of chunks indexed."""
+        indexed = 0
+        offset = None
+        while True:
+            points, offset = client.scroll(
+                collection_name=collection_name,
+                limit=REBUILD_SCROLL_LIMIT,
+                offset=offset,
+                with_payload=[content_payload_key, metadata_payload_key],
+                with_vectors=False,
+            )
+            self.add(
+                [point.id for point in points],
+                [(point.payload or {}).get(content_payload_key) or "" for point in points],
+                [(point.payload or {}).get(metadata_payload_key) or {} for point in points],
+            )
+            indexed += len(points)
+            if offset is None:
+                break
+        return indexed
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "searches": self.searches,
+            "timeouts": self.timeouts,
+            "avg_search_ms": self.search_seconds / self.searches * 1000 if self.searches else 0.0,
+        }
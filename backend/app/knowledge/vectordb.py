@@ -1,25 +1,38 @@
+import asyncio
 import os
 import tempfile
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 from contextlib import contextmanager
 from datetime import datetime
-from typing import Dict, List, Any, Generator, Sequence
+from typing import Callable, Dict, List, Any, Generator, Optional, Sequence, Tuple
 
+import numpy as np
 from dotenv import load_dotenv
-from langchain_community.document_loaders import (
-    PyPDFLoader,
-    TextLoader,
-    Docx2txtLoader,
-    UnstructuredHTMLLoader
-)
 from langchain_core.documents import Document
 from langchain_core.embeddings import Embeddings
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain_qdrant import QdrantVectorStore
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from qdrant_client import QdrantClient
 from qdrant_client.models import Distance, VectorParams, Filter, FieldCondition, MatchValue
 
+from .embedding_cache import CachedEmbeddings, EmbeddingCacheStore
+from .embedding_pipeline import EmbeddingPipeline
+from .metadata_store import DocumentMetadataStore
+from .parsing import parse_document
+from .qdrant_utils import delete_by_metadata, ensure_payload_indexes, metadata_filter
+from .query_cache import QueryCache
+from .retrieval import (
+    MMR_LAMBDA,
+    cosine_similarities,
+    maximal_marginal_relevance,
+    normalize_rows,
+    point_id_of,
+    reciprocal_rank_fusion,
+)
+from .sparse_index import SparseIndex, SparseSearchTimeout
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -27,19 +40,47 @@ if "GOOGLE_API_KEY" not in os.environ:
     print("GOOGLE_API_KEY not found in environment variables. Please set it.")
 
 # Initialize Gemini embeddings
-embeddings = GoogleGenerativeAIEmbeddings(model="models/text-embedding-004")
+EMBEDDING_MODEL = "models/text-embedding-004"
+embeddings = GoogleGenerativeAIEmbeddings(model=EMBEDDING_MODEL)
 
 # Initialize Qdrant client - use local file storage for development
 QDRANT_PATH = os.environ.get("QDRANT_PATH", "./qdrant_data")
 COLLECTION_NAME = "knowledge_base"
 VECTOR_SIZE = 768  # Gemini embedding size
 
-# Document metadata store - in-memory for simplicity
-# In production, use a database
-document_metadata = {}
+# Persistent content-addressed cache of chunk embeddings
+EMBEDDING_CACHE_PATH = os.environ.get("EMBEDDING_CACHE_PATH", os.path.join(QDRANT_PATH, "embedding_cache.sqlite"))
+embedding_cache_store = EmbeddingCacheStore(EMBEDDING_CACHE_PATH)
+
+# Document metadata store - SQLite on local disk, rebuilt from Qdrant payloads when empty
+DOCUMENT_METADATA_PATH = os.environ.get("DOCUMENT_METADATA_PATH", os.path.join(QDRANT_PATH, "documents.sqlite"))
+document_store = DocumentMetadataStore(DOCUMENT_METADATA_PATH)
+
+# BM25 lexical index of chunks for hybrid retrieval - SQLite FTS5, works offline
+SPARSE_INDEX_PATH = os.environ.get("SPARSE_INDEX_PATH", os.path.join(QDRANT_PATH, "sparse_index.sqlite"))
+sparse_index = SparseIndex(SPARSE_INDEX_PATH)
 
-# Create Qdrant client
-qdrant_client = QdrantClient(path=QDRANT_PATH)
+# Retrieval mode: "dense" (vectors only) or "hybrid" (vectors + BM25, fused with reciprocal-rank fusion)
+RETRIEVAL_MODE = os.environ.get("RETRIEVAL_MODE", "hybrid")
+HYBRID_DENSE_WEIGHT = float(os.environ.get("HYBRID_DENSE_WEIGHT", "1.0"))
+HYBRID_SPARSE_WEIGHT = float(os.environ.get("HYBRID_SPARSE_WEIGHT", "1.0"))
+# Candidates fetched from each side before fusion
+HYBRID_CANDIDATES = int(os.environ.get("HYBRID_CANDIDATES", "20"))
+# Longest the sparse search may take; past it the dense results are returned alone
+HYBRID_SPARSE_BUDGET_MS = float(os.environ.get("HYBRID_SPARSE_BUDGET_MS", "100"))
+
+_sparse_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="sparse")
+
+# Diversify results with maximal marginal relevance over this many candidates, dropping near-duplicate chunks
+RETRIEVAL_DIVERSIFY = os.environ.get("RETRIEVAL_DIVERSIFY", "true").lower() == "true"
+MMR_CANDIDATES = int(os.environ.get("MMR_CANDIDATES", "20"))
+
+# Create Qdrant client - a Qdrant server when QDRANT_URL is set, otherwise local file storage
+QDRANT_URL = os.environ.get("QDRANT_URL")
+if QDRANT_URL:
+    qdrant_client = QdrantClient(url=QDRANT_URL, api_key=os.environ.get("QDRANT_API_KEY"))
+else:
+    qdrant_client = QdrantClient(path=QDRANT_PATH)
 
 # Try to create collection if it doesn't exist
 try:
@@ -52,138 +93,170 @@ except Exception:
     )
     print(f"[VECTORDB] Created new Qdrant collection: {COLLECTION_NAME}")
 
+# Metadata fields used in search and delete filters; user_id is the tenant key
+INDEXED_METADATA_FIELDS = ("user_id", "document_id")
+TENANT_FIELD = "user_id"
+
+# Index them on new and existing collections, so filters don't scan every point
+try:
+    created_indexes = ensure_payload_indexes(qdrant_client, COLLECTION_NAME, INDEXED_METADATA_FIELDS,
+                                             tenant_field=TENANT_FIELD)
+    if created_indexes:
+        print(f"[VECTORDB] Created payload indexes: {', '.join(created_indexes)}")
+except Exception as e:
+    print(f"[VECTORDB] Error creating payload indexes: {str(e)}")
+
+_text_encoders: Dict[str, CachedEmbeddings] = {}
+
+
+def make_text_encoder(model_name: str) -> Embeddings:
+    """Create an embedding model based on configuration."""
+    # We already have Gemini embeddings initialized, so just wrap them in the embedding cache
+    # This could be expanded to support other models as needed
+    if model_name not in _text_encoders:
+        _text_encoders[model_name] = CachedEmbeddings(embeddings, model_name, embedding_cache_store)
+    return _text_encoders[model_name]
+
+
 # Initialize vector store - Fix the parameter name from embeddings to embedding
 vector_store = QdrantVectorStore(
     client=qdrant_client,
     collection_name=COLLECTION_NAME,
-    embedding=embeddings,  # Changed from embeddings to embedding
+    embedding=make_text_encoder(EMBEDDING_MODEL),  # Changed from embeddings to embedding
 )
 
+# Query embedding and retrieval result caches, invalidated per user on ingest/delete
+query_cache = QueryCache(make_text_encoder(EMBEDDING_MODEL), EMBEDDING_MODEL)
 
-def make_text_encoder(model_name: str) -> Embeddings:
-    """Create an embedding model based on configuration."""
-    # We already have Gemini embeddings initialized, so just return them
-    # This could be expanded to support other models as needed
-    return embeddings
 
+def get_embedding_cache_stats() -> Dict[str, Any]:
+    """Return hit/miss metrics of the ingestion embedding cache."""
+    return make_text_encoder(EMBEDDING_MODEL).stats()
 
-# Helper functions for document processing
-def get_document_loader(file_path, content_type):
-    """Returns the appropriate document loader based on file type."""
-    if content_type == "application/pdf":
-        return PyPDFLoader(file_path)
-    elif content_type == "text/plain":
-        return TextLoader(file_path)
-    elif content_type in ["application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                          "application/msword"]:
-        return Docx2txtLoader(file_path)
-    elif content_type == "text/html":
-        return UnstructuredHTMLLoader(file_path)
-    else:
-        raise ValueError(f"Unsupported file type: {content_type}")
 
+def get_query_cache_stats() -> Dict[str, Any]:
+    """Return hit/miss metrics of the query embedding and retrieval caches."""
+    return query_cache.stats()
 
-def process_and_store_document(file, filename, content_type, user_id="default_user"):
-    """Process document and store it in the vector database."""
+
+def get_sparse_index_stats() -> Dict[str, Any]:
+    """Return search and timeout metrics of the BM25 index."""
+    return sparse_index.stats()
+
+
+def make_embedding_pipeline() -> EmbeddingPipeline:
+    """Create an ingestion pipeline writing to the knowledge base collection in the vector store's payload layout."""
+    return EmbeddingPipeline(
+        encoder=make_text_encoder(EMBEDDING_MODEL),
+        client=qdrant_client,
+        collection_name=COLLECTION_NAME,
+        content_payload_key=vector_store.content_payload_key,
+        metadata_payload_key=vector_store.metadata_payload_key,
+        vector_name=vector_store.vector_name,
+    )
+
+
+def chunk_point_ids(document_id: str, count: int) -> List[str]:
+    """Stable Qdrant point ids for the chunks of a document, so re-ingestion overwrites instead of duplicating."""
+    namespace = uuid.UUID(document_id)
+    return [str(uuid.uuid5(namespace, str(index))) for index in range(count)]
+
+
+def process_and_store_file(
+        file_path: str,
+        filename: str,
+        content_type: str,
+        user_id: str = "default_user",
+        size: Optional[int] = None,
+        document_id: Optional[str] = None,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+) -> str:
+    """Process a document already on disk and store it in the vector database.
+
+    Chunks go through the batched embedding pipeline and `progress_callback`
+    is called with (chunks_embedded, chunks_total) after each batch is written.
+    """
+    if size is None:
+        size = os.path.getsize(file_path)
     print(f"\n[VECTORDB] Processing document: {filename} ({content_type})")
-    print(f"[VECTORDB] File size: {len(file)} bytes")
+    print(f"[VECTORDB] File size: {size} bytes")
+
+    # Load and split the document in the parser process pool
+    chunks = parse_document(file_path, content_type)
+    print(f"[VECTORDB] Created {len(chunks)} chunks for embedding")
+
+    # Generate document ID
+    document_id = document_id or str(uuid.uuid4())
+
+    # Add document ID and user_id to metadata for each chunk
+    for chunk in chunks:
+        if chunk.metadata is None:
+            chunk.metadata = {}
+        chunk.metadata["document_id"] = document_id
+        chunk.metadata["document_name"] = filename
+        chunk.metadata["user_id"] = user_id
+
+    # Store document chunks in vector database, embedding and upserting in overlapping batches
+    texts = [chunk.page_content for chunk in chunks]
+    metadatas = [chunk.metadata for chunk in chunks]
+    point_ids = chunk_point_ids(document_id, len(chunks))
+    pipeline = make_embedding_pipeline()
+    pipeline.run(texts, metadatas, point_ids, progress_callback=progress_callback)
+    sparse_index.add(point_ids, texts, metadatas)
+    print(f"[VECTORDB] Successfully stored chunks in vector database "
+          f"(embed {pipeline.embed_seconds:.2f}s, upsert {pipeline.upsert_seconds:.2f}s)")
+
+    # Store document metadata
+    document_store.upsert({
+        "document_id": document_id,
+        "name": filename,
+        "size": size,
+        "created_at": datetime.now().isoformat(),
+        "content_type": content_type,
+        "chunk_count": len(chunks),
+        "user_id": user_id
+    })
+    # Bumped once the metadata row exists, so counts cached for the new generation include it
+    query_cache.invalidate_user(user_id)
+
+    return document_id
 
+
+def process_and_store_document(file, filename, content_type, user_id="default_user"):
+    """Process document and store it in the vector database."""
     # Create temporary file
     with tempfile.NamedTemporaryFile(delete=False) as temp_file:
         temp_file.write(file)
         temp_file_path = temp_file.name
 
     try:
-        # Load document
-        loader = get_document_loader(temp_file_path, content_type)
-        documents = loader.load()
-        print(f"[VECTORDB] Loaded {len(documents)} document segments")
-
-        # Split text into chunks
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=100,
-        )
-        chunks = text_splitter.split_documents(documents)
-        print(f"[VECTORDB] Created {len(chunks)} chunks for embedding")
-
-        # Generate document ID
-        document_id = str(uuid.uuid4())
-
-        # Add document ID and user_id to metadata for each chunk
-        for chunk in chunks:
-            if chunk.metadata is None:
-                chunk.metadata = {}
-            chunk.metadata["document_id"] = document_id
-            chunk.metadata["document_name"] = filename
-            chunk.metadata["user_id"] = user_id
-
-        # Store document chunks in vector database
-        vector_store.add_documents(chunks)
-        print(f"[VECTORDB] Successfully stored chunks in vector database")
-
-        # Store document metadata
-        document_metadata[document_id] = {
-            "document_id": document_id,
-            "name": filename,
-            "size": len(file),
-            "created_at": datetime.now().isoformat(),
-            "content_type": content_type,
-            "chunk_count": len(chunks),
-            "user_id": user_id
-        }
-
-        return document_id
-
+        return process_and_store_file(temp_file_path, filename, content_type, user_id=user_id, size=len(file))
     finally:
         # Clean up temporary file
         os.unlink(temp_file_path)
 
 
 def delete_document(document_id):
-    """Delete document from vector database."""
+    """Delete document from vector database.
+
+    Chunks are removed with a single filter-selector delete on
+    metadata.document_id, so no point ids are fetched and documents of any
+    size are deleted completely.
+    """
     print(f"\n[VECTORDB] Attempting to delete document: {document_id}")
 
-    if document_id in document_metadata:
+    doc_info = document_store.get(document_id)
+    if doc_info:
         try:
-            # Create a proper filter using Qdrant's models
-            filter_condition = Filter(
-                must=[
-                    FieldCondition(
-                        key="metadata.document_id",
-                        match=MatchValue(value=document_id)
-                    )
-                ]
-            )
-
-            # Get point IDs with the specified document_id
-            search_result = qdrant_client.scroll(
-                collection_name=COLLECTION_NAME,
-                scroll_filter=filter_condition,
-                limit=10000,  # Adjust based on expected max chunks per document
-                with_payload=False,
-                with_vectors=False
-            )
-
-            if search_result and search_result[0]:
-                point_ids = [point.id for point in search_result[0]]
-                if point_ids:
-                    qdrant_client.delete(
-                        collection_name=COLLECTION_NAME,
-                        points_ids=point_ids
-                    )
-
-                    # Delete metadata
-                    doc_info = document_metadata[document_id]
-                    del document_metadata[document_id]
-                    print(
-                        f"[VECTORDB] Successfully deleted document: {doc_info.get('name', document_id)} with {len(point_ids)} chunks")
-                    return True
-
-            print(f"[VECTORDB] No chunks found for document: {document_id}")
-            # Clean up metadata even if no chunks were found
-            if document_id in document_metadata:
-                del document_metadata[document_id]
+            delete_by_metadata(qdrant_client, COLLECTION_NAME, "document_id", document_id,
+                               vector_store.metadata_payload_key)
+            sparse_index.delete_document(document_id)
+
+            # Delete metadata
+            document_store.delete(document_id)
+            query_cache.invalidate_user(doc_info.get("user_id"))
+            print(f"[VECTORDB] Successfully deleted document: {doc_info.get('name', document_id)} "
+                  f"with {doc_info.get('chunk_count', 0)} chunks")
             return True
 
         except Exception as e:
@@ -194,12 +267,32 @@ def delete_document(document_id):
     return False
 
 
-def get_document_list(user_id=None):
-    """Get list of documents in the knowledge base."""
-    docs = document_metadata.values()
+def delete_user_documents(user_id: str) -> int:
+    """Delete every document of a user with one filter-selector delete; returns the number of documents removed."""
+    print(f"\n[VECTORDB] Deleting all documents for user: {user_id}")
+
+    # Vectors first: if this fails the metadata rows are kept and the delete can be retried
+    delete_by_metadata(qdrant_client, COLLECTION_NAME, "user_id", user_id, vector_store.metadata_payload_key)
+    sparse_index.delete_user(user_id)
+    document_ids = document_store.delete_user(user_id)
+    query_cache.invalidate_user(user_id)
+    print(f"[VECTORDB] Deleted {len(document_ids)} documents for user: {user_id}")
+    return len(document_ids)
+
+
+async def adelete_document(document_id: str) -> bool:
+    """Async variant of delete_document, run off the event loop."""
+    return await asyncio.to_thread(delete_document, document_id)
 
-    if user_id:
-        docs = [doc for doc in docs if doc.get("user_id") == user_id]
+
+async def adelete_user_documents(user_id: str) -> int:
+    """Async variant of delete_user_documents, run off the event loop."""
+    return await asyncio.to_thread(delete_user_documents, user_id)
+
+
+def get_document_list(user_id=None, limit: int = 100, cursor: Optional[str] = None):
+    """Get one page of documents in the knowledge base, newest first, and the next page cursor."""
+    docs, next_cursor = document_store.list(user_id=user_id, limit=limit, cursor=cursor)
 
     return [
         {
@@ -210,31 +303,198 @@ def get_document_list(user_id=None):
             "content_type": doc["content_type"]
         }
         for doc in docs
-    ]
-
-
-def query_knowledge_base(query: str, user_id=None, top_k: int = 3) -> List[Document]:
-    """Query the knowledge base for relevant document chunks."""
+    ], next_cursor
+
+
+def rebuild_document_metadata(force: bool = False) -> int:
+    """Restore metadata rows for documents found in Qdrant; skipped when the store already has rows."""
+    if not force and document_store.count() > 0:
+        return 0
+    added = document_store.rebuild_from_qdrant(qdrant_client, COLLECTION_NAME, vector_store.metadata_payload_key)
+    print(f"[VECTORDB] Rebuilt metadata for {added} documents from Qdrant payloads")
+    return added
+
+
+def rebuild_sparse_index(force: bool = False) -> int:
+    """Index chunks stored in Qdrant into the BM25 index; skipped when the index already has chunks."""
+    if not force and sparse_index.count() > 0:
+        return 0
+    indexed = sparse_index.rebuild_from_qdrant(qdrant_client, COLLECTION_NAME, vector_store.content_payload_key,
+                                               vector_store.metadata_payload_key)
+    print(f"[VECTORDB] Indexed {indexed} chunks from Qdrant payloads for lexical search")
+    return indexed
+
+
+def _document_from_point(point) -> Document:
+    """Build a chunk Document the way the vector store does, with the point id in metadata["_id"]."""
+    payload = point.payload or {}
+    metadata = payload.get(vector_store.metadata_payload_key) or {}
+    metadata["_id"] = point.id
+    metadata["_collection_name"] = COLLECTION_NAME
+    return Document(page_content=payload.get(vector_store.content_payload_key, ""), metadata=metadata)
+
+
+def _point_vector(point) -> Optional[List[float]]:
+    vector = point.vector
+    if isinstance(vector, dict):
+        vector = vector.get(vector_store.vector_name)
+    return vector
+
+
+def user_corpus_centroid(user_id: str, sample: int = 2000) -> Optional[np.ndarray]:
+    """Unit mean direction of up to `sample` of the user's chunk vectors; None when the user has no chunks."""
+    vectors, offset = [], None
+    while len(vectors) < sample:
+        points, offset = qdrant_client.scroll(
+            collection_name=COLLECTION_NAME,
+            scroll_filter=metadata_filter("user_id", user_id),
+            limit=min(256, sample - len(vectors)),
+            offset=offset,
+            with_payload=False,
+            with_vectors=True,
+        )
+        vectors.extend(vector for vector in map(_point_vector, points) if vector is not None)
+        if offset is None:
+            break
+    if not vectors:
+        return None
+    centroid = normalize_rows(np.asarray(vectors, dtype=np.float32)).mean(axis=0)
+    return centroid / (np.linalg.norm(centroid) or 1.0)
+
+
+def _dense_search(query_vector: List[float], k: int, query_filter: Optional[Filter] = None,
+                  with_vectors: bool = False) -> Tuple[List[Document], Dict[str, List[float]]]:
+    """Vector search returning chunks best first and, if asked, their stored vectors by point id."""
+    response = qdrant_client.query_points(
+        collection_name=COLLECTION_NAME,
+        query=query_vector,
+        using=vector_store.vector_name or None,
+        query_filter=query_filter,
+        limit=k,
+        with_payload=True,
+        with_vectors=with_vectors,
+    )
+    docs = [_document_from_point(point) for point in response.points]
+    vectors = {str(point.id): _point_vector(point) for point in response.points} if with_vectors else {}
+    return docs, vectors
+
+
+def _stored_vectors(point_ids: Sequence[str]) -> Dict[str, List[float]]:
+    """Fetch stored vectors of chunks by point id, without re-embedding them."""
+    if not point_ids:
+        return {}
+    points = qdrant_client.retrieve(COLLECTION_NAME, ids=list(point_ids), with_payload=False, with_vectors=True)
+    return {str(point.id): _point_vector(point) for point in points}
+
+
+def _diversify(candidates: List[Document], relevance: np.ndarray, vectors: Dict[str, List[float]],
+               top_k: int, lambda_mult: float) -> List[Document]:
+    """Apply MMR and near-duplicate suppression to ranked candidates using their stored vectors."""
+    missing = [point_id_of(doc) for doc in candidates if point_id_of(doc) not in vectors]
+    vectors = {**vectors, **_stored_vectors(missing)}
+    dimensions = len(next(iter(vectors.values()), [])) or VECTOR_SIZE
+    matrix = np.array([vectors.get(point_id_of(doc)) or [0.0] * dimensions for doc in candidates], dtype=np.float32)
+
+    start = time.perf_counter()
+    selected = maximal_marginal_relevance(relevance, matrix, top_k, lambda_mult)
+    print(f"[VECTORDB] MMR kept {len(selected)} of {len(candidates)} candidates "
+          f"in {(time.perf_counter() - start) * 1000:.3f}ms")
+    return [candidates[index] for index in selected]
+
+
+def query_knowledge_base(query: str, user_id=None, top_k: int = 3, mode: Optional[str] = None,
+                         dense_weight: Optional[float] = None, sparse_weight: Optional[float] = None,
+                         diversify: Optional[bool] = None, mmr_lambda: Optional[float] = None) -> List[Document]:
+    """Query the knowledge base for relevant document chunks.
+
+    Results are looked up in the retrieval cache before any search runs. On
+    a miss in hybrid mode the BM25 search runs while the query is searched
+    densely (and embedded, for a query not seen before); both candidate lists
+    are then fused with weighted reciprocal-rank fusion. If the BM25 side is still running
+    HYBRID_SPARSE_BUDGET_MS after it started, the dense results are used alone.
+
+    With diversify on, more candidates are fetched and reduced to `top_k`
+    with maximal marginal relevance over their stored vectors, dropping
+    near-duplicate chunks.
+    """
+    mode = mode or RETRIEVAL_MODE
+    dense_weight = HYBRID_DENSE_WEIGHT if dense_weight is None else dense_weight
+    sparse_weight = HYBRID_SPARSE_WEIGHT if sparse_weight is None else sparse_weight
+    diversify = RETRIEVAL_DIVERSIFY if diversify is None else diversify
+    mmr_lambda = MMR_LAMBDA if mmr_lambda is None else mmr_lambda
+    hybrid = mode == "hybrid" and sparse_weight > 0
     print(f"\n[VECTORDB] Querying knowledge base with: {query[:50]}...")
-    print(f"[VECTORDB] Retrieving top {top_k} results")
+    print(f"[VECTORDB] Retrieving top {top_k} results ({'hybrid' if hybrid else 'dense'}"
+          f"{', diversified' if diversify else ''})")
 
     try:
         # Filter by user_id if provided
-        search_kwargs = {}
+        query_filter = None
         if user_id:
-            search_kwargs = {
-                "filter": Filter(
-                    must=[
-                        FieldCondition(
-                            key="metadata.user_id",
-                            match=MatchValue(value=user_id)
-                        )
-                    ]
-                )
-            }
-
-        # Perform similarity search
-        results = vector_store.similarity_search(query, k=top_k, **search_kwargs)
+            query_filter = Filter(
+                must=[
+                    FieldCondition(
+                        key="metadata.user_id",
+                        match=MatchValue(value=user_id)
+                    )
+                ]
+            )
+
+        candidates = max(top_k, HYBRID_CANDIDATES if hybrid else 0, MMR_CANDIDATES if diversify else 0)
+        budget = HYBRID_SPARSE_BUDGET_MS / 1000
+        sparse_future = sparse_deadline = None
+
+        def start_sparse_search():
+            nonlocal sparse_future, sparse_deadline
+            if hybrid and sparse_future is None:
+                sparse_deadline = time.monotonic() + budget
+                sparse_future = _sparse_executor.submit(sparse_index.search, query, user_id, candidates, budget)
+
+        # Reuse cached query embeddings and results. A query seen before goes straight to the
+        # retrieval cache; only a new one starts BM25 early so it overlaps with the embedding call.
+        query_vector = query_cache.cached_embedding(query)
+        if query_vector is None:
+            start_sparse_search()
+            query_vector = query_cache.compute_embedding(query)
+        cache_key = query_cache.result_key(user_id, query_vector, top_k, mode="hybrid" if hybrid else "dense",
+                                           dense_weight=dense_weight, sparse_weight=sparse_weight,
+                                           diversify=diversify, mmr_lambda=mmr_lambda)
+        results = query_cache.get_results(cache_key)
+        if results is not None:
+            if sparse_future is not None:
+                sparse_future.cancel()
+            print(f"[VECTORDB] Retrieval cache hit, {len(results)} results")
+            return results
+        start_sparse_search()
+
+        dense_results, vectors = _dense_search(query_vector, candidates, query_filter, with_vectors=diversify)
+        ranked, relevance, complete = dense_results, None, True
+        if hybrid:
+            try:
+                remaining = max(0.0, sparse_deadline - time.monotonic())
+                sparse_results = [doc for _, _, doc in sparse_future.result(timeout=remaining)]
+            except (FuturesTimeoutError, SparseSearchTimeout):
+                # Not cached, so the next identical query gets another chance at the full hybrid search
+                print(f"[VECTORDB] Sparse search over {HYBRID_SPARSE_BUDGET_MS:.0f}ms budget, using dense results")
+                complete = False
+            else:
+                fused = reciprocal_rank_fusion([dense_results, sparse_results], [dense_weight, sparse_weight])
+                ranked = [doc for doc, _ in fused]
+                # Fused scores rescaled to [0, 1] so they weigh against cosine similarity in MMR
+                scores = np.array([score for _, score in fused], dtype=np.float32)
+                relevance = scores / scores.max() if len(scores) and scores.max() > 0 else scores
+                print(f"[VECTORDB] Fused {len(dense_results)} dense and {len(sparse_results)} sparse candidates")
+
+        if diversify and len(ranked) > 1:
+            if relevance is None:
+                relevance = cosine_similarities(
+                    query_vector, np.array([vectors[point_id_of(doc)] for doc in ranked], dtype=np.float32))
+            results = _diversify(ranked, relevance, vectors, top_k, mmr_lambda)
+        else:
+            results = ranked[:top_k]
+
+        if complete:
+            query_cache.set_results(cache_key, results)
         print(f"[VECTORDB] Found {len(results)} results")
 
         for i, doc in enumerate(results):
@@ -255,11 +515,21 @@ def make_retriever(config: Dict[str, Any]) -> Generator[Any, None, None]:
         # Extract user_id from config if available
         configurable = config.get("configurable", {})
         user_id = configurable.get("user_id", "default_user")
+        # Per-request retrieval mode and fusion weights; unset values fall back to the defaults
+        retrieval = configurable.get("retrieval") or {}
 
         # Create a retriever function that wraps our query_knowledge_base
         async def retriever(query: str) -> List[Document]:
             print(f"[VECTORDB] Retrieving documents for query: {query[:50]}...")
-            return query_knowledge_base(query, user_id=user_id)
+            return query_knowledge_base(
+                query,
+                user_id=user_id,
+                mode=retrieval.get("mode"),
+                dense_weight=retrieval.get("dense_weight"),
+                sparse_weight=retrieval.get("sparse_weight"),
+                diversify=retrieval.get("diversify"),
+                mmr_lambda=retrieval.get("mmr_lambda"),
+            )
 
         yield retriever
     except Exception as e:
@@ -290,20 +560,23 @@ async def index_documents(docs: List[Document], user_id: str = "default_user") -
         # Ensure all documents have the user_id in metadata
         stamped_docs = ensure_docs_have_user_id(docs, user_id)
 
-        # Add documents to vector store
-        vector_store.add_documents(stamped_docs)
+        # Add documents to vector store and the lexical index
+        point_ids = vector_store.add_documents(stamped_docs)
+        sparse_index.add(point_ids, [doc.page_content for doc in stamped_docs], [doc.metadata for doc in stamped_docs])
 
         # Store basic metadata about each document
         for doc in stamped_docs:
             document_id = doc.metadata.get("document_id") or str(uuid.uuid4())
-            document_metadata[document_id] = {
+            document_store.upsert({
                 "document_id": document_id,
                 "name": doc.metadata.get("source", "Unnamed document"),
                 "size": len(doc.page_content),
                 "created_at": datetime.now().isoformat(),
                 "content_type": "text/plain",
+                "chunk_count": 1,
                 "user_id": user_id
-            }
+            })
+        query_cache.invalidate_user(user_id)
 
         print(f"[VECTORDB] Successfully indexed {len(docs)} documents for user {user_id}")
         return True
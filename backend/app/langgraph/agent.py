@@ -1,17 +1,23 @@
+import hashlib
+import json
+import os
 from datetime import datetime, timezone
 from typing import Dict, List, Any, Optional
 
 from dotenv import load_dotenv
 from langchain_core.callbacks import CallbackManager
 from langchain_core.callbacks.base import BaseCallbackHandler
+from langchain_core.documents import Document
 from langchain_core.messages import SystemMessage
 from langchain_core.tools import BaseTool
 from langchain_google_genai import ChatGoogleGenerativeAI
-from langgraph.checkpoint.memory import MemorySaver
 from langgraph.errors import NodeInterrupt
 from langgraph.graph import StateGraph, END
 from langgraph.prebuilt import ToolNode
 
+from ..cache import TTLLRUCache
+from .checkpointer import make_checkpointer
+from .context import assemble_context
 from .rag_node import retrieve_knowledge, generate_query, format_docs, should_use_rag
 from .state import AgentState
 from .tools import tools
@@ -22,6 +28,11 @@ load_dotenv()
 # Initialize the default model
 model = ChatGoogleGenerativeAI(model="gemini-2.0-flash", temperature=0)
 
+# Bound models and ToolNodes are reused across steps and requests with the same tool set
+TOOL_CACHE_SIZE = int(os.environ.get("TOOL_CACHE_SIZE", "64"))
+bound_models = TTLLRUCache(TOOL_CACHE_SIZE)
+tool_nodes = TTLLRUCache(TOOL_CACHE_SIZE)
+
 
 def should_continue(state):
     """Determine if the agent should continue with tool execution or end."""
@@ -66,6 +77,42 @@ def get_tools(config):
     return tools + frontend_tools
 
 
+def tool_set_key(config) -> str:
+    """Stable hash of the server tool list plus the request's frontend tool definitions."""
+    digest = hashlib.sha256("\0".join(tool.name for tool in tools).encode())
+    for tool in config["configurable"]["frontend_tools"] or []:
+        digest.update(b"\0")
+        if hasattr(tool, "model_dump_json"):
+            digest.update(tool.model_dump_json().encode())
+        else:
+            digest.update(json.dumps(tool, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+def get_bound_model(config):
+    """The model with the config's tools bound, cached per tool set."""
+    key = tool_set_key(config)
+    bound = bound_models.get(key)
+    if bound is None:
+        bound = model.bind_tools(get_tool_defs(config))
+        bound_models.set(key, bound)
+    return bound
+
+
+def get_tool_node(config):
+    """A ToolNode for the config's tools, cached per tool set."""
+    key = tool_set_key(config)
+    node = tool_nodes.get(key)
+    if node is None:
+        node = ToolNode(get_tools(config))
+        tool_nodes.set(key, node)
+    return node
+
+
+def tool_cache_stats() -> Dict[str, Any]:
+    return {"bound_models": bound_models.stats(), "tool_nodes": tool_nodes.stats()}
+
+
 async def call_model(state, config):
     """Call the language model with the current state and RAG context."""
     thread_id = config.get("configurable", {}).get("thread_id", "unknown")
@@ -74,31 +121,32 @@ async def call_model(state, config):
     # Get the system prompt from config
     system = config["configurable"]["system"]
 
-    # Add RAG context to system prompt if available
+    # Retrieved documents go into the system prompt, cut to fit the token budget
     if "retrieved_docs" in state and state["retrieved_docs"]:
         print(f"[AGENT] Using RAG context with {len(state['retrieved_docs'])} documents")
-        rag_context = format_docs(state["retrieved_docs"])
-        enhanced_system = f"{system}\n\nRelevant information from knowledge base:\n{rag_context}"
+        docs, render_docs = state["retrieved_docs"], format_docs
     elif "rag_context" in state and state["rag_context"]:
         print(f"[AGENT] Using RAG context with {len(state['rag_context'])} documents")
-        rag_context = "\n\n".join(state["rag_context"])
-        enhanced_system = f"{system}\n\nRelevant information from knowledge base:\n{rag_context}"
+        docs = [Document(page_content=context) for context in state["rag_context"]]
+        render_docs = lambda kept: "\n\n".join(doc.page_content for doc in kept)
     else:
         print("[AGENT] No RAG context available")
-        enhanced_system = system
+        docs, render_docs = [], format_docs
 
     # Prepare messages with enhanced system prompt
     messages = state.get("messages", [])
     if not messages:
         # Handle the case when messages is empty
-        return {"messages": [SystemMessage(content=enhanced_system)]}
+        return {"messages": [SystemMessage(content=system)]}
 
-    full_messages = [SystemMessage(content=enhanced_system)] + messages
-    print(f"[AGENT] Total messages in context: {len(full_messages)}")
+    full_messages, context_stats = assemble_context(system, messages, docs, render_docs)
+    print(f"[AGENT] Total messages in context: {len(full_messages)}, "
+          f"~{context_stats['tokens_after']} tokens (saved {context_stats['tokens_saved']}, "
+          f"dropped {context_stats['turns_dropped']} turns, {context_stats['documents_dropped']} documents)")
 
     # Invoke model with tools
     print(f"[AGENT] Invoking model")
-    model_with_tools = model.bind_tools(get_tool_defs(config))
+    model_with_tools = get_bound_model(config)
     response = await model_with_tools.ainvoke(
         full_messages,
         {
@@ -107,7 +155,7 @@ async def call_model(state, config):
     )
 
     # Return the response to be added to the messages
-    return {"messages": response}
+    return {"messages": response, "context_stats": context_stats}
 
 
 async def run_tools(input, config, **kwargs):
@@ -115,7 +163,7 @@ async def run_tools(input, config, **kwargs):
     thread_id = config.get("configurable", {}).get("thread_id", "unknown")
     print(f"\n[TOOLS] Running tools for thread: {thread_id}")
 
-    tool_node = ToolNode(get_tools(config))
+    tool_node = get_tool_node(config)
     response = await tool_node.ainvoke(input, config, **kwargs)
 
     print(f"[TOOLS] Tool response received")
@@ -160,8 +208,8 @@ workflow.add_conditional_edges(
 )
 workflow.add_edge("tools", "agent")
 
-# Initialize memory checkpointer to persist conversation state
-memory = MemorySaver()
+# Durable checkpointer (SQLite or Mongo, see CHECKPOINTER) bounded per thread and by idle TTL
+memory = make_checkpointer()
 assistant_ui_graph = workflow.compile(checkpointer=memory)
 
 
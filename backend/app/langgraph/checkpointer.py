@@ -0,0 +1,509 @@
+"""
+Durable, bounded checkpoint savers for the agent graph.
+
+Both backends keep only the latest CHECKPOINT_KEEP_LATEST checkpoints of
+each thread, drop threads idle for longer than CHECKPOINT_TTL, and store
+state as msgpack, zlib-compressed when it is large. The SQLite backend
+works for a single host (several workers can share the file); the Mongo
+backend is shared by every instance using the same database.
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    SerializerProtocol,
+    get_checkpoint_id,
+)
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from pymongo.errors import OperationFailure
+
+from ..database.async_mongo_client import async_mongo_db
+
+# Backend: sqlite, mongo or memory (unbounded, in-process; for development only)
+CHECKPOINTER = os.environ.get("CHECKPOINTER", "sqlite")
+CHECKPOINT_PATH = os.environ.get("CHECKPOINT_PATH", "./checkpoint_data/checkpoints.sqlite")
+# Checkpoints kept per thread; older ones and their pending writes are deleted on every save
+CHECKPOINT_KEEP_LATEST = int(os.environ.get("CHECKPOINT_KEEP_LATEST", "3"))
+# Threads without a new checkpoint for this many seconds are deleted
+CHECKPOINT_TTL = float(os.environ.get("CHECKPOINT_TTL", str(7 * 24 * 3600)))
+# How often the SQLite backend looks for idle threads, in seconds
+CHECKPOINT_SWEEP_INTERVAL = float(os.environ.get("CHECKPOINT_SWEEP_INTERVAL", "300"))
+# Serialized values at least this large are zlib-compressed
+CHECKPOINT_COMPRESS_MIN_BYTES = int(os.environ.get("CHECKPOINT_COMPRESS_MIN_BYTES", "512"))
+
+CHECKPOINTS_COLLECTION = "checkpoints"
+CHECKPOINT_WRITES_COLLECTION = "checkpoint_writes"
+
+COMPRESSED_SUFFIX = "+zlib"
+
+
+class CompressedSerializer(SerializerProtocol):
+    """Serializer that zlib-compresses the output of another one when it is large."""
+
+    def __init__(self, inner: Optional[SerializerProtocol] = None, min_size: int = CHECKPOINT_COMPRESS_MIN_BYTES):
+        self.inner = inner or JsonPlusSerializer()
+        self.min_size = min_size
+
+    def dumps(self, obj: Any) -> bytes:
+        return self.inner.dumps(obj)
+
+    def loads(self, data: bytes) -> Any:
+        return self.inner.loads(data)
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        type_, data = self.inner.dumps_typed(obj)
+        if len(data) >= self.min_size:
+            return type_ + COMPRESSED_SUFFIX, zlib.compress(data, 1)
+        return type_, data
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        type_, payload = data
+        if type_.endswith(COMPRESSED_SUFFIX):
+            return self.inner.loads_typed((type_[:-len(COMPRESSED_SUFFIX)], zlib.decompress(payload)))
+        return self.inner.loads_typed((type_, payload))
+
+
+def _checkpoint_config(thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> RunnableConfig:
+    return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id}}
+
+
+def _matches(metadata: Dict[str, Any], filter: Optional[Dict[str, Any]]) -> bool:
+    return not filter or all(metadata.get(key) == value for key, value in filter.items())
+
+
+class SQLiteCheckpointSaver(BaseCheckpointSaver):
+    """Checkpoint saver backed by a local SQLite file in WAL mode.
+
+    Each checkpoint is stored whole (channel values included), so pruning a
+    thread to its latest `keep_latest` checkpoints is a single range delete.
+    Idle threads are swept at most every `sweep_interval` seconds, on save.
+    Async methods run the sync ones in a thread.
+    """
+
+    def __init__(self, path: str, keep_latest: int = CHECKPOINT_KEEP_LATEST, ttl: Optional[float] = CHECKPOINT_TTL,
+                 sweep_interval: float = CHECKPOINT_SWEEP_INTERVAL, serde: Optional[SerializerProtocol] = None,
+                 clock: Callable[[], float] = time.time):
+        super().__init__(serde=serde or CompressedSerializer())
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.keep_latest = max(1, keep_latest)
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self.clock = clock
+        self._last_sweep = clock()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL DEFAULT '',
+                checkpoint_id TEXT NOT NULL,
+                parent_checkpoint_id TEXT,
+                type TEXT NOT NULL,
+                checkpoint BLOB NOT NULL,
+                metadata_type TEXT NOT NULL,
+                metadata BLOB NOT NULL,
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS writes (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL DEFAULT '',
+                checkpoint_id TEXT NOT NULL,
+                task_id TEXT NOT NULL,
+                idx INTEGER NOT NULL,
+                channel TEXT NOT NULL,
+                type TEXT NOT NULL,
+                value BLOB NOT NULL,
+                task_path TEXT NOT NULL DEFAULT '',
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS threads (
+                thread_id TEXT PRIMARY KEY,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_threads_updated ON threads (updated_at);
+            """
+        )
+        self._conn.commit()
+
+    def _tuple(self, thread_id: str, checkpoint_ns: str, row: tuple) -> CheckpointTuple:
+        checkpoint_id, parent_checkpoint_id, type_, checkpoint, metadata_type, metadata = row
+        writes = self._conn.execute(
+            "SELECT task_id, channel, type, value FROM writes"
+            " WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id)
+        ).fetchall()
+        return CheckpointTuple(
+            config=_checkpoint_config(thread_id, checkpoint_ns, checkpoint_id),
+            checkpoint=self.serde.loads_typed((type_, checkpoint)),
+            metadata=self.serde.loads_typed((metadata_type, metadata)),
+            parent_config=(
+                _checkpoint_config(thread_id, checkpoint_ns, parent_checkpoint_id) if parent_checkpoint_id else None
+            ),
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed((value_type, value)))
+                for task_id, channel, value_type, value in writes
+            ],
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        columns = "checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata"
+        with self._lock:
+            if checkpoint_id := get_checkpoint_id(config):
+                row = self._conn.execute(
+                    f"SELECT {columns} FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    (thread_id, checkpoint_ns, checkpoint_id)
+                ).fetchone()
+            else:
+                row = self._conn.execute(
+                    f"SELECT {columns} FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+                    " ORDER BY checkpoint_id DESC LIMIT 1",
+                    (thread_id, checkpoint_ns)
+                ).fetchone()
+            return self._tuple(thread_id, checkpoint_ns, row) if row else None
+
+    def list(self, config: Optional[RunnableConfig], *, filter: Optional[Dict[str, Any]] = None,
+             before: Optional[RunnableConfig] = None, limit: Optional[int] = None) -> Iterator[CheckpointTuple]:
+        clauses, params = [], []
+        if config:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            clauses.append("checkpoint_id < ?")
+            params.append(before_id)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint,"
+                f" metadata_type, metadata FROM checkpoints {where} ORDER BY checkpoint_id DESC",
+                params
+            ).fetchall()
+
+        for thread_id, checkpoint_ns, *row in rows:
+            if limit is not None and limit <= 0:
+                break
+            if not _matches(self.serde.loads_typed((row[4], row[5])), filter):
+                continue
+            if limit is not None:
+                limit -= 1
+            with self._lock:
+                item = self._tuple(thread_id, checkpoint_ns, tuple(row))
+            yield item
+
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+            new_versions: ChannelVersions) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        type_, data = self.serde.dumps_typed(checkpoint)
+        metadata_type, metadata_data = self.serde.dumps_typed(metadata)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id,"
+                " type, checkpoint, metadata_type, metadata) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (thread_id, checkpoint_ns, checkpoint["id"], config["configurable"].get("checkpoint_id"),
+                 type_, data, metadata_type, metadata_data)
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO threads (thread_id, updated_at) VALUES (?, ?)", (thread_id, self.clock())
+            )
+            # Keep the latest checkpoints only; ids are time-ordered
+            boundary = self._conn.execute(
+                "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+                " ORDER BY checkpoint_id DESC LIMIT 1 OFFSET ?",
+                (thread_id, checkpoint_ns, self.keep_latest - 1)
+            ).fetchone()
+            if boundary:
+                for table in ("checkpoints", "writes"):
+                    self._conn.execute(
+                        f"DELETE FROM {table} WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id < ?",
+                        (thread_id, checkpoint_ns, boundary[0])
+                    )
+            self._conn.commit()
+
+        if self.ttl is not None and self.clock() - self._last_sweep >= self.sweep_interval:
+            self.evict_idle_threads()
+        return _checkpoint_config(thread_id, checkpoint_ns, checkpoint["id"])
+
+    def put_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str,
+                   task_path: str = "") -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        with self._lock:
+            for index, (channel, value) in enumerate(writes):
+                idx = WRITES_IDX_MAP.get(channel, index)
+                type_, data = self.serde.dumps_typed(value)
+                # Regular writes are kept from the first attempt; special channels take the latest value
+                verb = "INSERT OR IGNORE" if idx >= 0 else "INSERT OR REPLACE"
+                self._conn.execute(
+                    f"{verb} INTO writes (thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, type, value,"
+                    " task_path) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, type_, data, task_path)
+                )
+            self._conn.commit()
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            self._delete_threads([thread_id])
+            self._conn.commit()
+
+    def _delete_threads(self, thread_ids: List[str]):
+        for table in ("checkpoints", "writes", "threads"):
+            self._conn.executemany(f"DELETE FROM {table} WHERE thread_id = ?", [(thread_id,) for thread_id in thread_ids])
+
+    def evict_idle_threads(self) -> int:
+        """Delete threads idle for longer than the TTL; returns how many were deleted."""
+        self._last_sweep = self.clock()
+        if self.ttl is None:
+            return 0
+        with self._lock:
+            thread_ids = [
+                row[0] for row in self._conn.execute(
+                    "SELECT thread_id FROM threads WHERE updated_at < ?", (self.clock() - self.ttl,)
+                ).fetchall()
+            ]
+            self._delete_threads(thread_ids)
+            self._conn.commit()
+        if thread_ids:
+            print(f"[CHECKPOINT] Evicted {len(thread_ids)} idle threads")
+        return len(thread_ids)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            threads = self._conn.execute("SELECT COUNT(*) FROM threads").fetchone()[0]
+            checkpoints = self._conn.execute("SELECT COUNT(*) FROM checkpoints").fetchone()[0]
+        return {"backend": "sqlite", "threads": threads, "checkpoints": checkpoints}
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config: Optional[RunnableConfig], *, filter: Optional[Dict[str, Any]] = None,
+                    before: Optional[RunnableConfig] = None,
+                    limit: Optional[int] = None) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for item in items:
+            yield item
+
+    async def aput(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+                   new_versions: ChannelVersions) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str,
+                          task_path: str = "") -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+class MongoCheckpointSaver(BaseCheckpointSaver):
+    """Async checkpoint saver backed by two Mongo collections.
+
+    Checkpoints are pruned to the latest `keep_latest` per thread on every
+    save, and a TTL index on created_at lets Mongo delete the checkpoints of
+    threads that stopped receiving new ones. `get_db` returns the Motor
+    database, or None while Mongo is unavailable; an in-memory saver is used
+    until it comes back. Only the async methods are supported.
+    """
+
+    def __init__(self, get_db: Callable[[], Any], keep_latest: int = CHECKPOINT_KEEP_LATEST,
+                 ttl: Optional[float] = CHECKPOINT_TTL, serde: Optional[SerializerProtocol] = None):
+        super().__init__(serde=serde or CompressedSerializer())
+        self.get_db = get_db
+        self.keep_latest = max(1, keep_latest)
+        self.ttl = ttl
+        self.fallback = MemorySaver(serde=self.serde)
+        self._indexed_db = None
+
+    async def _collections(self):
+        db = self.get_db()
+        if db is None:
+            return None, None
+        checkpoints, writes = db[CHECKPOINTS_COLLECTION], db[CHECKPOINT_WRITES_COLLECTION]
+        if self._indexed_db is not db:
+            await self._ensure_indexes(checkpoints, writes)
+            self._indexed_db = db
+        return checkpoints, writes
+
+    async def _ensure_indexes(self, checkpoints, writes):
+        try:
+            await checkpoints.create_index(
+                [("thread_id", 1), ("checkpoint_ns", 1), ("checkpoint_id", -1)], unique=True
+            )
+            await writes.create_index(
+                [("thread_id", 1), ("checkpoint_ns", 1), ("checkpoint_id", 1), ("task_id", 1), ("idx", 1)],
+                unique=True
+            )
+            if self.ttl is not None:
+                for collection in (checkpoints, writes):
+                    await collection.create_index("created_at", expireAfterSeconds=int(self.ttl))
+        except OperationFailure as e:
+            print(f"[CHECKPOINT] Error creating checkpoint indexes: {str(e)}")
+
+    async def _tuple(self, writes, doc: Dict[str, Any]) -> CheckpointTuple:
+        thread_id, checkpoint_ns, checkpoint_id = doc["thread_id"], doc["checkpoint_ns"], doc["checkpoint_id"]
+        pending = await writes.find(
+            {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id}
+        ).sort([("task_id", 1), ("idx", 1)]).to_list(length=None)
+        return CheckpointTuple(
+            config=_checkpoint_config(thread_id, checkpoint_ns, checkpoint_id),
+            checkpoint=self.serde.loads_typed((doc["type"], doc["checkpoint"])),
+            metadata=self.serde.loads_typed((doc["metadata_type"], doc["metadata"])),
+            parent_config=(
+                _checkpoint_config(thread_id, checkpoint_ns, doc["parent_checkpoint_id"])
+                if doc.get("parent_checkpoint_id") else None
+            ),
+            pending_writes=[
+                (write["task_id"], write["channel"], self.serde.loads_typed((write["type"], write["value"])))
+                for write in pending
+            ],
+        )
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        checkpoints, writes = await self._collections()
+        if checkpoints is None:
+            return await self.fallback.aget_tuple(config)
+
+        query = {
+            "thread_id": config["configurable"]["thread_id"],
+            "checkpoint_ns": config["configurable"].get("checkpoint_ns", ""),
+        }
+        if checkpoint_id := get_checkpoint_id(config):
+            query["checkpoint_id"] = checkpoint_id
+        doc = await checkpoints.find_one(query, sort=[("checkpoint_id", -1)])
+        return await self._tuple(writes, doc) if doc else None
+
+    async def alist(self, config: Optional[RunnableConfig], *, filter: Optional[Dict[str, Any]] = None,
+                    before: Optional[RunnableConfig] = None,
+                    limit: Optional[int] = None) -> AsyncIterator[CheckpointTuple]:
+        checkpoints, writes = await self._collections()
+        if checkpoints is None:
+            async for item in self.fallback.alist(config, filter=filter, before=before, limit=limit):
+                yield item
+            return
+
+        query: Dict[str, Any] = {}
+        if config:
+            query["thread_id"] = config["configurable"]["thread_id"]
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                query["checkpoint_ns"] = checkpoint_ns
+            if checkpoint_id := get_checkpoint_id(config):
+                query["checkpoint_id"] = checkpoint_id
+        if before and (before_id := get_checkpoint_id(before)):
+            query["$and"] = [{"checkpoint_id": {"$lt": before_id}}]
+
+        async for doc in checkpoints.find(query).sort("checkpoint_id", -1):
+            if limit is not None and limit <= 0:
+                break
+            if not _matches(self.serde.loads_typed((doc["metadata_type"], doc["metadata"])), filter):
+                continue
+            if limit is not None:
+                limit -= 1
+            yield await self._tuple(writes, doc)
+
+    async def aput(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+                   new_versions: ChannelVersions) -> RunnableConfig:
+        checkpoints, writes = await self._collections()
+        if checkpoints is None:
+            return await self.fallback.aput(config, checkpoint, metadata, new_versions)
+
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        key = {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns}
+        type_, data = self.serde.dumps_typed(checkpoint)
+        metadata_type, metadata_data = self.serde.dumps_typed(metadata)
+        await checkpoints.replace_one(
+            {**key, "checkpoint_id": checkpoint["id"]},
+            {
+                **key,
+                "checkpoint_id": checkpoint["id"],
+                "parent_checkpoint_id": config["configurable"].get("checkpoint_id"),
+                "type": type_,
+                "checkpoint": data,
+                "metadata_type": metadata_type,
+                "metadata": metadata_data,
+                "created_at": datetime.now(timezone.utc),
+            },
+            upsert=True,
+        )
+
+        # Keep the latest checkpoints only; ids are time-ordered
+        boundary = await checkpoints.find(key, {"checkpoint_id": 1}).sort("checkpoint_id", -1) \
+            .skip(self.keep_latest - 1).limit(1).to_list(length=1)
+        if boundary:
+            older = {**key, "checkpoint_id": {"$lt": boundary[0]["checkpoint_id"]}}
+            await checkpoints.delete_many(older)
+            await writes.delete_many(older)
+        return _checkpoint_config(thread_id, checkpoint_ns, checkpoint["id"])
+
+    async def aput_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str,
+                          task_path: str = "") -> None:
+        checkpoints, writes_collection = await self._collections()
+        if checkpoints is None:
+            return await self.fallback.aput_writes(config, writes, task_id, task_path)
+
+        key = {
+            "thread_id": config["configurable"]["thread_id"],
+            "checkpoint_ns": config["configurable"].get("checkpoint_ns", ""),
+            "checkpoint_id": config["configurable"]["checkpoint_id"],
+            "task_id": task_id,
+        }
+        now = datetime.now(timezone.utc)
+        for index, (channel, value) in enumerate(writes):
+            idx = WRITES_IDX_MAP.get(channel, index)
+            type_, data = self.serde.dumps_typed(value)
+            doc = {**key, "idx": idx, "channel": channel, "type": type_, "value": data, "task_path": task_path,
+                   "created_at": now}
+            # Regular writes are kept from the first attempt; special channels take the latest value
+            if idx >= 0:
+                await writes_collection.update_one({**key, "idx": idx}, {"$setOnInsert": doc}, upsert=True)
+            else:
+                await writes_collection.replace_one({**key, "idx": idx}, doc, upsert=True)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        checkpoints, writes = await self._collections()
+        if checkpoints is None:
+            return await self.fallback.adelete_thread(thread_id)
+        await checkpoints.delete_many({"thread_id": thread_id})
+        await writes.delete_many({"thread_id": thread_id})
+
+
+def make_checkpointer() -> BaseCheckpointSaver:
+    """Create the checkpoint saver selected by CHECKPOINTER."""
+    if CHECKPOINTER == "mongo":
+        print("[CHECKPOINT] Using Mongo checkpointer")
+        return MongoCheckpointSaver(lambda: async_mongo_db.db)
+    if CHECKPOINTER == "memory":
+        print("[CHECKPOINT] Using in-memory checkpointer (not durable, unbounded)")
+        return MemorySaver()
+    print(f"[CHECKPOINT] Using SQLite checkpointer at {CHECKPOINT_PATH}")
+    return SQLiteCheckpointSaver(CHECKPOINT_PATH)
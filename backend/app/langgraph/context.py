@@ -0,0 +1,163 @@
+"""
+Token-budgeted assembly of the prompt sent to the model.
+
+The system prompt, system messages and the latest turn are always kept.
+Retrieved documents get up to RAG_CONTEXT_MAX_SHARE of the budget and are
+cut to fit. Older turns are kept newest first while they fit; the ones
+that don't are replaced by a short note listing the earlier questions.
+A turn is a user message with every assistant and tool message after it,
+so tool calls always stay together with their results.
+
+Token counts are estimated from character length, which is close enough
+for budgeting and costs no model call.
+"""
+
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.documents import Document
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+
+# Token budget of a model call; 0 disables trimming
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("CONTEXT_TOKEN_BUDGET", "8000"))
+# Largest share of the budget retrieved documents may use
+RAG_CONTEXT_MAX_SHARE = float(os.environ.get("RAG_CONTEXT_MAX_SHARE", "0.4"))
+# Tokens reserved for the note that replaces dropped turns
+CONTEXT_SUMMARY_TOKENS = int(os.environ.get("CONTEXT_SUMMARY_TOKENS", "200"))
+CHARS_PER_TOKEN = 4
+# Per-message framing (role, separators) added by the provider
+MESSAGE_OVERHEAD_TOKENS = 4
+# Characters of each earlier question quoted in the summary note
+SUMMARY_QUESTION_CHARS = 120
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def message_text(message: BaseMessage) -> str:
+    content = message.content
+    if isinstance(content, str):
+        return content
+    return "".join(part if isinstance(part, str) else (part.get("text") or "") for part in content)
+
+
+def message_tokens(message: BaseMessage) -> int:
+    tokens = estimate_tokens(message_text(message)) + MESSAGE_OVERHEAD_TOKENS
+    if isinstance(message, AIMessage) and message.tool_calls:
+        tokens += estimate_tokens(json.dumps(message.tool_calls, default=str))
+    return tokens
+
+
+def split_turns(messages: Sequence[BaseMessage]) -> Tuple[List[BaseMessage], List[List[BaseMessage]]]:
+    """Separate system messages from the conversation and group the rest into turns."""
+    pinned, turns = [], []
+    for message in messages:
+        if isinstance(message, SystemMessage):
+            pinned.append(message)
+        elif isinstance(message, HumanMessage) or not turns:
+            turns.append([message])
+        else:
+            turns[-1].append(message)
+    return pinned, turns
+
+
+def fit_documents(docs: Sequence[Document], budget: int,
+                  render: Callable[[Sequence[Document]], str]) -> Tuple[List[Document], int]:
+    """Keep documents in rank order while they fit, cutting the last one to the remaining tokens.
+
+    Each document is costed as `render` formats it, metadata included.
+    Returns the kept documents and the tokens they use.
+    """
+    kept, used = [], 0
+    for doc in docs:
+        tokens = estimate_tokens(render([doc]))
+        if used + tokens <= budget:
+            kept.append(doc)
+            used += tokens
+            continue
+        framing = tokens - estimate_tokens(doc.page_content)
+        remaining_chars = (budget - used - framing) * CHARS_PER_TOKEN
+        if remaining_chars > 0:
+            kept.append(Document(page_content=doc.page_content[:remaining_chars], metadata=doc.metadata))
+            used = budget
+        break
+    return kept, used
+
+
+def summarize_turns(turns: Sequence[List[BaseMessage]], budget: int) -> Optional[str]:
+    """Short note standing in for dropped turns: the questions asked, most recent kept if space runs out."""
+    questions = []
+    used = estimate_tokens("Earlier in this conversation the user asked:")
+    for turn in reversed(turns):
+        question = message_text(turn[0]).strip().replace("\n", " ")[:SUMMARY_QUESTION_CHARS]
+        tokens = estimate_tokens(question) + 2
+        if not question or used + tokens > budget:
+            continue
+        questions.append(question)
+        used += tokens
+    if not questions:
+        return None
+    return "Earlier in this conversation the user asked:\n" + "\n".join(f"- {q}" for q in reversed(questions))
+
+
+def assemble_context(
+        system: str,
+        messages: Sequence[BaseMessage],
+        docs: Sequence[Document] = (),
+        format_docs: Callable[[Sequence[Document]], str] = None,
+        budget: int = CONTEXT_TOKEN_BUDGET,
+        rag_share: float = RAG_CONTEXT_MAX_SHARE,
+        summary_tokens: int = CONTEXT_SUMMARY_TOKENS,
+) -> Tuple[List[BaseMessage], Dict[str, Any]]:
+    """Build [SystemMessage] + history within `budget` tokens; returns the messages and token stats.
+
+    `format_docs` renders the kept documents for the system prompt and is
+    required when `docs` is not empty.
+    """
+    def system_prompt(kept_docs: Sequence[Document], summary: Optional[str]) -> str:
+        prompt = system
+        if kept_docs:
+            prompt += f"\n\nRelevant information from knowledge base:\n{format_docs(kept_docs)}"
+        if summary:
+            prompt += f"\n\n{summary}"
+        return prompt
+
+    full = [SystemMessage(content=system_prompt(docs, None))] + list(messages)
+    tokens_before = sum(message_tokens(message) for message in full)
+    if budget <= 0 or tokens_before <= budget:
+        return full, {"tokens_before": tokens_before, "tokens_after": tokens_before, "tokens_saved": 0,
+                      "turns_dropped": 0, "documents_dropped": 0}
+
+    pinned, turns = split_turns(messages)
+    latest = turns[-1] if turns else []
+    older = turns[:-1]
+
+    # Fixed costs: system prompt, system messages, latest turn and room for the summary note
+    fixed = (estimate_tokens(system) + MESSAGE_OVERHEAD_TOKENS
+             + sum(message_tokens(message) for message in pinned + latest)
+             + (summary_tokens if older else 0))
+    kept_docs, docs_tokens = fit_documents(docs, max(0, min(int(budget * rag_share), budget - fixed)), format_docs)
+    remaining = budget - fixed - docs_tokens
+
+    kept_turns: List[List[BaseMessage]] = []
+    for index in range(len(older) - 1, -1, -1):
+        tokens = sum(message_tokens(message) for message in older[index])
+        if tokens > remaining:
+            break
+        kept_turns.insert(0, older[index])
+        remaining -= tokens
+    dropped = older[:len(older) - len(kept_turns)]
+
+    summary = summarize_turns(dropped, summary_tokens) if dropped else None
+    history = [message for turn in kept_turns + [latest] for message in turn]
+    assembled = [SystemMessage(content=system_prompt(kept_docs, summary))] + pinned + history
+    tokens_after = sum(message_tokens(message) for message in assembled)
+    return assembled, {
+        "tokens_before": tokens_before,
+        "tokens_after": tokens_after,
+        "tokens_saved": tokens_before - tokens_after,
+        "turns_dropped": len(dropped),
+        "documents_dropped": len(docs) - len(kept_docs),
+    }
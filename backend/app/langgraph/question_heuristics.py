@@ -0,0 +1,55 @@
+"""
+Question-only checks for the retrieval gate.
+
+They look at the text of the last question and nothing else, so they cost
+microseconds and need no knowledge base. Each check names the reason a
+question cannot benefit from retrieval: small talk, bare arithmetic, or
+arithmetic on the previous answer with a number operand.
+"""
+
+import re
+import unicodedata
+from typing import Optional
+
+SMALLTALK = {
+    "hi", "hello", "hey", "thanks", "thank you", "thx", "ok", "okay", "yes", "no", "bye", "goodbye",
+    "great", "cool", "nice", "got it", "good morning", "good night",
+    "xin chào", "chào", "chào bạn", "cảm ơn", "cám ơn", "cảm ơn bạn", "cám ơn bạn", "ok cảm ơn",
+    "vâng", "dạ", "ừ", "có", "không", "tạm biệt", "tốt", "hay quá",
+}
+NUMBER = r"\d+(?:[.,]\d+)*%?"
+# Bare arithmetic with at least one operator, e.g. "2 * (350 + 40)"; a lone "2024?" is not arithmetic
+ARITHMETIC = re.compile(rf"^\(*\s*{NUMBER}\s*\)*(?:\s*[-+*/x×÷^]\s*\(*\s*{NUMBER}\s*\)*)+\s*=?\s*\??$")
+REFERENCE = r"(?:that|it|this|the result|nó|đó|cái đó|số đó|kết quả(?: đó| này)?)"
+FILLER_BEFORE = r"(?:(?:now|then|and|ok|okay|please|what is|what s|vậy|thế|giờ|bây giờ|còn) )*"
+FILLER_AFTER = r"(?: (?:please|then|nhé|nha|thì sao|bằng bao nhiêu|là bao nhiêu|được không))*"
+# Arithmetic on a previous answer with a number operand, e.g. "multiply that by 2", "chia nó cho 3".
+# Whole phrases only: Vietnamese writes each syllable as a word, so "nhân", "chia", "cộng" alone
+# also start "nhân viên", "chia sẻ", "cộng đồng".
+MATH_FOLLOWUPS = [
+    rf"(?:multiply|divide) {REFERENCE} by {NUMBER}",
+    rf"add {NUMBER} to {REFERENCE}",
+    rf"subtract {NUMBER} from {REFERENCE}",
+    rf"{REFERENCE} (?:times|plus|minus|multiplied by|divided by|x) {NUMBER}",
+    rf"(?:nhân|chia|cộng|trừ) {REFERENCE} (?:với|cho|thêm|đi|bớt) {NUMBER}",
+    rf"{REFERENCE} (?:nhân với|nhân|chia cho|chia|cộng với|cộng thêm|cộng|trừ đi|trừ) {NUMBER}",
+]
+MATH_FOLLOWUP = re.compile(rf"^{FILLER_BEFORE}(?:{'|'.join(MATH_FOLLOWUPS)}){FILLER_AFTER}$")
+# Punctuation, keeping decimal points and separators inside numbers
+PUNCTUATION = re.compile(r"[^\w\s.,%]|[.,](?!\d)|(?<!\d)%")
+
+
+def heuristic_skip(question: str) -> Optional[str]:
+    """Reason to skip retrieval judging by the question alone, or None."""
+    # Vietnamese input may arrive decomposed (NFD); the phrases below are composed
+    question = unicodedata.normalize("NFC", question)
+    text = " ".join(PUNCTUATION.sub(" ", question.lower()).split())
+    if not text:
+        return "empty"
+    if text in SMALLTALK:
+        return "smalltalk"
+    if ARITHMETIC.match(question.strip().lower()):
+        return "arithmetic"
+    if MATH_FOLLOWUP.match(text):
+        return "arithmetic_followup"
+    return None
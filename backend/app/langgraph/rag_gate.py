@@ -0,0 +1,120 @@
+"""
+Local gating of knowledge base retrieval for the rag_decision node.
+
+Retrieval costs a query embedding plus a vector search. Many turns cannot
+benefit from it, so the gate decides without calling the LLM, cheapest
+check first:
+
+1. Heuristics on the question: empty text, small talk ("thanks", "cảm ơn")
+   and arithmetic on a previous answer ("multiply that by 2") skip.
+2. Users without indexed documents skip. The count comes from the document
+   metadata store and is memoized per knowledge-base generation.
+3. Optionally, the query embedding is compared with the centroid of the
+   user's chunk vectors. Questions less similar than
+   RAG_CENTROID_THRESHOLD skip. The embedding goes through the query cache,
+   so retrieval reuses it when the gate lets the question through.
+"""
+
+import asyncio
+import os
+from collections import Counter
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from ..cache import TTLLRUCache
+from ..knowledge.vectordb import document_store, query_cache, user_corpus_centroid
+from .question_heuristics import heuristic_skip
+
+RAG_GATING_ENABLED = os.environ.get("RAG_GATING_ENABLED", "true").lower() == "true"
+# Minimum cosine similarity of the question to the user's corpus centroid; 0 disables the check
+RAG_CENTROID_THRESHOLD = float(os.environ.get("RAG_CENTROID_THRESHOLD", "0"))
+# Chunk vectors averaged into a user's centroid
+RAG_CENTROID_SAMPLE = int(os.environ.get("RAG_CENTROID_SAMPLE", "2000"))
+# Users whose document count and centroid are kept in memory
+RAG_GATE_CACHE_SIZE = int(os.environ.get("RAG_GATE_CACHE_SIZE", "1000"))
+
+
+class RagGate:
+    """Decides whether a question should go through retrieval, and counts how often it skips."""
+
+    def __init__(self, centroid_threshold: float = RAG_CENTROID_THRESHOLD,
+                 centroid_sample: int = RAG_CENTROID_SAMPLE, cache_size: int = RAG_GATE_CACHE_SIZE):
+        self.centroid_threshold = centroid_threshold
+        self.centroid_sample = centroid_sample
+        # (user_id, knowledge base generation) -> document count / centroid; a new generation misses
+        self.document_counts = TTLLRUCache(cache_size)
+        self.centroids = TTLLRUCache(cache_size)
+
+        # Counters
+        self.decisions = 0
+        self.skipped: Counter = Counter()
+        self.similarity_sum = 0.0
+        self.similarity_checks = 0
+
+    async def document_count(self, user_id: str) -> int:
+        key = (user_id, query_cache.generation(user_id))
+        count = self.document_counts.get(key)
+        if count is None:
+            count = await asyncio.to_thread(document_store.count, user_id)
+            self.document_counts.set(key, count)
+        return count
+
+    async def centroid_similarity(self, question: str, user_id: str) -> Optional[float]:
+        key = (user_id, query_cache.generation(user_id))
+        centroid = self.centroids.get(key)
+        if centroid is None:
+            centroid = await asyncio.to_thread(user_corpus_centroid, user_id, self.centroid_sample)
+            if centroid is None:
+                return None
+            self.centroids.set(key, centroid)
+        query = np.asarray(await asyncio.to_thread(query_cache.embed_query, question), dtype=np.float32)
+        return float(centroid @ query / (np.linalg.norm(query) or 1.0))
+
+    async def decide(self, question: str, user_id: str) -> Tuple[bool, str]:
+        """Return (need_rag, reason)."""
+        self.decisions += 1
+        reason = heuristic_skip(question)
+        if reason is None:
+            try:
+                if await self.document_count(user_id) == 0:
+                    reason = "no_documents"
+            except Exception as e:
+                # Can't tell whether the user has documents; retrieval decides
+                print(f"[RAG GATE] Document count failed: {str(e)}")
+        if reason is None and self.centroid_threshold > 0:
+            try:
+                similarity = await self.centroid_similarity(question, user_id)
+            except Exception as e:
+                # Can't judge relevance; retrieval decides
+                print(f"[RAG GATE] Centroid check failed: {str(e)}")
+                similarity = None
+            if similarity is not None:
+                self.similarity_sum += similarity
+                self.similarity_checks += 1
+                if similarity < self.centroid_threshold:
+                    reason = "off_topic"
+
+        if reason is None:
+            return True, "retrieve"
+        self.skipped[reason] += 1
+        return False, reason
+
+    def stats(self) -> Dict[str, Any]:
+        skipped = sum(self.skipped.values())
+        return {
+            "enabled": RAG_GATING_ENABLED,
+            "centroid_threshold": self.centroid_threshold,
+            "decisions": self.decisions,
+            "skipped": skipped,
+            "skip_rate": skipped / self.decisions if self.decisions else None,
+            "skipped_by_reason": dict(self.skipped),
+            # Helps tune RAG_CENTROID_THRESHOLD against the questions users actually ask
+            "avg_centroid_similarity": (self.similarity_sum / self.similarity_checks
+                                        if self.similarity_checks else None),
+            "document_counts": self.document_counts.stats(),
+            "centroids": self.centroids.stats(),
+        }
+
+
+rag_gate = RagGate()
@@ -4,6 +4,7 @@ from langchain_core.documents import Document
 from langchain_core.messages import HumanMessage
 from pydantic import BaseModel
 
+from .rag_gate import RAG_GATING_ENABLED, rag_gate
 from .state import AgentState
 from ..knowledge.vectordb import make_retriever
 
@@ -43,7 +44,15 @@ def format_docs(docs: List[Document]) -> str:
 
 async def should_use_rag(state, config):
     """Determine if RAG should be used for the current query."""
-    use_rag = config.get("configurable", {}).get("use_rag", True)
+    configurable = config.get("configurable", {})
+    use_rag = configurable.get("use_rag", True)
+
+    if use_rag and RAG_GATING_ENABLED:
+        # Skip retrieval when cheap local checks say it can't help the last question
+        messages = state.get("messages", [])
+        question = get_message_text(messages[-1]) if messages and isinstance(messages[-1], HumanMessage) else ""
+        use_rag, reason = await rag_gate.decide(question, configurable.get("user_id", "default_user"))
+        print(f"[RAG GATE] need_rag={use_rag} ({reason})")
 
     # Return a state update with an empty list for queries to ensure we update a valid state key
     return {
@@ -1,4 +1,4 @@
-from typing import Annotated, List, Optional
+from typing import Annotated, Any, Dict, List, Optional
 
 from langchain_core.documents import Document
 from langgraph.graph.message import add_messages
@@ -14,6 +14,8 @@ class AgentState(TypedDict):
     queries: Optional[List[str]]
     # Store retrieved documents for more advanced processing
     retrieved_docs: Optional[List[Document]]
+    # Token accounting of the last model call (see context.assemble_context)
+    context_stats: Optional[Dict[str, Any]]
 
 
 class InputState(TypedDict):
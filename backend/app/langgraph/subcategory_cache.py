@@ -0,0 +1,143 @@
+"""
+Per-user cache of spending subcategories with stale-while-revalidate.
+
+A user's subcategory list rarely changes, but every expense entry used to
+fetch and reformat it. Entries are fresh for SUBCATEGORY_CACHE_TTL seconds.
+After that they are still served, immediately, for up to
+SUBCATEGORY_CACHE_STALE_TTL seconds while one background refresh replaces
+them. Concurrent misses for a user share a single fetch. The cache is
+bounded by SUBCATEGORY_CACHE_SIZE users (LRU). invalidate() drops a user
+or everything, e.g. when the spending model changes upstream.
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from ..cache import TTLLRUCache
+
+SUBCATEGORY_CACHE_SIZE = int(os.environ.get("SUBCATEGORY_CACHE_SIZE", "1000"))
+SUBCATEGORY_CACHE_TTL = float(os.environ.get("SUBCATEGORY_CACHE_TTL", "300"))
+SUBCATEGORY_CACHE_STALE_TTL = float(os.environ.get("SUBCATEGORY_CACHE_STALE_TTL", "3600"))
+
+
+class StaleWhileRevalidateCache:
+    """Async cache that serves entries past `fresh_ttl` while refreshing them in the background.
+
+    `fetch(key)` loads a value. Entries older than `stale_ttl` are dropped
+    and the next get() waits for a fetch again. A failed background refresh
+    keeps the stale entry; a failed fetch on a miss raises to the caller.
+    """
+
+    def __init__(
+            self,
+            fetch: Callable[[Hashable], Awaitable[Any]],
+            max_entries: int = SUBCATEGORY_CACHE_SIZE,
+            fresh_ttl: float = SUBCATEGORY_CACHE_TTL,
+            stale_ttl: float = SUBCATEGORY_CACHE_STALE_TTL,
+            clock: Callable[[], float] = time.monotonic,
+    ):
+        self.fetch = fetch
+        self.fresh_ttl = fresh_ttl
+        self.clock = clock
+        # value: (fetched value, fetched_at)
+        self.entries = TTLLRUCache(max_entries, ttl=max(fresh_ttl, stale_ttl), clock=clock)
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        # Bumped by invalidate() so fetches started earlier don't store their result: per key for
+        # invalidate(key), globally for invalidate(); only explicitly invalidated keys get an entry
+        self._generation = 0
+        self._key_generations: Dict[Hashable, int] = {}
+
+        # Counters
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.invalidations = 0
+
+    async def get(self, key: Hashable) -> Any:
+        entry = self.entries.get(key)
+        if entry is not None:
+            value, fetched_at = entry
+            if self.clock() - fetched_at < self.fresh_ttl:
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+                self._load(key, background=True)
+            return value
+
+        self.misses += 1
+        # Shielded: a cancelled caller must not cancel the fetch other callers are waiting on
+        return await asyncio.shield(self._load(key))
+
+    def _load(self, key: Hashable, background: bool = False) -> asyncio.Task:
+        """Start (or join) the fetch of `key`; the task stores the result when it completes."""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fetch_and_store(key, background))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        return task
+
+    def _finished(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Marks a background refresh's error as retrieved; it was already counted and logged
+            task.exception()
+
+    async def _fetch_and_store(self, key: Hashable, background: bool) -> Any:
+        started_at, generation = self.clock(), self._generations(key)
+        try:
+            value = await self.fetch(key)
+        except Exception as e:
+            if background:
+                self.refresh_errors += 1
+                print(f"[SUBCATEGORY CACHE] Background refresh failed for {key}: {str(e)}")
+            raise
+        if background:
+            self.refreshes += 1
+        if generation == self._generations(key):
+            self.entries.set(key, (value, started_at))
+        return value
+
+    def _generations(self, key: Hashable) -> Tuple[int, int]:
+        return self._generation, self._key_generations.get(key, 0)
+
+    def invalidate(self, key: Optional[Hashable] = None) -> int:
+        """Drop one key, or every entry when `key` is None; returns how many entries were dropped."""
+        if key is None:
+            dropped = len(self.entries)
+            self.entries.clear()
+        else:
+            dropped = 0 if self.entries.pop(key) is None else 1
+        # Fetches already running finish for their callers, but the next lookup starts a new one
+        self._inflight = {k: task for k, task in self._inflight.items() if key is not None and k != key}
+        if key is None:
+            self._generation += 1
+            # The global bump already outdates every earlier fetch
+            self._key_generations.clear()
+        else:
+            self._key_generations[key] = self._key_generations.get(key, 0) + 1
+        self.invalidations += dropped
+        return dropped
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "max_entries": self.entries.max_entries,
+            "fresh_ttl": self.fresh_ttl,
+            "stale_ttl": self.entries.ttl,
+            "lookups": lookups,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.stale_hits) / lookups if lookups else None,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "invalidations": self.invalidations,
+            "evictions": self.entries.evictions,
+        }
@@ -1,7 +1,14 @@
+import os
+from typing import Any, Dict, List, Optional
+
 from langchain_core.tools import tool
-import requests
-import json
-from typing import Optional
+
+from ..http_client import ToolHTTPError, tool_http
+from .subcategory_cache import StaleWhileRevalidateCache
+
+# Spending-model API the expense tools read from; point it at a local stub for testing
+SPENDING_API_URL = os.environ.get("SPENDING_API_URL", "https://easymoney.anttravel.online")
+SPENDING_API_SECRET = os.environ.get("SPENDING_API_SECRET") or "thisIsSerectKeyPythonService"
 
 @tool(return_direct=True)
 def conversation_history_summary():
@@ -9,67 +16,73 @@ def conversation_history_summary():
     print("\n[TOOLS] conversation_history_summary called")
     return "I can access our complete conversation history because I'm using the MemorySaver checkpointer. This allows me to maintain context across multiple exchanges in this conversation thread."
 
-def get_user_subcategories(user_id):
+async def fetch_user_subcategories(user_id: str) -> List[Dict[str, Any]]:
+    """Fetch the raw subcategory list of a user from the spending-model API; raises ToolHTTPError."""
+    url = f"{SPENDING_API_URL}/api/v1/user-spending-models/current/webhook/sub-categories"
+    print(f"[TOOLS] Making API request to: {url}?userId={user_id}")
+    data = await tool_http.get_json(url, params={"userId": user_id}, headers={"X-Webhook-Secret": SPENDING_API_SECRET})
+    subcategories = data.get("data", [])
+    print(f"[TOOLS] Retrieved {len(subcategories)} subcategories")
+    return subcategories
+
+
+async def load_subcategories(user_id: str) -> List[Dict[str, Any]]:
+    """Fetch a user's subcategories and format them for the LLM to better understand and select from."""
+    subcategories = await fetch_user_subcategories(user_id)
+    formatted_subcategories = []
+    for sc in subcategories:
+        formatted_subcategories.append({
+            "name": sc.get("name"),
+            "description": sc.get("description"),
+            "category": sc.get("categoryName"),
+            "code": sc.get("code")
+        })
+    return formatted_subcategories
+
+
+# Formatted subcategories per user, served stale while a background refresh runs
+subcategory_cache = StaleWhileRevalidateCache(load_subcategories)
+
+
+async def get_user_subcategories(user_id):
     """Fetch subcategories for a given user ID from the API."""
     print(f"\n[TOOLS] get_user_subcategories called for user: {user_id}")
-    headers = {"X-Webhook-Secret": "thisIsSerectKeyPythonService"}
-    url = f"https://easymoney.anttravel.online/api/v1/user-spending-models/current/webhook/sub-categories?userId={user_id}"
-    print(f"[TOOLS] Making API request to: {url}")
-    response = requests.get(url, headers=headers)
-    if response.status_code == 200:
-        print(f"[TOOLS] API request successful, status code: {response.status_code}")
-        subcategories = response.json().get("data", [])
-        print(f"[TOOLS] Retrieved {len(subcategories)} subcategories")
-        formatted_subcategories = []
-        for sc in subcategories:
-            formatted_subcategories.append(f"""
-                                           Là một danh mục con nằm trong danh mục {sc.get("categoryName")}, danh mục này có tên là {sc.get("name")}, mã danh mục là {sc.get("code")}, mô tả là {sc.get("description")}.                                        
-                                           """)
-        return "\n".join(formatted_subcategories)
-    else:
-        print(f"[TOOLS] API request failed, status code: {response.status_code}")
+    try:
+        subcategories = await subcategory_cache.get(user_id)
+    except ToolHTTPError as e:
+        print(f"[TOOLS] API request failed: {str(e)}")
         return None
 
+    formatted_subcategories = []
+    for sc in subcategories:
+        formatted_subcategories.append(f"""
+                                       Là một danh mục con nằm trong danh mục {sc.get("category")}, danh mục này có tên là {sc.get("name")}, mã danh mục là {sc.get("code")}, mô tả là {sc.get("description")}.                                        
+                                       """)
+    return "\n".join(formatted_subcategories)
+
 @tool(return_direct=False)
-def user_input_expense():#(user_id: Optional[str] = None):
+async def user_input_expense():#(user_id: Optional[str] = None):
     """Xác định số tiền chi tiêu và mục đích chi tiêu sau đó phân loại vào danh mục chi tiêu dựa trên danh sách nhận được từ API."""
-    print(f"\n[TOOLS] user_input_expense called with user_id: {user_id}")
     # Fetch subcategories from the API
     user_id = "7F583FFD-4C32-44C8-6214-08DD3DDA7643"
+    print(f"\n[TOOLS] user_input_expense called with user_id: {user_id}")
     if user_id:
         try:
             print(f"[TOOLS] Fetching subcategories for user_id: {user_id}")
-            headers = {"X-Webhook-Secret": "thisIsSerectKeyPythonService"}
-            url = f"https://easymoney.anttravel.online/api/v1/user-spending-models/current/webhook/sub-categories?userId={user_id}"
-            print(f"[TOOLS] Making API request to: {url}")
-            response = requests.get(url, headers=headers)
-            
-            if response.status_code == 200:
-                subcategories = response.json().get("data", [])
-                print(f"[TOOLS] Retrieved {len(subcategories)} subcategories")
-                
-                # Format subcategories for the LLM to better understand and select from
-                formatted_subcategories = []
-                for sc in subcategories:
-                    formatted_subcategories.append({
-                        "name": sc.get("name"),
-                        "description": sc.get("description"),
-                        "category": sc.get("categoryName"),
-                        "code": sc.get("code")
-                    })
-                
-                print("[TOOLS] Successfully formatted subcategories for LLM")
-                return {
-                    "message": "Vui lòng cung cấp số tiền chi tiêu và mục đích chi tiêu. Tôi sẽ giúp phân loại vào danh mục phù hợp.",
-                    "subcategories": formatted_subcategories
-                }
-            else:
-                print(f"[TOOLS] API request failed, status code: {response.status_code}")
-                return "Tôi gặp sự cố khi truy xuất danh mục chi tiêu. Vui lòng thử lại sau."
+            formatted_subcategories = await subcategory_cache.get(user_id)
+
+            print(f"[TOOLS] Got {len(formatted_subcategories)} formatted subcategories for LLM")
+            return {
+                "message": "Vui lòng cung cấp số tiền chi tiêu và mục đích chi tiêu. Tôi sẽ giúp phân loại vào danh mục phù hợp.",
+                "subcategories": formatted_subcategories
+            }
+        except ToolHTTPError as e:
+            print(f"[TOOLS] API request failed: {str(e)}")
+            return "Tôi gặp sự cố khi truy xuất danh mục chi tiêu. Vui lòng thử lại sau."
         except Exception as e:
             print(f"[TOOLS] Error occurred: {str(e)}")
             return f"Lỗi khi truy cập danh mục chi tiêu: {str(e)}"
-    
+
     print("[TOOLS] No user_id provided")
     return "Vui lòng cung cấp số tiền chi tiêu và mục đích chi tiêu. Tôi sẽ giúp phân loại dựa trên các danh mục có sẵn."
 
@@ -1,18 +1,29 @@
 from typing import List, Literal, Union, Optional, Dict, Any
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class Conversation(BaseModel):
     conversation_id: str
+    user_id: Optional[str] = None
     title: Optional[str] = "New Conversation"
     created_at: str
     updated_at: str
+    message_count: int = 0
+    last_message_preview: Optional[str] = None
 
 
 class ConversationCreate(BaseModel):
     conversation_id: str
     title: Optional[str] = "New Conversation"
+    user_id: Optional[str] = None
+
+
+class ConversationListResponse(BaseModel):
+    conversations: List[Conversation]
+    # Pass as `before` to get the next (older) page
+    next_cursor: Optional[str] = None
+    has_more: bool = False
 
 
 class ConversationUpdate(BaseModel):
@@ -114,10 +125,21 @@ class FrontendToolCall(BaseModel):
     parameters: dict[str, Any]
 
 
+class RetrievalOptions(BaseModel):
+    """Per-request knowledge base retrieval settings; unset fields use the server defaults."""
+    mode: Optional[Literal["dense", "hybrid"]] = None
+    dense_weight: Optional[float] = Field(None, ge=0)
+    sparse_weight: Optional[float] = Field(None, ge=0)
+    diversify: Optional[bool] = None
+    mmr_lambda: Optional[float] = Field(None, ge=0, le=1)
+
+
 class ChatRequest(BaseModel):
     system: Optional[str] = ""
     tools: Optional[List[FrontendToolCall]] = []
     messages: List[LanguageModelV1Message]
+    user_id: Optional[str] = None
+    retrieval: Optional[RetrievalOptions] = None
 
 
 class AnyArgsSchema(BaseModel):
@@ -133,6 +155,7 @@ class StatusResponse(BaseModel):
 class HealthCheckResponse(BaseModel):
     status: str
     mongodb: bool
+    mongodb_stats: Optional[Dict[str, Any]] = None
 
 
 class ConversationHistoryResponse(BaseModel):
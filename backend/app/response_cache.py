@@ -0,0 +1,124 @@
+import hashlib
+import itertools
+import json
+import os
+import threading
+from typing import Any, Dict, Hashable, Optional, Sequence
+
+import numpy as np
+
+from .cache import TTLLRUCache
+
+RESPONSE_CACHE_ENABLED = os.environ.get("RESPONSE_CACHE_ENABLED", "false").lower() == "true"
+RESPONSE_CACHE_SIZE = int(os.environ.get("RESPONSE_CACHE_SIZE", "1000"))
+RESPONSE_CACHE_TTL = float(os.environ.get("RESPONSE_CACHE_TTL", "3600"))
+# Cosine similarity a new question needs to a cached one to reuse its answer
+RESPONSE_CACHE_THRESHOLD = float(os.environ.get("RESPONSE_CACHE_THRESHOLD", "0.95"))
+RESPONSE_CACHE_MAX_PER_SCOPE = int(os.environ.get("RESPONSE_CACHE_MAX_PER_SCOPE", "200"))
+
+
+def prompt_fingerprint(system: Optional[str], tools: Sequence[Any], **options) -> str:
+    """Hash of everything besides the question that shapes an answer: system prompt, tool set and options."""
+    return hashlib.sha256(json.dumps(
+        {"system": system or "", "tools": sorted(json.dumps(tool, sort_keys=True) for tool in tools), **options},
+        sort_keys=True, default=str,
+    ).encode()).hexdigest()
+
+
+class SemanticResponseCache:
+    """Cached answers to context-free questions, matched by embedding similarity.
+
+    Entries are grouped into scopes - the tenant plus a fingerprint of the
+    system prompt, tool set and anything else that changes the answer - and a
+    question is only compared with the questions of its own scope. A lookup
+    hits when the best cosine similarity reaches `threshold`. Entries live in
+    a TTLLRUCache bounded by `max_entries` overall and expire after `ttl`;
+    each scope also keeps at most `max_entries_per_scope`, dropping its oldest.
+    """
+
+    def __init__(
+            self,
+            max_entries: int = RESPONSE_CACHE_SIZE,
+            ttl: Optional[float] = RESPONSE_CACHE_TTL,
+            threshold: float = RESPONSE_CACHE_THRESHOLD,
+            max_entries_per_scope: int = RESPONSE_CACHE_MAX_PER_SCOPE,
+    ):
+        self.threshold = threshold
+        self.max_entries_per_scope = max(1, max_entries_per_scope)
+        self.entries = TTLLRUCache(max_entries, ttl, on_evict=self._forget)
+        # scope -> {entry id: unit question vector}, in insertion order
+        self._scopes: Dict[Hashable, Dict[int, np.ndarray]] = {}
+        self._ids = itertools.count()
+        # Re-entrant: entry expiry during a lookup calls _forget on the same thread
+        self._lock = threading.RLock()
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    @staticmethod
+    def _unit(vector: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, scope: Hashable, vector: Sequence[float]) -> Optional[str]:
+        """Return the cached answer of the most similar question in the scope, if similar enough."""
+        with self._lock:
+            bucket = self._scopes.get(scope)
+            if bucket:
+                ids = list(bucket)
+                similarities = np.stack([bucket[entry_id] for entry_id in ids]) @ self._unit(vector)
+                for index in np.argsort(-similarities):
+                    if similarities[index] < self.threshold:
+                        break
+                    entry = self.entries.get(ids[index])
+                    if entry is not None:
+                        self.hits += 1
+                        return entry[1]
+            self.misses += 1
+            return None
+
+    def store(self, scope: Hashable, vector: Sequence[float], response: str):
+        with self._lock:
+            bucket = self._scopes.setdefault(scope, {})
+            while len(bucket) >= self.max_entries_per_scope:
+                oldest = next(iter(bucket))
+                del bucket[oldest]
+                self.entries.pop(oldest)
+            entry_id = next(self._ids)
+            bucket[entry_id] = self._unit(vector)
+            self.entries.set(entry_id, (scope, response))
+            self.stores += 1
+
+    def _forget(self, entry_id: int, entry: tuple):
+        scope = entry[0]
+        with self._lock:
+            bucket = self._scopes.get(scope)
+            if bucket is not None:
+                bucket.pop(entry_id, None)
+                if not bucket:
+                    del self._scopes[scope]
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        entries = self.entries.stats()
+        return {
+            "enabled": RESPONSE_CACHE_ENABLED,
+            "entries": entries["entries"],
+            "max_entries": entries["max_entries"],
+            "ttl": entries["ttl"],
+            "threshold": self.threshold,
+            "scopes": len(self._scopes),
+            "lookups": lookups,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else None,
+            "stores": self.stores,
+            "evictions": entries["evictions"],
+            "expirations": entries["expirations"],
+        }
+
+
+response_cache = SemanticResponseCache()
@@ -1,16 +1,28 @@
+import asyncio
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import List
+from typing import Optional
 
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
 
 from .add_langgraph_route import add_langgraph_route
-from .database.mongo_client import mongo_db
+from .database.async_mongo_client import async_mongo_db
+from .database.constants import CONVERSATIONS_MAX_PAGE_SIZE, CONVERSATIONS_PAGE_SIZE, DEFAULT_USER_ID
+from .database.pagination import decode_cursor, encode_cursor
+from .database.schema import bootstrap_schema
+from .http_client import tool_http
+from .knowledge.jobs import ingestion_queue
+from .knowledge.parsing import shutdown_parser_executor
 from .knowledge.routes import router as knowledge_router
-from .langgraph.agent import assistant_ui_graph
+from .knowledge.vectordb import rebuild_document_metadata, rebuild_sparse_index
+from .langgraph.agent import assistant_ui_graph, tool_cache_stats
+from .langgraph.rag_gate import rag_gate
+from .langgraph.tools import subcategory_cache
 from .models import (
     Conversation,
     ConversationCreate,
+    ConversationListResponse,
     ConversationUpdate,
     StatusResponse,
     HealthCheckResponse
@@ -18,7 +30,35 @@ from .models import (
 
 print("\n[SERVER] Initializing FastAPI application")
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start MongoDB and the ingestion workers on startup; drain and close them on shutdown."""
+    await async_mongo_db.connect()
+    async_mongo_db.start_background_tasks()
+    if async_mongo_db.health_check():
+        print("[SERVER] MongoDB connection successful")
+        try:
+            await bootstrap_schema(async_mongo_db.db)
+        except Exception as e:
+            print(f"[SERVER] MongoDB schema bootstrap failed: {str(e)}")
+    else:
+        print("[SERVER] WARNING: MongoDB connection failed, falling back to in-memory storage")
+
+    await asyncio.to_thread(rebuild_document_metadata)
+    await asyncio.to_thread(rebuild_sparse_index)
+    await ingestion_queue.start()
+
+    yield
+
+    await ingestion_queue.stop()
+    shutdown_parser_executor()
+    await tool_http.aclose()
+    await async_mongo_db.close()
+    print("[SERVER] MongoDB connection closed")
+
+
+app = FastAPI(lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -29,11 +69,6 @@ app.add_middleware(
 
 print("[SERVER] Added CORS middleware")
 
-if mongo_db.health_check():
-    print("[SERVER] MongoDB connection successful")
-else:
-    print("[SERVER] WARNING: MongoDB connection failed, falling back to in-memory storage")
-
 conversations = {}
 
 print("[SERVER] Adding LangGraph routes")
@@ -44,8 +79,8 @@ app.include_router(knowledge_router, prefix="/api")
 
 
 async def get_conversation(conversation_id: str):
-    if mongo_db.health_check():
-        conversation = mongo_db.get_conversation(conversation_id)
+    if async_mongo_db.health_check():
+        conversation = await async_mongo_db.get_conversation(conversation_id)
         if not conversation:
             raise HTTPException(status_code=404, detail="Conversation not found")
         return Conversation(**conversation)
@@ -60,17 +95,18 @@ async def create_conversation(conversation_data: ConversationCreate):
     """Create a new conversation thread using the client-provided ID"""
     print(f"\n[SERVER] Creating new conversation with ID: {conversation_data.conversation_id}")
 
-    if mongo_db.health_check():
-        existing = mongo_db.get_conversation(conversation_data.conversation_id)
+    if async_mongo_db.health_check():
+        existing = await async_mongo_db.get_conversation(conversation_data.conversation_id)
         if existing:
             raise HTTPException(
                 status_code=400,
                 detail=f"Conversation with ID {conversation_data.conversation_id} already exists"
             )
 
-        conversation = mongo_db.create_conversation(
+        conversation = await async_mongo_db.create_conversation(
             conversation_id=conversation_data.conversation_id,
-            title=conversation_data.title
+            title=conversation_data.title,
+            user_id=conversation_data.user_id or DEFAULT_USER_ID
         )
         if conversation:
             return Conversation(**conversation)
@@ -84,6 +120,7 @@ async def create_conversation(conversation_data: ConversationCreate):
     now = datetime.now().isoformat()
     conversation = Conversation(
         conversation_id=conversation_data.conversation_id,
+        user_id=conversation_data.user_id or DEFAULT_USER_ID,
         title=conversation_data.title,
         created_at=now,
         updated_at=now
@@ -94,14 +131,36 @@ async def create_conversation(conversation_data: ConversationCreate):
     return conversation
 
 
-@app.get("/api/conversations", response_model=List[Conversation])
-async def list_conversations():
-    """List all conversation threads"""
-    if mongo_db.health_check():
-        mongo_conversations = mongo_db.list_conversations()
-        return [Conversation(**conv) for conv in mongo_conversations]
-
-    return list(conversations.values())
+@app.get("/api/conversations", response_model=ConversationListResponse)
+async def list_conversations(
+        user_id: str = DEFAULT_USER_ID,
+        limit: int = Query(CONVERSATIONS_PAGE_SIZE, ge=1, le=CONVERSATIONS_MAX_PAGE_SIZE),
+        before: Optional[str] = None,
+):
+    """List a page of the user's conversation threads, most recently updated first"""
+    try:
+        if async_mongo_db.health_check():
+            return await async_mongo_db.list_conversations(user_id, limit=limit, before=before)
+
+        # In-memory fallback pages the same way, on (updated_at, conversation_id)
+        owned = sorted(
+            (conv for conv in conversations.values() if conv.user_id == user_id),
+            key=lambda conv: (conv.updated_at, conv.conversation_id),
+            reverse=True,
+        )
+        if before:
+            position = decode_cursor(before)
+            owned = [conv for conv in owned if (conv.updated_at, conv.conversation_id) < position]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    page = owned[:limit]
+    has_more = len(owned) > limit
+    return ConversationListResponse(
+        conversations=page,
+        next_cursor=encode_cursor(page[-1].updated_at, page[-1].conversation_id) if has_more else None,
+        has_more=has_more,
+    )
 
 
 @app.get("/api/conversations/{conversation_id}", response_model=Conversation)
@@ -119,8 +178,8 @@ async def update_conversation(
     if conversation_data.title is None:
         return conversation
 
-    if mongo_db.health_check():
-        updated_conversation = mongo_db.update_conversation(
+    if async_mongo_db.health_check():
+        updated_conversation = await async_mongo_db.update_conversation(
             conversation_id=conversation.conversation_id,
             updates={"title": conversation_data.title}
         )
@@ -137,13 +196,17 @@ async def update_conversation(
 @app.delete("/api/conversations/{conversation_id}", response_model=StatusResponse)
 async def delete_conversation(conversation: Conversation = Depends(get_conversation)):
     """Delete a conversation"""
-    if mongo_db.health_check():
-        success = mongo_db.delete_conversation(conversation.conversation_id)
+    if async_mongo_db.health_check():
+        success = await async_mongo_db.delete_conversation(conversation.conversation_id)
         if not success:
             raise HTTPException(status_code=500, detail="Failed to delete conversation")
     else:
         del conversations[conversation.conversation_id]
 
+    # The checkpointer is the source of truth for agent state; a re-created ID must start empty
+    if assistant_ui_graph.checkpointer is not None:
+        await assistant_ui_graph.checkpointer.adelete_thread(conversation.conversation_id)
+
     return StatusResponse(
         status="success",
         message=f"Conversation {conversation.conversation_id} deleted"
@@ -155,10 +218,43 @@ async def health_check():
     """API health check endpoint"""
     return HealthCheckResponse(
         status="healthy",
-        mongodb=mongo_db.health_check()
+        mongodb=async_mongo_db.health_check(),
+        mongodb_stats={**async_mongo_db.health.stats(), "writes": async_mongo_db.writer.stats()}
     )
 
 
+@app.get("/api/tool-cache/stats")
+async def get_tool_cache_stats():
+    """Get hit rates of the bound-model and ToolNode caches"""
+    return tool_cache_stats()
+
+
+@app.get("/api/tool-http/stats")
+async def get_tool_http_stats():
+    """Get request, retry and circuit-breaker counters of the tool HTTP client"""
+    return tool_http.stats()
+
+
+@app.get("/api/subcategory-cache/stats")
+async def get_subcategory_cache_stats():
+    """Get hit/miss and refresh counters of the per-user subcategory cache"""
+    return subcategory_cache.stats()
+
+
+@app.delete("/api/subcategory-cache", response_model=StatusResponse)
+async def invalidate_subcategory_cache(user_id: Optional[str] = None):
+    """Drop a user's cached subcategories, or every user's when no user_id is given"""
+    dropped = subcategory_cache.invalidate(user_id)
+    target = f"user {user_id}" if user_id else "all users"
+    return StatusResponse(status="success", message=f"Invalidated {dropped} cached subcategory lists for {target}")
+
+
+@app.get("/api/rag-gate/stats")
+async def get_rag_gate_stats():
+    """Get how often retrieval was skipped, by reason, and the average question-to-corpus similarity"""
+    return rag_gate.stats()
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -0,0 +1,100 @@
+"""
+Soak test of the checkpoint savers: run a small message graph over many
+threads and track process memory and storage size as threads accumulate.
+
+Each thread gets `--turns` user turns answered by a node that echoes a
+few hundred characters, like a short chat. MemorySaver keeps every
+checkpoint of every thread in the process; the SQLite and Mongo savers keep
+the latest CHECKPOINT_KEEP_LATEST per thread outside it.
+
+Usage:
+    python -m benchmarks.bench_checkpointer --backend sqlite --threads 100000
+    python -m benchmarks.bench_checkpointer --backend mongo --mongo-uri mongodb://localhost:27017/bench
+"""
+
+import argparse
+import asyncio
+import os
+import resource
+import tempfile
+import time
+import warnings
+from typing import Annotated, TypedDict
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import END, StateGraph
+from langgraph.graph.message import add_messages
+
+from app.langgraph.checkpointer import MongoCheckpointSaver, SQLiteCheckpointSaver
+
+warnings.filterwarnings("ignore")
+
+
+class ChatState(TypedDict):
+    messages: Annotated[list, add_messages]
+
+
+async def answer(state: ChatState):
+    question = state["messages"][-1].content
+    return {"messages": [AIMessage(content=f"Here is an answer to '{question}'. " + "Budget tips. " * 30)]}
+
+
+def rss_mb() -> float:
+    """Current resident set size; falls back to the peak where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def main(backend: str, threads: int, turns: int, report_every: int, mongo_uri: str):
+    directory = tempfile.mkdtemp()
+    client = None
+    if backend == "memory":
+        saver = MemorySaver()
+    elif backend == "sqlite":
+        saver = SQLiteCheckpointSaver(os.path.join(directory, "checkpoints.sqlite"))
+    else:
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        client = AsyncIOMotorClient(mongo_uri)
+        db = client.get_default_database("checkpoint_bench")
+        await db.checkpoints.drop()
+        await db.checkpoint_writes.drop()
+        saver = MongoCheckpointSaver(lambda: db)
+
+    workflow = StateGraph(ChatState)
+    workflow.add_node("answer", answer)
+    workflow.set_entry_point("answer")
+    workflow.add_edge("answer", END)
+    graph = workflow.compile(checkpointer=saver)
+
+    print(f"backend={backend}, {threads} threads x {turns} turns")
+    print(f"{'threads':>8} {'rss MB':>8} {'store MB':>9} {'turns/s':>8}")
+    start = time.perf_counter()
+    for index in range(1, threads + 1):
+        config = {"configurable": {"thread_id": f"thread-{index}"}}
+        for turn in range(turns):
+            await graph.ainvoke({"messages": [HumanMessage(content=f"question {turn} of thread {index}")]}, config)
+        if index % report_every == 0 or index == threads:
+            elapsed = time.perf_counter() - start
+            store_mb = sum(
+                os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory)
+            ) / 2 ** 20 if backend == "sqlite" else 0.0
+            print(f"{index:>8} {rss_mb():>8.1f} {store_mb:>9.1f} {index * turns / elapsed:>8.0f}")
+
+    if client is not None:
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=["memory", "sqlite", "mongo"], default="sqlite")
+    parser.add_argument("--threads", type=int, default=100000)
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--report-every", type=int, default=10000)
+    parser.add_argument("--mongo-uri", default="mongodb://localhost:27017/checkpoint_bench")
+    args = parser.parse_args()
+    asyncio.run(main(args.backend, args.threads, args.turns, args.report_every, args.mongo_uri))
@@ -0,0 +1,123 @@
+"""
+Benchmark the sidebar conversation listing at scale: the old unscoped
+"load every conversation sorted by updated_at" query against per-user keyset
+pages served from the (user_id, updated_at, conversation_id) index.
+
+Seeds `--conversations` conversations spread over `--users` users into a
+scratch database (dropped first), then times the first page for random
+users and a walk through every page of one user. Requires a reachable
+MongoDB.
+
+Usage:
+    python -m benchmarks.bench_conversation_listing --conversations 1000000 --users 10000
+    python -m benchmarks.bench_conversation_listing --mongo-uri mongodb://localhost:27017/listing_bench
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING
+
+from app.database.async_mongo_client import AsyncMongoDBClient
+from app.database.constants import CONVERSATIONS_COLLECTION
+from app.models import Conversation
+
+SEED_BATCH = 10000
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def seed(db, conversations: int, users: int):
+    collection = db[CONVERSATIONS_COLLECTION]
+    await collection.drop()
+    start_time = datetime(2024, 1, 1)
+    rng = random.Random(0)
+    start = time.perf_counter()
+    for offset in range(0, conversations, SEED_BATCH):
+        batch = []
+        for index in range(offset, min(offset + SEED_BATCH, conversations)):
+            updated = (start_time + timedelta(seconds=rng.randrange(365 * 86400))).isoformat()
+            batch.append({
+                "conversation_id": f"conv-{index:08d}",
+                "user_id": f"user-{rng.randrange(users):06d}",
+                "title": f"Conversation {index}",
+                "created_at": updated,
+                "updated_at": updated,
+                "message_count": rng.randrange(1, 400),
+                "last_message_preview": "How much did I spend on groceries last month?",
+            })
+        await collection.insert_many(batch, ordered=False)
+    await collection.create_index(
+        [("user_id", ASCENDING), ("updated_at", DESCENDING), ("conversation_id", DESCENDING)]
+    )
+    print(f"Seeded {conversations} conversations for {users} users in {time.perf_counter() - start:.1f}s")
+
+
+async def main(mongo_uri: str, conversations: int, users: int, queries: int, limit: int, skip_legacy: bool):
+    client = AsyncMongoDBClient()
+    client.client = AsyncIOMotorClient(mongo_uri, serverSelectionTimeoutMS=5000)
+    client.db = client.client.get_default_database("listing_bench")
+    await seed(client.db, conversations, users)
+
+    if not skip_legacy:
+        start = time.perf_counter()
+        try:
+            cursor = client.db[CONVERSATIONS_COLLECTION].find({}, {"_id": 0}).sort("updated_at", -1)
+            rows = [Conversation(**row) for row in await cursor.to_list(length=None)]
+            print(f"legacy unscoped listing: {len(rows)} rows in {(time.perf_counter() - start) * 1000:.0f} ms")
+        except Exception as e:
+            print(f"legacy unscoped listing failed after {(time.perf_counter() - start) * 1000:.0f} ms: {e}")
+
+    rng = random.Random(1)
+    latencies = []
+    for _ in range(queries):
+        user_id = f"user-{rng.randrange(users):06d}"
+        start = time.perf_counter()
+        page = await client.list_conversations(user_id, limit=limit)
+        [Conversation(**row) for row in page["conversations"]]
+        latencies.append(time.perf_counter() - start)
+    print(f"first page ({limit}/user): p50 {statistics.median(latencies) * 1000:.2f} ms, "
+          f"p99 {percentile(latencies, 99) * 1000:.2f} ms over {queries} users")
+
+    user_id, cursor, pages, rows = "user-000000", None, 0, 0
+    latencies = []
+    while True:
+        start = time.perf_counter()
+        page = await client.list_conversations(user_id, limit=limit, before=cursor)
+        latencies.append(time.perf_counter() - start)
+        pages += 1
+        rows += len(page["conversations"])
+        cursor = page["next_cursor"]
+        if not page["has_more"]:
+            break
+    print(f"walked {pages} pages ({rows} conversations) of {user_id}: "
+          f"p50 {statistics.median(latencies) * 1000:.2f} ms, max {max(latencies) * 1000:.2f} ms per page")
+
+    explain = await client.db[CONVERSATIONS_COLLECTION].find({"user_id": user_id}).sort(
+        [("updated_at", -1), ("conversation_id", -1)]
+    ).limit(limit).explain()
+    stats = explain.get("executionStats", {})
+    print(f"explain: {stats.get('totalDocsExamined')} docs examined for {stats.get('nReturned')} returned")
+
+    client.client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongo-uri", default="mongodb://localhost:27017/listing_bench")
+    parser.add_argument("--conversations", type=int, default=1000000)
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--skip-legacy", action="store_true", help="skip the full unscoped listing")
+    args = parser.parse_args()
+    asyncio.run(main(args.mongo_uri, args.conversations, args.users, args.queries, args.limit, args.skip_legacy))
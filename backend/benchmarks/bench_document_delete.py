@@ -0,0 +1,96 @@
+"""
+Compare document deletion strategies on a Qdrant collection.
+
+"scroll+ids" is the previous delete_document behaviour: scroll up to 10,000
+point ids for the document, then delete those ids. "filter" is the
+filter-selector delete used now, which removes every matching point on the
+server in one call. Each run deletes one document from a collection that
+also holds chunks of other documents, and reports how many of the
+document's chunks were left behind.
+
+Runs against an in-memory collection by default; pass --url to use a
+Qdrant server.
+
+Usage:
+    python -m benchmarks.bench_document_delete --sizes 100 10000 100000
+"""
+
+import argparse
+import random
+import time
+import uuid
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import Distance, PointIdsList, PointStruct, VectorParams
+
+from app.knowledge.qdrant_utils import delete_by_metadata, metadata_filter
+
+COLLECTION = "bench_delete"
+UPSERT_BATCH = 1000
+LEGACY_SCROLL_LIMIT = 10000
+
+
+def fill_collection(client: QdrantClient, dimensions: int, document_id: str, chunks: int, other_chunks: int):
+    if client.collection_exists(COLLECTION):
+        client.delete_collection(COLLECTION)
+    client.create_collection(COLLECTION, vectors_config=VectorParams(size=dimensions, distance=Distance.COSINE))
+
+    owners = [document_id] * chunks + [f"other-{i % 50}" for i in range(other_chunks)]
+    for start in range(0, len(owners), UPSERT_BATCH):
+        client.upsert(
+            collection_name=COLLECTION,
+            points=[
+                PointStruct(
+                    id=str(uuid.uuid4()),
+                    vector=[random.random() for _ in range(dimensions)],
+                    payload={"page_content": "", "metadata": {"document_id": owner, "user_id": "bench"}},
+                )
+                for owner in owners[start:start + UPSERT_BATCH]
+            ],
+        )
+
+
+def remaining(client: QdrantClient, document_id: str) -> int:
+    return client.count(COLLECTION, count_filter=metadata_filter("document_id", document_id), exact=True).count
+
+
+def delete_scroll_ids(client: QdrantClient, document_id: str):
+    points, _ = client.scroll(
+        collection_name=COLLECTION,
+        scroll_filter=metadata_filter("document_id", document_id),
+        limit=LEGACY_SCROLL_LIMIT,
+        with_payload=False,
+        with_vectors=False,
+    )
+    client.delete(collection_name=COLLECTION, points_selector=PointIdsList(points=[point.id for point in points]))
+
+
+def delete_filter(client: QdrantClient, document_id: str):
+    delete_by_metadata(client, COLLECTION, "document_id", document_id)
+
+
+def main(sizes, other_chunks: int, dimensions: int, url: str):
+    client = QdrantClient(url=url) if url else QdrantClient(":memory:")
+    print(f"{other_chunks} chunks of other documents, {dimensions}-dim vectors, {'server ' + url if url else 'in-memory'}")
+    print(f"{'chunks':>8} {'strategy':>11} {'seconds':>9} {'left behind':>12}")
+
+    for size in sizes:
+        for name, strategy in (("scroll+ids", delete_scroll_ids), ("filter", delete_filter)):
+            document_id = str(uuid.uuid4())
+            fill_collection(client, dimensions, document_id, size, other_chunks)
+            start = time.perf_counter()
+            strategy(client, document_id)
+            elapsed = time.perf_counter() - start
+            print(f"{size:>8} {name:>11} {elapsed:>9.3f} {remaining(client, document_id):>12}")
+
+    client.delete_collection(COLLECTION)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10000, 100000])
+    parser.add_argument("--other-chunks", type=int, default=10000)
+    parser.add_argument("--dimensions", type=int, default=64)
+    parser.add_argument("--url", default=None, help="Qdrant server URL; in-memory when omitted")
+    args = parser.parse_args()
+    main(args.sizes, args.other_chunks, args.dimensions, args.url)
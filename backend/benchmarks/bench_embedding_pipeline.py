@@ -0,0 +1,94 @@
+"""
+Measure ingestion throughput of the batched embedding pipeline against a
+local fake embedding model and an in-memory Qdrant collection.
+
+The fake model sleeps for a fixed latency per request plus a per-chunk cost,
+which is how a remote embedding API behaves from the client's side. The
+sequential baseline embeds a batch, upserts it, then moves on (the previous
+vector_store.add_documents behaviour).
+
+Usage:
+    python -m benchmarks.bench_embedding_pipeline --chunks 2000 --latency-ms 80
+"""
+
+import argparse
+import time
+import uuid
+
+from langchain_core.embeddings import Embeddings
+from qdrant_client import QdrantClient
+from qdrant_client.models import Distance, VectorParams
+
+from app.knowledge.embedding_pipeline import EmbeddingPipeline, TokenBucket
+
+DIMENSIONS = 768
+COLLECTION = "bench"
+
+
+class FakeEmbeddings(Embeddings):
+    def __init__(self, latency_s: float, per_chunk_s: float):
+        self.latency_s = latency_s
+        self.per_chunk_s = per_chunk_s
+
+    def embed_documents(self, texts):
+        time.sleep(self.latency_s + self.per_chunk_s * len(texts))
+        return [[(hash(text) % 1000 + i) / 1000.0 for i in range(DIMENSIONS)] for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def fresh_collection(client: QdrantClient):
+    if client.collection_exists(COLLECTION):
+        client.delete_collection(COLLECTION)
+    client.create_collection(COLLECTION, vectors_config=VectorParams(size=DIMENSIONS, distance=Distance.COSINE))
+
+
+def main(chunks: int, batch_size: int, latency_ms: float, max_concurrency: int, rate_limit: float):
+    client = QdrantClient(":memory:")
+    encoder = FakeEmbeddings(latency_ms / 1000, 0.0002)
+    texts = [f"chunk {i} " + "lorem ipsum " * 80 for i in range(chunks)]
+    metadatas = [{"document_id": "bench", "chunk_index": i} for i in range(chunks)]
+    ids = [str(uuid.uuid4()) for _ in range(chunks)]
+
+    print(f"{chunks} chunks, batch={batch_size}, fake latency={latency_ms}ms/request, rate limit={rate_limit or 'none'}")
+    print(f"{'mode':>12} {'seconds':>9} {'chunks/s':>10} {'embed s':>9} {'upsert s':>9}")
+
+    fresh_collection(client)
+    start = time.perf_counter()
+    embed_s = upsert_s = 0.0
+    sequential = EmbeddingPipeline(encoder, client, COLLECTION, batch_size=batch_size, max_concurrency=1,
+                                   rate_limiter=TokenBucket(0, 1))
+    for offset in range(0, chunks, batch_size):
+        window = slice(offset, offset + batch_size)
+        t0 = time.perf_counter()
+        vectors = encoder.embed_documents(texts[window])
+        t1 = time.perf_counter()
+        sequential._upsert(texts[window], metadatas[window], ids[window], vectors)
+        embed_s += t1 - t0
+        upsert_s += time.perf_counter() - t1
+    elapsed = time.perf_counter() - start
+    print(f"{'sequential':>12} {elapsed:>9.2f} {chunks / elapsed:>10.0f} {embed_s:>9.2f} {upsert_s:>9.2f}")
+
+    for concurrency in range(1, max_concurrency + 1):
+        fresh_collection(client)
+        pipeline = EmbeddingPipeline(encoder, client, COLLECTION, batch_size=batch_size,
+                                     max_concurrency=concurrency,
+                                     rate_limiter=TokenBucket(rate_limit, concurrency))
+        start = time.perf_counter()
+        pipeline.run(texts, metadatas, ids)
+        elapsed = time.perf_counter() - start
+        assert client.count(COLLECTION).count == chunks
+        print(f"{f'pipeline x{concurrency}':>12} {elapsed:>9.2f} {chunks / elapsed:>10.0f} "
+              f"{pipeline.embed_seconds:>9.2f} {pipeline.upsert_seconds:>9.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--latency-ms", type=float, default=80)
+    parser.add_argument("--max-concurrency", type=int, default=4)
+    parser.add_argument("--rate-limit", type=float, default=0, help="requests/sec, 0 = unlimited")
+    args = parser.parse_args()
+    main(args.chunks, args.batch_size, args.latency_ms, args.max_concurrency, args.rate_limit)
@@ -0,0 +1,119 @@
+"""
+Measure tenant-filtered search latency before and after creating the
+payload indexes that the knowledge base creates at startup.
+
+Fills a collection with random vectors spread evenly over `--tenants`
+users and several documents per user, then runs filtered searches on
+metadata.user_id and filtered counts on metadata.document_id. Runs them
+once without payload indexes and again after ensure_payload_indexes.
+
+Payload indexes only exist on a Qdrant server, so pass --url for
+meaningful numbers (e.g. docker run -p 6333:6333 qdrant/qdrant). Without
+--url an in-memory collection is used; use a small --points there.
+
+Usage:
+    python -m benchmarks.bench_filtered_search --url http://localhost:6333 --points 1000000 --tenants 1000
+"""
+
+import argparse
+import random
+import statistics
+import time
+import uuid
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import CollectionStatus, Distance, PointStruct, VectorParams
+
+from app.knowledge.qdrant_utils import ensure_payload_indexes, metadata_filter
+
+COLLECTION = "bench_filtered_search"
+UPSERT_BATCH = 2000
+DOCUMENTS_PER_TENANT = 10
+
+
+def fill_collection(client: QdrantClient, points: int, tenants: int, dimensions: int):
+    if client.collection_exists(COLLECTION):
+        client.delete_collection(COLLECTION)
+    client.create_collection(COLLECTION, vectors_config=VectorParams(size=dimensions, distance=Distance.COSINE))
+
+    rng = np.random.default_rng(0)
+    for start in range(0, points, UPSERT_BATCH):
+        count = min(UPSERT_BATCH, points - start)
+        vectors = rng.random((count, dimensions), dtype=np.float32)
+        client.upsert(
+            collection_name=COLLECTION,
+            points=[
+                PointStruct(
+                    id=str(uuid.uuid4()),
+                    vector=vector.tolist(),
+                    payload={"page_content": "", "metadata": {
+                        "user_id": f"user-{index % tenants}",
+                        "document_id": f"doc-{index % tenants}-{(index // tenants) % DOCUMENTS_PER_TENANT}",
+                    }},
+                )
+                for index, vector in zip(range(start, start + count), vectors)
+            ],
+            wait=False,
+        )
+        if start // UPSERT_BATCH % 50 == 0:
+            print(f"  loaded {start + count}/{points} points")
+    wait_for_green(client)
+
+
+def wait_for_green(client: QdrantClient):
+    while client.get_collection(COLLECTION).status != CollectionStatus.GREEN:
+        time.sleep(0.5)
+
+
+def measure(client: QdrantClient, tenants: int, dimensions: int, queries: int):
+    rng = random.Random(1)
+    search_ms, count_ms = [], []
+    for _ in range(queries):
+        tenant = rng.randrange(tenants)
+        vector = [rng.random() for _ in range(dimensions)]
+
+        start = time.perf_counter()
+        client.query_points(COLLECTION, query=vector, limit=3,
+                            query_filter=metadata_filter("user_id", f"user-{tenant}"))
+        search_ms.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        client.count(COLLECTION, count_filter=metadata_filter("document_id", f"doc-{tenant}-0"), exact=True)
+        count_ms.append((time.perf_counter() - start) * 1000)
+    return search_ms, count_ms
+
+
+def summary(samples):
+    ordered = sorted(samples)
+    return statistics.median(ordered), ordered[int(len(ordered) * 0.95) - 1]
+
+
+def main(points: int, tenants: int, dimensions: int, queries: int, url: str):
+    client = QdrantClient(url=url, timeout=300) if url else QdrantClient(":memory:")
+    print(f"{points} points, {tenants} tenants, {dimensions}-dim vectors, {'server ' + url if url else 'in-memory'}")
+    fill_collection(client, points, tenants, dimensions)
+
+    print(f"{'indexes':>8} {'search p50 ms':>14} {'search p95 ms':>14} {'count p50 ms':>13} {'count p95 ms':>13}")
+    search_ms, count_ms = measure(client, tenants, dimensions, queries)
+    print(f"{'none':>8} {summary(search_ms)[0]:>14.2f} {summary(search_ms)[1]:>14.2f} "
+          f"{summary(count_ms)[0]:>13.2f} {summary(count_ms)[1]:>13.2f}")
+
+    ensure_payload_indexes(client, COLLECTION, ("user_id", "document_id"), tenant_field="user_id")
+    wait_for_green(client)
+    search_ms, count_ms = measure(client, tenants, dimensions, queries)
+    print(f"{'keyword':>8} {summary(search_ms)[0]:>14.2f} {summary(search_ms)[1]:>14.2f} "
+          f"{summary(count_ms)[0]:>13.2f} {summary(count_ms)[1]:>13.2f}")
+
+    client.delete_collection(COLLECTION)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=1_000_000)
+    parser.add_argument("--tenants", type=int, default=1000)
+    parser.add_argument("--dimensions", type=int, default=64)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--url", default=None, help="Qdrant server URL; in-memory when omitted")
+    args = parser.parse_args()
+    main(args.points, args.tenants, args.dimensions, args.queries, args.url)
@@ -0,0 +1,85 @@
+"""
+Measure the cost the lexical side adds to hybrid retrieval: BM25 search
+latency on the SQLite FTS5 index and reciprocal-rank fusion time, against
+the HYBRID_SPARSE_BUDGET_MS budget.
+
+Chunks are synthetic expense-style text with category codes and Vietnamese
+product names, spread over `--users` users.
+
+Usage:
+    python -m benchmarks.bench_hybrid_search --chunks 200000 --users 100
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from langchain_core.documents import Document
+
+from app.knowledge.retrieval import reciprocal_rank_fusion
+from app.knowledge.sparse_index import SparseIndex
+
+WORDS = ("cà phê sữa đá trà đào bánh mì phở bò cơm tấm tiền điện nước internet xăng xe grab taxi "
+         "groceries rent salary insurance gym lunch dinner coffee market shopping transfer").split()
+INSERT_BATCH = 5000
+
+
+def synthetic_chunk(rng: random.Random) -> str:
+    code = f"{rng.choice(['EXP', 'UTIL', 'FOOD', 'TRAN'])}-{rng.randrange(1000):03d}"
+    return f"{code} " + " ".join(rng.choice(WORDS) for _ in range(rng.randrange(40, 160)))
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    return statistics.median(ordered), ordered[int(len(ordered) * 0.95) - 1]
+
+
+def main(chunks: int, users: int, queries: int, candidates: int, budget_ms: float):
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as directory:
+        index = SparseIndex(os.path.join(directory, "sparse.sqlite"))
+        start = time.perf_counter()
+        for offset in range(0, chunks, INSERT_BATCH):
+            count = min(INSERT_BATCH, chunks - offset)
+            index.add(
+                [str(offset + i) for i in range(count)],
+                [synthetic_chunk(rng) for _ in range(count)],
+                [{"document_id": f"doc-{(offset + i) // 50}", "user_id": f"user-{(offset + i) % users}"}
+                 for i in range(count)],
+            )
+        print(f"Indexed {chunks} chunks for {users} users in {time.perf_counter() - start:.1f}s")
+
+        search_ms, fusion_ms, over_budget = [], [], 0
+        dense = [Document(page_content="", metadata={"_id": str(rng.randrange(chunks))}) for _ in range(candidates)]
+        for _ in range(queries):
+            query = f"{rng.choice(['EXP', 'UTIL', 'FOOD'])}-{rng.randrange(1000):03d} {rng.choice(WORDS)} {rng.choice(WORDS)}"
+            user_id = f"user-{rng.randrange(users)}"
+
+            start = time.perf_counter()
+            hits = index.search(query, user_id=user_id, limit=candidates)
+            elapsed = (time.perf_counter() - start) * 1000
+            search_ms.append(elapsed)
+            over_budget += elapsed > budget_ms
+
+            start = time.perf_counter()
+            reciprocal_rank_fusion([dense, [doc for _, _, doc in hits]], [1.0, 1.0])
+            fusion_ms.append((time.perf_counter() - start) * 1000)
+
+        print(f"{'stage':>8} {'p50 ms':>8} {'p95 ms':>8}")
+        print(f"{'bm25':>8} {percentiles(search_ms)[0]:>8.2f} {percentiles(search_ms)[1]:>8.2f}")
+        print(f"{'fusion':>8} {percentiles(fusion_ms)[0]:>8.3f} {percentiles(fusion_ms)[1]:>8.3f}")
+        print(f"{over_budget}/{queries} searches over the {budget_ms:.0f}ms budget")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=200000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--candidates", type=int, default=20)
+    parser.add_argument("--budget-ms", type=float, default=100)
+    args = parser.parse_args()
+    main(args.chunks, args.users, args.queries, args.candidates, args.budget_ms)
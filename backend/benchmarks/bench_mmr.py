@@ -0,0 +1,55 @@
+"""
+Time maximal marginal relevance with near-duplicate suppression on
+candidate sets of the size query_knowledge_base over-fetches.
+
+Candidates are random 768-dimensional vectors (the Gemini embedding size)
+with a share of near-copies mixed in, like overlapping neighbouring chunks.
+
+Usage:
+    python -m benchmarks.bench_mmr --candidates 20 50 100 --k 3
+"""
+
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from app.knowledge.retrieval import cosine_similarities, maximal_marginal_relevance
+
+DIMENSIONS = 768
+
+
+def candidate_set(rng: np.random.Generator, count: int, duplicate_share: float):
+    vectors = rng.standard_normal((count, DIMENSIONS)).astype(np.float32)
+    duplicates = int(count * duplicate_share)
+    sources = rng.integers(0, count - duplicates, duplicates)
+    vectors[count - duplicates:] = vectors[sources] + rng.normal(0, 0.05, (duplicates, DIMENSIONS))
+    return rng.standard_normal(DIMENSIONS).astype(np.float32), vectors
+
+
+def main(sizes, k: int, runs: int, duplicate_share: float):
+    rng = np.random.default_rng(0)
+    print(f"k={k}, {DIMENSIONS}-dim vectors, {duplicate_share:.0%} near-duplicates, {runs} runs")
+    print(f"{'candidates':>10} {'p50 ms':>8} {'p95 ms':>8} {'kept':>5}")
+    for size in sizes:
+        timings, kept = [], 0
+        for _ in range(runs):
+            query, vectors = candidate_set(rng, size, duplicate_share)
+            start = time.perf_counter()
+            relevance = cosine_similarities(query, vectors)
+            selected = maximal_marginal_relevance(relevance, vectors, k)
+            timings.append((time.perf_counter() - start) * 1000)
+            kept = len(selected)
+        timings.sort()
+        print(f"{size:>10} {statistics.median(timings):>8.3f} {timings[int(runs * 0.95) - 1]:>8.3f} {kept:>5}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", type=int, nargs="+", default=[20, 50, 100])
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--runs", type=int, default=1000)
+    parser.add_argument("--duplicate-share", type=float, default=0.3)
+    args = parser.parse_args()
+    main(args.candidates, args.k, args.runs, args.duplicate_share)
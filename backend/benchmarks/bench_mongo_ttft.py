@@ -0,0 +1,95 @@
+"""
+Benchmark p99 time-to-first-token of concurrent SSE streams with the blocking
+and the async MongoDB clients.
+
+Each simulated stream follows the chat hot path in add_langgraph_route.py:
+load the history, save the user message, emit the first token after a fake
+model latency, then save the assistant message. Requires a reachable MongoDB
+at MONGODB_URI.
+
+Usage:
+    python -m benchmarks.bench_mongo_ttft --streams 1 10 50 100 --history 200
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+from app.database.async_mongo_client import AsyncMongoDBClient
+from app.database.mongo_client import MongoDBClient
+
+MODEL_LATENCY_S = 0.05
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def sync_stream(client: MongoDBClient, conversation_id: str, ttfts: list):
+    start = time.perf_counter()
+    if client.health_check():
+        client.get_conversation_messages(conversation_id)
+        client.save_message(conversation_id, {"role": "user", "content": "hello"})
+    await asyncio.sleep(MODEL_LATENCY_S)
+    ttfts.append(time.perf_counter() - start)
+    if client.health_check():
+        client.save_message(conversation_id, {"role": "assistant", "content": "hi there"})
+
+
+async def async_stream(client: AsyncMongoDBClient, conversation_id: str, ttfts: list):
+    start = time.perf_counter()
+    if client.health_check():
+        await client.get_conversation_messages(conversation_id)
+        await client.save_message(conversation_id, {"role": "user", "content": "hello"})
+    await asyncio.sleep(MODEL_LATENCY_S)
+    ttfts.append(time.perf_counter() - start)
+    if client.health_check():
+        await client.save_message(conversation_id, {"role": "assistant", "content": "hi there"})
+
+
+def seed_history(client: MongoDBClient, conversation_ids, history: int):
+    for conversation_id in conversation_ids:
+        client.create_conversation(conversation_id, "bench")
+        client.db["messages"].insert_many([
+            {"conversation_id": conversation_id, "timestamp": f"{i:08d}", "role": "user", "content": "x" * 200}
+            for i in range(history)
+        ])
+
+
+async def run(streams_list, history: int):
+    sync_client = MongoDBClient()
+    async_client = AsyncMongoDBClient()
+    await async_client.connect()
+    if sync_client.client is None or async_client.client is None:
+        raise SystemExit("MongoDB is not reachable, set MONGODB_URI")
+
+    print(f"{'streams':>8} {'client':>6} {'p50 ms':>9} {'p99 ms':>9}")
+    for streams in streams_list:
+        conversation_ids = [f"bench-{uuid.uuid4()}" for _ in range(streams)]
+        seed_history(sync_client, conversation_ids, history)
+
+        for name, client, stream in (
+                ("sync", sync_client, sync_stream),
+                ("async", async_client, async_stream),
+        ):
+            ttfts = []
+            await asyncio.gather(*(stream(client, cid, ttfts) for cid in conversation_ids))
+            print(f"{streams:>8} {name:>6} {statistics.median(ttfts) * 1000:>9.1f} "
+                  f"{percentile(ttfts, 99) * 1000:>9.1f}")
+
+        for conversation_id in conversation_ids:
+            sync_client.delete_conversation(conversation_id)
+
+    await async_client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--streams", type=int, nargs="+", default=[1, 10, 50, 100])
+    parser.add_argument("--history", type=int, default=200, help="messages per conversation")
+    args = parser.parse_args()
+    asyncio.run(run(args.streams, args.history))
@@ -0,0 +1,86 @@
+"""
+Benchmark PDF parsing and splitting throughput (pages/sec) for 1 to N parser
+processes on a synthetic PDF.
+
+Usage:
+    python -m benchmarks.bench_pdf_parsing --pages 500 --max-workers 8
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from app.knowledge.parsing import PDF_CONTENT_TYPE, parse_document
+
+LOREM = ("Lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor "
+         "incididunt ut labore et dolore magna aliqua Ut enim ad minim veniam quis nostrud")
+
+
+def write_synthetic_pdf(path: str, pages: int, lines_per_page: int = 45):
+    """Write a minimal text PDF with `pages` pages of Helvetica text."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once the page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_numbers = []
+    for page in range(pages):
+        lines = [f"({page + 1}.{line + 1} {LOREM}) Tj T*" for line in range(lines_per_page)]
+        stream = ("BT /F1 9 Tf 11 TL 36 800 Td " + " ".join(lines) + " ET").encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_number = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_number
+        )
+        page_numbers.append(len(objects))
+    kids = " ".join(f"{number} 0 R" for number in page_numbers).encode()
+    objects[1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % pages
+
+    with open(path, "wb") as pdf:
+        pdf.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(pdf.tell())
+            pdf.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+        xref = pdf.tell()
+        pdf.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        for offset in offsets:
+            pdf.write(b"%010d 00000 n \n" % offset)
+        pdf.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+
+
+def main(pages: int, max_workers: int, pages_per_task: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "synthetic.pdf")
+        write_synthetic_pdf(path, pages)
+        print(f"Synthetic PDF: {pages} pages, {os.path.getsize(path) / 1024:.0f} KiB")
+
+        start = time.perf_counter()
+        baseline = parse_document(path, PDF_CONTENT_TYPE, pages_per_task=pages_per_task, use_pool=False)
+        elapsed = time.perf_counter() - start
+        print(f"{'workers':>8} {'seconds':>9} {'pages/s':>9} {'chunks':>8}")
+        print(f"{'inline':>8} {elapsed:>9.2f} {pages / elapsed:>9.1f} {len(baseline):>8}")
+
+        for workers in range(1, max_workers + 1):
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                # Warm the workers up so process start-up is not measured
+                list(pool.map(abs, range(workers)))
+                start = time.perf_counter()
+                chunks = parse_document(path, PDF_CONTENT_TYPE, executor=pool, pages_per_task=pages_per_task)
+                elapsed = time.perf_counter() - start
+
+            same_order = [c.page_content for c in chunks] == [c.page_content for c in baseline]
+            print(f"{workers:>8} {elapsed:>9.2f} {pages / elapsed:>9.1f} {len(chunks):>8}"
+                  f"{'' if same_order else '  (chunk order differs!)'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--pages-per-task", type=int, default=25)
+    args = parser.parse_args()
+    main(args.pages, args.max_workers, args.pages_per_task)
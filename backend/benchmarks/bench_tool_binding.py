@@ -0,0 +1,76 @@
+"""
+Microbenchmark of the per-step tool setup in the agent graph: binding the
+tool schemas to the model (call_model) and building the ToolNode
+(run_tools), uncached versus served from the per-tool-set caches.
+
+A turn with tool use runs call_model at least twice and run_tools once, and
+every step used to redo both. Frontend tools are synthetic JSON-schema
+function definitions of the kind the chat UI sends.
+
+Usage:
+    python -m benchmarks.bench_tool_binding --frontend-tools 0 5 20 --steps 2000
+"""
+
+import argparse
+import statistics
+import time
+
+from langgraph.prebuilt import ToolNode
+
+from app.langgraph import agent
+from app.models import FrontendToolCall
+
+
+def frontend_tool(index: int) -> FrontendToolCall:
+    return FrontendToolCall(
+        name=f"frontend_tool_{index}",
+        description=f"Render widget {index} in the chat UI",
+        parameters={
+            "type": "object",
+            "properties": {
+                "title": {"type": "string", "description": "Widget title"},
+                "amount": {"type": "number", "description": "Amount to show"},
+                "tags": {"type": "array", "items": {"type": "string"}},
+            },
+            "required": ["title"],
+        },
+    )
+
+
+def time_steps(step, steps: int):
+    timings = []
+    for _ in range(steps):
+        start = time.perf_counter()
+        step()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main(frontend_counts, steps: int):
+    print(f"{'frontend tools':>14} {'path':>8} {'bind us':>9} {'toolnode us':>12}")
+    for count in frontend_counts:
+        config = {"configurable": {"frontend_tools": [frontend_tool(i) for i in range(count)]}}
+
+        uncached_bind = time_steps(lambda: agent.model.bind_tools(agent.get_tool_defs(config)), steps)
+        uncached_node = time_steps(lambda: ToolNode(agent.get_tools(config)), steps)
+
+        agent.bound_models.clear()
+        agent.tool_nodes.clear()
+        cached_bind = time_steps(lambda: agent.get_bound_model(config), steps)
+        cached_node = time_steps(lambda: agent.get_tool_node(config), steps)
+
+        for path, bind, node in (("uncached", uncached_bind, uncached_node), ("cached", cached_bind, cached_node)):
+            print(f"{count:>14} {path:>8} {statistics.median(bind) * 1e6:>9.1f} "
+                  f"{statistics.median(node) * 1e6:>12.1f}")
+
+    stats = agent.tool_cache_stats()
+    print(f"cache hit rates: bound models {stats['bound_models']['hit_rate']:.3f}, "
+          f"tool nodes {stats['tool_nodes']['hit_rate']:.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frontend-tools", type=int, nargs="+", default=[0, 5, 20])
+    parser.add_argument("--steps", type=int, default=2000)
+    args = parser.parse_args()
+    main(args.frontend_tools, args.steps)
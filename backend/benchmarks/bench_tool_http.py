@@ -0,0 +1,112 @@
+"""
+Benchmark the tool HTTP layer against a local stub of the spending-model API.
+
+The stub serves the sub-categories webhook with a configurable latency and
+can fail a share of requests with 503s. Concurrent tool calls run while a
+ticker coroutine measures event-loop lag. The blocking `requests.get` the
+tools used to make shows up as lag roughly equal to the upstream latency
+times the number of calls. The pooled async client keeps lag near zero.
+A final phase takes the stub down entirely to show the circuit breaker
+failing fast.
+
+Usage:
+    python -m benchmarks.bench_tool_http --calls 50 --latency-ms 200 --error-rate 0.2
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def start_stub(latency: float, error_rate: float) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency)
+            if random.random() < error_rate:
+                self.send_response(503)
+                self.end_headers()
+                return
+            body = json.dumps({"data": [
+                {"name": f"Sub {i}", "code": f"C{i}", "categoryName": "Food", "description": "Meals"}
+                for i in range(30)
+            ]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def measure(label: str, calls: int, call):
+    """Run `calls` concurrent calls while sampling the event loop's scheduling lag."""
+    lags, done = [], False
+
+    async def ticker():
+        while not done:
+            start = time.perf_counter()
+            await asyncio.sleep(0.01)
+            lags.append(time.perf_counter() - start - 0.01)
+
+    tick = asyncio.create_task(ticker())
+    start = time.perf_counter()
+    results = await asyncio.gather(*(call() for _ in range(calls)), return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    done = True
+    await tick
+    failed = sum(isinstance(result, Exception) for result in results)
+    print(f"{label:>8}: {elapsed * 1000:>7.0f} ms total, {failed:>3} failed, "
+          f"max loop lag {max(lags, default=0) * 1000:>6.0f} ms")
+
+
+async def main(calls: int, latency_ms: float, error_rate: float):
+    server = start_stub(latency_ms / 1000, error_rate)
+    os.environ["SPENDING_API_URL"] = f"http://127.0.0.1:{server.server_port}"
+
+    import requests
+
+    from app.http_client import ToolHTTPClient
+    from app.langgraph import tools
+
+    url = f"{os.environ['SPENDING_API_URL']}/api/v1/user-spending-models/current/webhook/sub-categories"
+    tools.SPENDING_API_URL = os.environ["SPENDING_API_URL"]
+    tools.tool_http = client = ToolHTTPClient(backoff=0.05, breaker_threshold=3, breaker_reset=1.0)
+
+    async def blocking_call():
+        # What the tools did before: a synchronous request on the event loop thread
+        response = requests.get(url, params={"userId": "bench"})
+        response.raise_for_status()
+        return response.json()
+
+    print(f"{calls} concurrent calls, {latency_ms:.0f} ms upstream latency, {error_rate:.0%} 503s")
+    await measure("blocking", calls, blocking_call)
+    await measure("async", calls, lambda: tools.fetch_user_subcategories("bench"))
+    print(f"client stats: {client.stats()}")
+
+    server.shutdown()
+    server.server_close()
+    await measure("down", calls, lambda: tools.fetch_user_subcategories("bench"))
+    # The failures above opened the circuit; these calls are rejected without touching the network
+    await measure("open", calls, lambda: tools.fetch_user_subcategories("bench"))
+    print(f"client stats: {client.stats()}")
+    await client.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--error-rate", type=float, default=0.2)
+    args = parser.parse_args()
+    asyncio.run(main(args.calls, args.latency_ms, args.error_rate))
@@ -0,0 +1,124 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.http_client import CircuitOpenError, ToolHTTPClient, ToolHTTPError
+
+URL = "http://spending.test/api"
+
+
+def make_client(responses, **kwargs):
+    """Client whose transport answers with the given status codes in order, then 200; returns (client, calls)."""
+    calls = []
+    statuses = list(responses)
+
+    def handler(request):
+        calls.append(request)
+        status = statuses.pop(0) if statuses else 200
+        return httpx.Response(status, json={"data": []})
+
+    options = {"backoff": 0, "retries": 2, "breaker_threshold": 2, "breaker_reset": 30}
+    options.update(kwargs)
+    return ToolHTTPClient(transport=httpx.MockTransport(handler), **options), calls
+
+
+async def call(client):
+    try:
+        return await client.get_json(URL)
+    finally:
+        await client.aclose()
+
+
+def test_retries_503():
+    client, calls = make_client([503, 503])
+
+    assert asyncio.run(call(client)) == {"data": []}
+    assert len(calls) == 3
+    assert client.retried == 2
+
+
+def test_4xx_raises_without_retry():
+    client, calls = make_client([404])
+
+    with pytest.raises(ToolHTTPError) as error:
+        asyncio.run(call(client))
+    assert error.value.status_code == 404
+    assert len(calls) == 1
+
+
+def test_circuit_opens_after_threshold():
+    client, calls = make_client([503] * 100, retries=0)
+
+    async def scenario():
+        for _ in range(2):
+            with pytest.raises(ToolHTTPError):
+                await client.get_json(URL)
+        with pytest.raises(CircuitOpenError):
+            await client.get_json(URL)
+        await client.aclose()
+
+    asyncio.run(scenario())
+    assert len(calls) == 2
+    assert client.rejected == 1
+    assert client.stats()["circuits"]["spending.test"]["state"] == "open"
+
+
+def test_half_open_recovery():
+    client, calls = make_client([503, 503], retries=0, breaker_reset=0.05)
+
+    async def scenario():
+        for _ in range(2):
+            with pytest.raises(ToolHTTPError):
+                await client.get_json(URL)
+        await asyncio.sleep(0.06)
+        # The trial call succeeds and closes the circuit
+        assert await client.get_json(URL) == {"data": []}
+        assert await client.get_json(URL) == {"data": []}
+        await client.aclose()
+
+    asyncio.run(scenario())
+    assert len(calls) == 4
+    assert client.stats()["circuits"]["spending.test"]["state"] == "closed"
+
+
+def test_half_open_allows_a_single_trial():
+    slow_done, trial_done = asyncio.Event(), asyncio.Event()
+    calls = []
+
+    async def handler(request):
+        calls.append(request)
+        if request.url.params.get("call") == "slow":
+            await slow_done.wait()
+        elif request.url.params.get("call") == "trial":
+            await trial_done.wait()
+        return httpx.Response(503)
+
+    client = ToolHTTPClient(transport=httpx.MockTransport(handler), backoff=0, retries=0,
+                            breaker_threshold=2, breaker_reset=0.05)
+
+    async def scenario():
+        # Started while the circuit is closed, finishes while the half-open trial is in flight
+        slow = asyncio.create_task(client.get_json(URL, params={"call": "slow"}))
+        await asyncio.sleep(0)
+        for _ in range(2):
+            with pytest.raises(ToolHTTPError):
+                await client.get_json(URL)
+        await asyncio.sleep(0.06)
+        trial = asyncio.create_task(client.get_json(URL, params={"call": "trial"}))
+        await asyncio.sleep(0.01)
+        slow_done.set()
+        with pytest.raises(ToolHTTPError):
+            await slow
+        await asyncio.sleep(0.06)
+
+        # The trial still holds the half-open slot
+        with pytest.raises(CircuitOpenError):
+            await client.get_json(URL)
+        trial_done.set()
+        with pytest.raises(ToolHTTPError):
+            await trial
+        await client.aclose()
+
+    asyncio.run(scenario())
+    assert len(calls) == 4
@@ -0,0 +1,45 @@
+"""
+Explain-plan check of the hot MongoDB queries.
+
+Runs against the server in TEST_MONGODB_URI and skips when it is unset or
+unreachable. Each run bootstraps a throwaway database and drops it.
+"""
+
+import asyncio
+import os
+import uuid
+
+import pytest
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.database.schema import bootstrap_schema, verify_query_plans
+
+TEST_MONGODB_URI = os.environ.get("TEST_MONGODB_URI")
+
+
+async def explain_hot_queries():
+    client = AsyncIOMotorClient(TEST_MONGODB_URI, serverSelectionTimeoutMS=2000)
+    try:
+        try:
+            await client.admin.command("ping")
+        except Exception as e:
+            pytest.skip(f"MongoDB not reachable at {TEST_MONGODB_URI}: {e}")
+        db = client[f"query_plans_{uuid.uuid4().hex[:8]}"]
+        try:
+            await bootstrap_schema(db)
+            return await verify_query_plans(db)
+        finally:
+            await client.drop_database(db.name)
+    finally:
+        client.close()
+
+
+@pytest.mark.skipif(not TEST_MONGODB_URI, reason="TEST_MONGODB_URI is not set")
+def test_hot_queries_use_indexes():
+    report = asyncio.run(explain_hot_queries())
+
+    assert report
+    for name, plan in report.items():
+        assert "error" not in plan, f"{name}: {plan['error']}"
+        assert "COLLSCAN" not in plan["stages"], f"{name} scans the collection: {plan['stages']}"
+        assert plan["covered"], f"{name} is not served by an index: {plan['stages']}"
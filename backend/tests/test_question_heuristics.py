@@ -0,0 +1,50 @@
+import unicodedata
+
+import pytest
+
+from app.langgraph.question_heuristics import heuristic_skip
+
+
+@pytest.mark.parametrize("question, reason", [
+    ("", "empty"),
+    ("?!", "empty"),
+    ("Thanks!", "smalltalk"),
+    ("cảm ơn bạn", "smalltalk"),
+    ("Xin chào", "smalltalk"),
+    ("2*(350+40)", "arithmetic"),
+    ("1.5 * 4 =", "arithmetic"),
+    ("multiply that by 2", "arithmetic_followup"),
+    ("Now divide it by 3, please", "arithmetic_followup"),
+    ("What's that plus 10?", "arithmetic_followup"),
+    ("add 5 to that", "arithmetic_followup"),
+    ("chia nó cho 3", "arithmetic_followup"),
+    ("nhân đó với 2", "arithmetic_followup"),
+    ("kết quả đó nhân với 1,5 bằng bao nhiêu?", "arithmetic_followup"),
+])
+def test_skips(question, reason):
+    assert heuristic_skip(question) == reason
+
+
+@pytest.mark.parametrize("question", [
+    # Vietnamese syllables that also start math verbs
+    "tổng quan tài liệu này",
+    "nhân viên đó là ai",
+    "chia sẻ tài liệu này",
+    "cộng đồng này là gì",
+    "Tổng chi tiêu tháng này là bao nhiêu?",
+    "Chia 2024 cho các phòng ban này thế nào?",
+    # English words that are math verbs in other contexts
+    "How many times is it mentioned?",
+    "Add a summary of this document",
+    "double check that clause",
+    # Lone numbers and letters
+    "2024?",
+    "x",
+    "What is the refund policy?",
+])
+def test_retrieves(question):
+    assert heuristic_skip(question) is None
+
+
+def test_decomposed_vietnamese():
+    assert heuristic_skip(unicodedata.normalize("NFD", "chia nó cho 3")) == "arithmetic_followup"
@@ -0,0 +1,52 @@
+import asyncio
+
+from app.langgraph.subcategory_cache import StaleWhileRevalidateCache
+
+
+def test_invalidating_one_key_keeps_other_inflight_fetches():
+    release = asyncio.Event()
+    fetches = []
+
+    async def fetch(key):
+        fetches.append(key)
+        await release.wait()
+        return f"{key}-{len(fetches)}"
+
+    async def scenario():
+        cache = StaleWhileRevalidateCache(fetch, fresh_ttl=60, stale_ttl=60)
+        a, b = asyncio.create_task(cache.get("a")), asyncio.create_task(cache.get("b"))
+        while len(fetches) < 2:
+            await asyncio.sleep(0)
+        cache.invalidate("a")
+        release.set()
+        await asyncio.gather(a, b)
+
+        # b's fetch was stored; a's started before its invalidation and was not
+        assert await cache.get("b") == "b-2"
+        assert await cache.get("a") == "a-3"
+        return cache
+
+    cache = asyncio.run(scenario())
+    assert cache.misses == 3
+
+
+def test_invalidating_everything_discards_inflight_fetches():
+    release = asyncio.Event()
+    fetches = []
+
+    async def fetch(key):
+        fetches.append(key)
+        await release.wait()
+        return len(fetches)
+
+    async def scenario():
+        cache = StaleWhileRevalidateCache(fetch, fresh_ttl=60, stale_ttl=60)
+        a = asyncio.create_task(cache.get("a"))
+        while not fetches:
+            await asyncio.sleep(0)
+        cache.invalidate()
+        release.set()
+        assert await a == 1
+        assert await cache.get("a") == 2
+
+    asyncio.run(scenario())
@@ -0,0 +1,87 @@
+import asyncio
+
+from pymongo.errors import BulkWriteError
+
+from app.database.constants import SUMMARY_BATCHES_FIELD
+from app.database.write_behind import MessageWriteBehind, PendingMessage
+
+
+class Messages:
+    def __init__(self):
+        self.docs = {}
+
+    async def insert_many(self, docs, ordered=False):
+        duplicates = [{"index": i, "code": 11000} for i, doc in enumerate(docs) if doc["_id"] in self.docs]
+        for doc in docs:
+            self.docs.setdefault(doc["_id"], doc)
+        if duplicates:
+            raise BulkWriteError({"writeErrors": duplicates})
+
+
+class Conversations:
+    """Applies the summary UpdateOnes; `faults` scripts one failure per bulk_write call."""
+
+    def __init__(self, *conversation_ids):
+        self.docs = {cid: {"conversation_id": cid, "message_count": 0} for cid in conversation_ids}
+        self.faults = []
+
+    async def bulk_write(self, updates, ordered=False):
+        fault = self.faults.pop(0) if self.faults else None
+        errors = []
+        for index, update in enumerate(updates):
+            if fault == "fail_first" and index == 0:
+                errors.append({"index": index, "code": 112})
+                continue
+            spec, doc = update._filter, update._doc
+            conversation = self.docs[spec["conversation_id"]]
+            if spec[SUMMARY_BATCHES_FIELD]["$ne"] in conversation.get(SUMMARY_BATCHES_FIELD, []):
+                continue
+            conversation.update(doc["$set"])
+            conversation["message_count"] += doc["$inc"]["message_count"]
+            conversation.setdefault(SUMMARY_BATCHES_FIELD, []).extend(doc["$push"][SUMMARY_BATCHES_FIELD]["$each"])
+        if errors:
+            raise BulkWriteError({"writeErrors": errors})
+        if fault == "lost_ack":
+            raise ConnectionError("connection reset before the acknowledgement")
+
+
+def write(conversations, conversation_ids):
+    """Flush one batch with a message per conversation id, as the flusher would."""
+    db = {"messages": Messages(), "conversations": conversations}
+    writer = MessageWriteBehind(lambda: db, "messages", "conversations", max_retries=2)
+
+    async def scenario():
+        writer._ensure_primitives()
+        for i, conversation_id in enumerate(conversation_ids):
+            await writer._slots.acquire()
+            writer._pending_by_conversation[conversation_id] += 1
+            writer._buffer.append(PendingMessage(conversation_id, {
+                "_id": f"m{i}", "conversation_id": conversation_id, "timestamp": f"2024-01-01T00:00:0{i}",
+                "role": "user", "content": f"message {i}",
+            }))
+        await writer.flush()
+
+    asyncio.run(scenario())
+    return writer
+
+
+def test_lost_acknowledgement_counts_once():
+    conversations = Conversations("a", "b")
+    conversations.faults = ["lost_ack"]
+
+    writer = write(conversations, ["a", "a", "b"])
+
+    assert writer.failed_flushes == 0
+    assert conversations.docs["a"]["message_count"] == 2
+    assert conversations.docs["b"]["message_count"] == 1
+
+
+def test_partial_summary_failure_retries_only_the_failed_conversation():
+    conversations = Conversations("a", "b")
+    conversations.faults = ["fail_first"]
+
+    write(conversations, ["a", "b", "b"])
+
+    assert conversations.docs["a"]["message_count"] == 1
+    assert conversations.docs["b"]["message_count"] == 2
+    assert conversations.docs["a"]["last_message_preview"] == "message 0"
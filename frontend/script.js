@@ -37,6 +37,18 @@ document.addEventListener('DOMContentLoaded', () => {
     let conversations = [];
     let documents = [];
 
+    // History paging: older messages are loaded as the user scrolls up
+    const HISTORY_PAGE_SIZE = 50;
+    let historyCursor = null;
+    let historyHasMore = false;
+    let historyLoading = false;
+
+    // Conversation paging: more conversations are loaded as the sidebar is scrolled down
+    const CONVERSATIONS_PAGE_SIZE = 50;
+    let conversationsCursor = null;
+    let conversationsHasMore = false;
+    let conversationsLoading = false;
+
     // Include marked.js library for markdown rendering
     const markedScript = document.createElement('script');
     markedScript.src = 'https://cdn.jsdelivr.net/npm/marked@4.0.0/marked.min.js';
@@ -67,7 +79,7 @@ document.addEventListener('DOMContentLoaded', () => {
     };
 
     // Function to display a message in the chat
-    const displayMessage = (message, sender) => {
+    const displayMessage = (message, sender, prepend = false) => {
         // Create message container
         const messageContainer = document.createElement('div');
         messageContainer.classList.add('message-container', sender === 'user' ? 'user' : 'assistant');
@@ -120,6 +132,10 @@ document.addEventListener('DOMContentLoaded', () => {
             messageContainer.appendChild(avatar);
         }
 
+        if (prepend) {
+            chatLog.insertBefore(messageContainer, chatLog.firstChild);
+            return;
+        }
         chatLog.appendChild(messageContainer);
         chatLog.scrollTop = chatLog.scrollHeight;
     };
@@ -215,15 +231,11 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     };
 
-    // Function to load all conversations
+    // Function to load the first page of conversations
     const loadConversations = async () => {
         try {
-            const response = await fetch(`${API_BASE_URL}/conversations`);
-            if (!response.ok) {
-                throw new Error(`HTTP error! status: ${response.status}`);
-            }
-
-            conversations = await response.json();
+            const page = await fetchConversationsPage();
+            conversations = page.conversations || [];
             renderConversationList();
 
             return conversations;
@@ -233,6 +245,46 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     };
 
+    // Function to fetch one page of conversations and remember where the next page starts
+    const fetchConversationsPage = async (before = null) => {
+        const params = new URLSearchParams({ limit: CONVERSATIONS_PAGE_SIZE });
+        if (before) {
+            params.set('before', before);
+        }
+        const response = await fetch(`${API_BASE_URL}/conversations?${params}`);
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+
+        const page = await response.json();
+        conversationsCursor = page.next_cursor || null;
+        conversationsHasMore = Boolean(page.has_more);
+        return page;
+    };
+
+    // Function to load more conversations when the sidebar is scrolled to the bottom
+    const loadMoreConversations = async () => {
+        if (!conversationsHasMore || conversationsLoading) return;
+
+        conversationsLoading = true;
+        try {
+            const page = await fetchConversationsPage(conversationsCursor);
+            const known = new Set(conversations.map(c => c.conversation_id));
+            conversations = conversations.concat((page.conversations || []).filter(c => !known.has(c.conversation_id)));
+            renderConversationList();
+        } catch (error) {
+            console.error('Error loading more conversations:', error);
+        } finally {
+            conversationsLoading = false;
+        }
+    };
+
+    conversationList.addEventListener('scroll', () => {
+        if (conversationList.scrollTop + conversationList.clientHeight >= conversationList.scrollHeight - 50) {
+            loadMoreConversations();
+        }
+    });
+
     // Function to render the conversation list
     const renderConversationList = () => {
         conversationList.innerHTML = '';
@@ -250,6 +302,9 @@ document.addEventListener('DOMContentLoaded', () => {
             }
 
             item.textContent = conversation.title;
+            if (conversation.last_message_preview) {
+                item.title = conversation.last_message_preview;
+            }
             item.dataset.id = conversation.conversation_id;
 
             item.addEventListener('click', () => selectConversation(conversation.conversation_id));
@@ -274,19 +329,16 @@ document.addEventListener('DOMContentLoaded', () => {
         // Clear chat log
         chatLog.innerHTML = '';
 
-        // Load conversation history from the API
+        // Load the newest page of conversation history from the API
+        historyCursor = null;
+        historyHasMore = false;
         try {
-            const response = await fetch(`${API_BASE_URL}/${conversationId}/history`);
-            if (!response.ok) {
-                throw new Error(`HTTP error! status: ${response.status}`);
-            }
-
-            const data = await response.json();
-            const messages = data.messages || [];
+            const page = await fetchHistoryPage(conversationId);
+            const messages = page.messages || [];
 
-            // Display messages in the chat log
+            // Display messages in the chat log (pages are newest first)
             if (messages.length > 0) {
-                messages.forEach(message => {
+                messages.slice().reverse().forEach(message => {
                     displayMessage(message.content, message.role);
                 });
             } else {
@@ -300,6 +352,54 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     };
 
+    // Function to fetch one page of history and remember where the next older page starts
+    const fetchHistoryPage = async (conversationId, before = null) => {
+        const params = new URLSearchParams({ limit: HISTORY_PAGE_SIZE, fields: 'role,content' });
+        if (before) {
+            params.set('before', before);
+        }
+        const response = await fetch(`${API_BASE_URL}/${conversationId}/history?${params}`);
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+
+        const page = await response.json();
+        if (conversationId === currentConversationId) {
+            historyCursor = page.before_cursor || null;
+            historyHasMore = Boolean(page.has_more);
+        }
+        return page;
+    };
+
+    // Function to load older messages when the user scrolls to the top of the chat log
+    const loadOlderMessages = async () => {
+        if (!historyHasMore || historyLoading || !currentConversationId) return;
+
+        historyLoading = true;
+        const conversationId = currentConversationId;
+        try {
+            const page = await fetchHistoryPage(conversationId, historyCursor);
+            if (conversationId !== currentConversationId) return;
+
+            // Keep the visible messages in place while older ones are inserted above them
+            const previousHeight = chatLog.scrollHeight;
+            (page.messages || []).forEach(message => {
+                displayMessage(message.content, message.role, true);
+            });
+            chatLog.scrollTop += chatLog.scrollHeight - previousHeight;
+        } catch (error) {
+            console.error('Error loading older messages:', error);
+        } finally {
+            historyLoading = false;
+        }
+    };
+
+    chatLog.addEventListener('scroll', () => {
+        if (chatLog.scrollTop < 50) {
+            loadOlderMessages();
+        }
+    });
+
     // Function to rename the current conversation
     const renameConversation = async () => {
         if (!currentConversationId) return;
@@ -650,7 +750,23 @@ document.addEventListener('DOMContentLoaded', () => {
                 throw new Error(`HTTP error! status: ${response.status}`);
             }
 
-            const newDocument = await response.json();
+            // Ingestion runs as a background job; poll until it finishes
+            let job = await response.json();
+            while (job.status === 'queued' || job.status === 'running') {
+                const progress = job.chunks_total ? ` (${job.chunks_embedded}/${job.chunks_total} chunks)` : '';
+                loadingDiv.querySelector('p').textContent = `Processing ${file.name}...${progress}`;
+                await new Promise(resolve => setTimeout(resolve, 1000));
+
+                const jobResponse = await fetch(`${API_BASE_URL}/knowledge/jobs/${job.job_id}`);
+                if (!jobResponse.ok) {
+                    throw new Error(`HTTP error! status: ${jobResponse.status}`);
+                }
+                job = await jobResponse.json();
+            }
+
+            if (job.status === 'failed') {
+                throw new Error(job.error || 'Document processing failed');
+            }
 
             // Remove loading indicator
             loadingDiv.remove();